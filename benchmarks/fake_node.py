@@ -0,0 +1,248 @@
+"""
+Minimal JSON-RPC node that serves fixture logs, blocks, call results and receipts.
+
+Blocks are synthesised on demand from the fixture's head and timestamp, so
+binary searches over block numbers work against any height. Every request is
+counted per method so benchmarks can report RPC cost.
+"""
+import hashlib
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from eth_abi import decode, encode
+
+BLOCK_TIME = 12
+MULTICALL3_ADDRESS = '0xca11bde05977b3631167028862be2a173976ca11'
+AGGREGATE3_SELECTOR = '0x82ad56cb'  # aggregate3((address,bool,bytes)[])
+
+
+def to_hex(value: int) -> str:
+    return hex(value)
+
+
+def block_hash(number: int) -> str:
+    return '0x' + format(number, '064x')
+
+
+def parse_block(tag, head: int) -> int:
+    if tag in (None, 'latest', 'safe', 'finalized', 'pending'):
+        return head
+    if tag == 'earliest':
+        return 0
+    if isinstance(tag, int):
+        return tag
+    return int(tag, 16)
+
+
+class FakeNode:
+    """Serve a fixture dict over HTTP JSON-RPC.
+
+    Fixture keys:
+        head, now          head block number and its timestamp
+        block_time         seconds per block (default 12)
+        logs               raw logs in JSON-RPC format
+        calls              '<to>:<calldata>' or '<to>:<selector>' -> hex return data
+                           (Multicall3 aggregate3 batches are executed against these)
+        receipts           tx hash -> raw receipt
+        code               addresses that report deployed code
+        http               GET path -> JSON payload (stand-in for REST APIs, served with an ETag)
+    """
+
+    def __init__(self, fixture: dict):
+        self.fixture = fixture
+        self.head = fixture['head']
+        self.now = fixture['now']
+        self.block_time = fixture.get('block_time', BLOCK_TIME)
+        self.logs = sorted(
+            fixture.get('logs', []),
+            key=lambda log: (int(log['blockNumber'], 16), int(log['logIndex'], 16))
+        )
+        self.calls = {k.lower(): v for k, v in fixture.get('calls', {}).items()}
+        self.receipts = {k.lower(): v for k, v in fixture.get('receipts', {}).items()}
+        self.code = {a.lower() for a in fixture.get('code', [])}
+        self.http = fixture.get('http', {})
+        self.counts = Counter()
+        self.round_trips = 0
+        self._lock = threading.Lock()
+        self._server = None
+
+    # --- lifecycle -----------------------------------------------------------
+
+    def start(self) -> str:
+        node = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length))
+                with node._lock:
+                    node.round_trips += 1
+                if isinstance(payload, list):
+                    body = [node.dispatch(item) for item in payload]
+                else:
+                    body = node.dispatch(payload)
+                self._write(200, body)
+
+            def do_GET(self):
+                path = self.path.split('?')[0]
+                with node._lock:
+                    node.round_trips += 1
+                    node.counts[f'GET {path}'] += 1
+                if path not in node.http:
+                    self._write(404, {'error': 'not found'})
+                    return
+                etag = '"' + hashlib.sha1(json.dumps(node.http[path], sort_keys=True).encode()).hexdigest() + '"'
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.end_headers()
+                    return
+                self._write(200, node.http[path], {'ETag': etag})
+
+            def _write(self, status, body, headers=None):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return f'http://127.0.0.1:{self._server.server_address[1]}'
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+
+    # --- JSON-RPC ------------------------------------------------------------
+
+    def dispatch(self, request: dict) -> dict:
+        method = request.get('method')
+        params = request.get('params') or []
+        with self._lock:
+            self.counts[method] += 1
+        response = {'jsonrpc': '2.0', 'id': request.get('id')}
+        handler = getattr(self, f'rpc_{method}', None)
+        if handler is None:
+            response['error'] = {'code': -32601, 'message': f'method {method} not supported'}
+            return response
+        try:
+            response['result'] = handler(*params)
+        except RpcError as e:
+            response['error'] = {'code': -32000, 'message': str(e)}
+        return response
+
+    def rpc_web3_clientVersion(self):
+        return 'FakeNode/benchmarks'
+
+    def rpc_eth_chainId(self):
+        return to_hex(self.fixture.get('chain_id', 1))
+
+    def rpc_net_version(self):
+        return str(self.fixture.get('chain_id', 1))
+
+    def rpc_eth_blockNumber(self):
+        return to_hex(self.head)
+
+    def rpc_eth_getBlockByNumber(self, tag, full_transactions=False):
+        number = parse_block(tag, self.head)
+        if number > self.head:
+            return None
+        return self.block(number)
+
+    def rpc_eth_getCode(self, address, tag='latest'):
+        return '0x6080' if address.lower() in self.code else '0x'
+
+    def rpc_eth_getTransactionReceipt(self, txn_hash):
+        return self.receipts.get(txn_hash.lower())
+
+    def rpc_eth_call(self, tx, tag='latest'):
+        to = (tx.get('to') or '').lower()
+        data = (tx.get('data') or tx.get('input') or '0x').lower()
+        if to == MULTICALL3_ADDRESS and data.startswith(AGGREGATE3_SELECTOR):
+            return self.aggregate3(data, tag)
+        for key in (f'{to}:{data}', f'{to}:{data[:10]}'):
+            if key in self.calls:
+                return self.calls[key]
+        raise RpcError('execution reverted')
+
+    def aggregate3(self, data, tag):
+        """Execute a Multicall3 aggregate3 batch against the fixture's call table"""
+        (calls,) = decode(['(address,bool,bytes)[]'], bytes.fromhex(data[10:]))
+        results = []
+        for target, allow_failure, call_data in calls:
+            try:
+                result = self.rpc_eth_call({'to': target, 'data': '0x' + call_data.hex()}, tag)
+                results.append((True, bytes.fromhex(result[2:])))
+            except RpcError:
+                if not allow_failure:
+                    raise
+                results.append((False, b''))
+        return '0x' + encode(['(bool,bytes)[]'], [results]).hex()
+
+    def rpc_eth_getLogs(self, log_filter):
+        from_block = parse_block(log_filter.get('fromBlock'), self.head)
+        to_block = parse_block(log_filter.get('toBlock'), self.head)
+        addresses = log_filter.get('address')
+        if isinstance(addresses, str):
+            addresses = [addresses]
+        addresses = {a.lower() for a in addresses} if addresses else None
+        topics = log_filter.get('topics') or []
+        return [
+            log for log in self.logs
+            if from_block <= int(log['blockNumber'], 16) <= to_block
+            and (addresses is None or log['address'].lower() in addresses)
+            and topics_match(log['topics'], topics)
+        ]
+
+    def block(self, number: int) -> dict:
+        return {
+            'number': to_hex(number),
+            'hash': block_hash(number),
+            'parentHash': block_hash(max(number - 1, 0)),
+            'nonce': '0x0000000000000000',
+            'sha3Uncles': '0x' + '00' * 32,
+            'logsBloom': '0x' + '00' * 256,
+            'transactionsRoot': '0x' + '00' * 32,
+            'stateRoot': '0x' + '00' * 32,
+            'receiptsRoot': '0x' + '00' * 32,
+            'miner': '0x' + '00' * 20,
+            'difficulty': '0x0',
+            'totalDifficulty': '0x0',
+            'extraData': '0x',
+            'size': '0x0',
+            'gasLimit': to_hex(30_000_000),
+            'gasUsed': '0x0',
+            'timestamp': to_hex(self.timestamp(number)),
+            'transactions': [],
+            'uncles': [],
+            'baseFeePerGas': '0x1',
+        }
+
+    def timestamp(self, number: int) -> int:
+        return self.now - (self.head - number) * self.block_time
+
+
+class RpcError(Exception):
+    pass
+
+
+def topics_match(log_topics: list, wanted: list) -> bool:
+    for i, want in enumerate(wanted):
+        if want is None:
+            continue
+        if i >= len(log_topics):
+            return False
+        options = want if isinstance(want, list) else [want]
+        if log_topics[i].lower() not in {o.lower() for o in options}:
+            return False
+    return True
@@ -0,0 +1,496 @@
+"""
+Fixture scenarios for the listener benchmarks.
+
+Each scenario builds an ABI-valid chain fixture (logs, call results, receipts)
+for one listener module, plus the patches needed to run a single scan loop of
+that module against the fake node.
+"""
+import os
+import random
+import sys
+
+from eth_abi import encode
+from eth_utils import keccak, to_checksum_address
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+import utils
+from constants import CURVE_LIQUID_LOCKER_COMPOUNDERS, YB, DEPOSIT_DIVIDER, VOTIUM_HELPER, VOTEMARKET_HELPER
+
+DAY = 60 * 60 * 24
+WEEK = DAY * 7
+BLOCK_TIME = 12
+# A Thursday 00:00 UTC epoch boundary used as "now" anchor for incentive scenarios
+ANCHOR_PERIOD = 2914 * WEEK
+
+
+def abi(name):
+    return utils.load_abi(os.path.join(ROOT_DIR, 'abis', f'{name}.json'))
+
+
+def address(label: str) -> str:
+    return to_checksum_address(keccak(text=label)[-20:])
+
+
+def default_value(abi_type_str: str):
+    if abi_type_str.endswith(']'):
+        return []
+    if abi_type_str.startswith('('):
+        inner = abi_type_str[1:-1]
+        return tuple(default_value(t) for t in split_types(inner))
+    if abi_type_str.startswith(('uint', 'int')):
+        return 0
+    if abi_type_str == 'address':
+        return utils.ZERO_ADDRESS
+    if abi_type_str == 'bool':
+        return False
+    if abi_type_str == 'string':
+        return ''
+    if abi_type_str == 'bytes':
+        return b''
+    if abi_type_str.startswith('bytes'):
+        return b'\x00' * int(abi_type_str[5:])
+    raise ValueError(f'No default for {abi_type_str}')
+
+
+def split_types(inner: str) -> list:
+    types, depth, current = [], 0, ''
+    for ch in inner:
+        if ch == ',' and depth == 0:
+            types.append(current)
+            current = ''
+            continue
+        depth += ch == '('
+        depth -= ch == ')'
+        current += ch
+    if current:
+        types.append(current)
+    return types
+
+
+class FixtureBuilder:
+    """Accumulate fake-node fixture data from ABI-level descriptions"""
+
+    def __init__(self, name: str, head: int, now: int):
+        self.name = name
+        self.fixture = {
+            'chain_id': 1,
+            'head': head,
+            'now': now,
+            'block_time': BLOCK_TIME,
+            'logs': [],
+            'calls': {},
+            'receipts': {},
+            'code': [],
+            'http': {},
+        }
+        self._log_index = {}
+        self._tx_counter = 0
+
+    def timestamp(self, block: int) -> int:
+        return self.fixture['now'] - (self.fixture['head'] - block) * BLOCK_TIME
+
+    def tx_hash(self) -> str:
+        self._tx_counter += 1
+        return '0x' + keccak(text=f'{self.name}:{self._tx_counter}').hex()
+
+    def log(self, contract_abi, event_name, contract_address, block, tx_hash=None, **args) -> dict:
+        item = utils.find_abi_item(contract_abi, event_name, item_type='event')
+        topics = ['0x' + keccak(text=utils.abi_signature(item)).hex()]
+        data_types, data_values = [], []
+        for arg in item['inputs']:
+            t = utils.abi_type(arg)
+            value = args.get(arg['name'], default_value(t))
+            if arg.get('indexed'):
+                if t in ('string', 'bytes'):
+                    raw = value.encode() if isinstance(value, str) else value
+                    topics.append('0x' + keccak(raw).hex())
+                else:
+                    topics.append('0x' + encode([t], [value]).hex())
+            else:
+                data_types.append(t)
+                data_values.append(value)
+        index = self._log_index.get(block, 0)
+        self._log_index[block] = index + 1
+        entry = {
+            'address': contract_address.lower(),
+            'topics': topics,
+            'data': '0x' + encode(data_types, data_values).hex(),
+            'blockNumber': hex(block),
+            'blockHash': '0x' + format(block, '064x'),
+            'transactionHash': tx_hash or self.tx_hash(),
+            'transactionIndex': '0x0',
+            'logIndex': hex(index),
+            'removed': False,
+        }
+        self.fixture['logs'].append(entry)
+        return entry
+
+    def call(self, contract_abi, fn_name, contract_address, result, args=None, n_inputs=None):
+        """Register an eth_call result; without args it matches any calldata for the selector"""
+        if n_inputs is None and args is not None:
+            n_inputs = len(args)
+        item = utils.find_abi_item(contract_abi, fn_name, n_inputs=n_inputs)
+        selector = keccak(text=utils.abi_signature(item))[:4]
+        input_types = [utils.abi_type(i) for i in item['inputs']]
+        output_types = [utils.abi_type(o) for o in item['outputs']]
+        if len(output_types) == 1 and not isinstance(result, tuple):
+            result = (result,)
+        data = selector + encode(input_types, list(args)) if args is not None else selector
+        key = f"{contract_address.lower()}:0x{data.hex()}"
+        self.fixture['calls'][key] = '0x' + encode(output_types, list(result)).hex()
+        self.fixture['code'].append(contract_address)
+
+    def receipt(self, tx_hash, block, logs):
+        self.fixture['receipts'][tx_hash] = {
+            'transactionHash': tx_hash,
+            'transactionIndex': '0x0',
+            'blockHash': '0x' + format(block, '064x'),
+            'blockNumber': hex(block),
+            'from': '0x' + '00' * 20,
+            'to': '0x' + '00' * 20,
+            'cumulativeGasUsed': '0x0',
+            'gasUsed': '0x0',
+            'effectiveGasPrice': '0x1',
+            'contractAddress': None,
+            'logs': logs,
+            'logsBloom': '0x' + '00' * 256,
+            'status': '0x1',
+            'type': '0x2',
+        }
+
+
+def spread(rng, count, start, end):
+    return sorted(rng.randint(start, end) for _ in range(count))
+
+
+# --- scenarios ---------------------------------------------------------------
+#
+# Each returns a dict with:
+#   module          dotted module path of the listener
+#   fixture         fake-node fixture
+#   tables          tables whose row counts are reported
+#   schema          optional create_tables(metadata) for autoloaded tables
+#   scanned_blocks  number of blocks one loop covers
+#   patch           optional callable(module) applied after import
+
+
+def resupply_dao(scale=1):
+    rng = random.Random('resupply_dao')
+    voter = '0x11111111063874cE8dC6232cb5C1C849359476E6'
+    registry = '0x10101010E0C3171D894B71B3400668aF311e7D94'
+    start = 22_200_001
+    head = start + 20_000
+    now = ANCHOR_PERIOD
+    b = FixtureBuilder('resupply_dao', head, now)
+    voter_abi = abi('resupply_voter')
+
+    b.call(abi('resupply_registry'), 'getAddress', registry, voter, n_inputs=1)
+    b.call(voter_abi, 'proposalDescription', voter, 'Benchmark proposal', n_inputs=1)
+
+    proposals = 3 * scale
+    blocks = spread(rng, proposals, start, start + 2_000)
+    for pid, block in enumerate(blocks):
+        b.log(voter_abi, 'ProposalCreated', voter, block,
+              account=address(f'proposer{pid}'), id=pid, epoch=10, quorumWeight=5_000_000,
+              payload=[(address('target'), b'\x01\x02')])
+    tallies = [[0, 0] for _ in range(proposals)]
+    for block in spread(rng, 60 * scale, start + 2_001, head):
+        yes = rng.random() < 0.7
+        weight = rng.randint(10_000, 2_000_000)
+        account = address(f'dao-voter{rng.randint(0, 40)}')
+        pid = rng.randrange(proposals)
+        tallies[pid][0 if yes else 1] += weight
+        b.log(voter_abi, 'VoteCast', voter, block, account=account, id=pid,
+              weightYes=weight if yes else 0, weightNo=0 if yes else weight)
+    b.log(voter_abi, 'ProposalDescriptionUpdated', voter, head - 10, proposalId=0, description='Updated')
+    # On chain, proposal 0 also has a vote the listener never saw
+    tallies[0][0] += 250_000
+    for pid, block in enumerate(blocks):
+        b.call(voter_abi, 'getProposalData', voter,
+               ('Benchmark proposal', 10, b.timestamp(block), 5_000_000, *tallies[pid], False, False, []), args=[pid])
+
+    return {
+        'module': 'data_fetchers.resupply_dao',
+        'fixture': b.fixture,
+        'tables': ['resupply_proposals', 'resupply_votes'],
+        'scanned_blocks': head - start + 1,
+    }
+
+
+def curve_gauge_votes(scale=1):
+    rng = random.Random('curve_gauge_votes')
+    controller = '0x2F50D538606Fa9EDD2B11E2446BEb18C9D5846bB'
+    ve = '0x5f3b5DfEb7B28CDbD7FAba78963EE202a494e2A2'
+    start = 10647875
+    head = start + 20_000
+    b = FixtureBuilder('curve_gauge_votes', head, ANCHOR_PERIOD)
+    controller_abi = abi('gauge_controller')
+
+    ve_abi = abi('ve')
+    b.call(ve_abi, 'balanceOf', ve, 250_000 * 10**18, n_inputs=1)
+    # Every voter locks before the controller deployment, some top up during the scan
+    for i in range(51):
+        block = start - 10 - i
+        b.log(ve_abi, 'Deposit', ve, block, provider=address(f'user{i}'), value=rng.randint(10_000, 2_000_000) * 10**18,
+              locktime=(b.timestamp(block) + 4 * 365 * DAY) // WEEK * WEEK, type=1, ts=b.timestamp(block))
+    for block in spread(rng, 20 * scale, start, head):
+        user = address(f'user{rng.randint(0, 50)}')
+        b.log(ve_abi, 'Deposit', ve, block, provider=user, value=rng.randint(1_000, 100_000) * 10**18,
+              locktime=(b.timestamp(start) + 4 * 365 * DAY) // WEEK * WEEK, type=2, ts=b.timestamp(block))
+    gauges = {address(f'gauge{i}'): f'Gauge {i}' for i in range(10)}
+    gauge_list = list(gauges)
+    # The last gauge is missing from the API and gets its name from name()
+    b.fixture['http']['/api/getAllGauges'] = {
+        'data': {f'{name} (benchmark)': {'gauge': gauge} for gauge, name in list(gauges.items())[:-1]}
+    }
+    b.call(abi('curve_gauge'), 'name', gauge_list[-1], 'Curve.fi Gauge 9 Deposit', args=[])
+    for block in spread(rng, 200 * scale, start, head):
+        b.log(controller_abi, 'VoteForGauge', controller, block,
+              time=b.timestamp(block), user=address(f'user{rng.randint(0, 50)}'),
+              gauge_addr=rng.choice(gauge_list), weight=rng.randint(1, 10_000))
+
+    def patch(module):
+        module.gauge_directory.API_URL = module.WEB3_PROVIDER_URI + '/api/getAllGauges'
+
+    from schemas.curve_gauge_votes import create_tables
+    return {
+        'module': 'data_fetchers.curve_gauge_votes',
+        'fixture': b.fixture,
+        'tables': ['curve_gauge_votes', 've_locks', 'curve_gauge_names'],
+        'schema': create_tables,
+        'scanned_blocks': head - start + 1,
+        'patch': patch,
+    }
+
+
+def gauge_weight_snapshots(scale=1):
+    controller = '0x2F50D538606Fa9EDD2B11E2446BEb18C9D5846bB'
+    now = ANCHOR_PERIOD + 3 * DAY
+    head = 23_800_000
+    b = FixtureBuilder('gauge_weight_snapshots', head, now)
+    controller_abi = abi('gauge_controller')
+    epochs = 4 * scale
+
+    gauges = [address(f'gauge{i}') for i in range(50)]
+    b.call(controller_abi, 'n_gauges', controller, len(gauges), args=[])
+    for i, gauge in enumerate(gauges):
+        b.call(controller_abi, 'gauges', controller, gauge, args=[i])
+    b.call(controller_abi, 'checkpoint_gauge', controller, (), n_inputs=1)
+    b.call(controller_abi, 'points_weight', controller, (3_000_000 * 10**18, 10**18), n_inputs=2)
+    b.call(controller_abi, 'gauge_relative_weight', controller, 10**16, n_inputs=2)
+
+    def patch(module):
+        module.START_EPOCH = ANCHOR_PERIOD - (epochs - 1) * WEEK
+
+    def schema(metadata):
+        from schemas.curve_gauge_votes import create_tables as create_vote_tables
+        from schemas.gauge_weights import create_tables
+        create_vote_tables(metadata)
+        create_tables(metadata)
+
+    return {
+        'module': 'data_fetchers.gauge_weight_snapshots',
+        'fixture': b.fixture,
+        'tables': ['curve_gauge_weights'],
+        'schema': schema,
+        'scanned_blocks': epochs * WEEK // BLOCK_TIME,
+        'patch': patch,
+    }
+
+
+def ybs_listener(scale=1):
+    rng = random.Random('ybs_listener')
+    registry = '0x262be1d31d0754399d8d5dc63B99c22146E9f738'
+    start = 19888353
+    head = start + 20_000
+    b = FixtureBuilder('ybs_listener', head, ANCHOR_PERIOD)
+    registry_abi, ybs_abi, rewards_abi = abi('registry'), abi('ybs'), abi('rewards')
+
+    tokens = 2
+    b.call(registry_abi, 'numTokens', registry, tokens, args=[])
+    for i in range(tokens):
+        token, ybs, rewards, utilities = (address(f'ybs-{kind}{i}') for kind in ('token', 'ybs', 'rewards', 'utils'))
+        b.call(registry_abi, 'tokens', registry, token, args=[i])
+        b.call(registry_abi, 'deployments', registry, (ybs, rewards, utilities), args=[token])
+        b.call(abi('erc20'), 'symbol', token, f'TKN{i}', args=[])
+        for event in ('Staked', 'Unstaked'):
+            weight_arg = 'weightAdded' if event == 'Staked' else 'weightRemoved'
+            for block in spread(rng, 40 * scale, start, head):
+                b.log(ybs_abi, event, ybs, block,
+                      account=address(f'staker{rng.randint(0, 30)}'), week=rng.randint(0, 60),
+                      amount=rng.randint(1, 10**6) * 10**18, newUserWeight=rng.randint(1, 10**6) * 10**18,
+                      **{weight_arg: rng.randint(1, 10**5) * 10**18})
+        for block in spread(rng, 20 * scale, start, head):
+            b.log(rewards_abi, 'RewardDeposited', rewards, block,
+                  week=rng.randint(0, 60), depositor=address('depositor'), rewardAmount=rng.randint(1, 10**5) * 10**18)
+        for block in spread(rng, 40 * scale, start, head):
+            b.log(rewards_abi, 'RewardsClaimed', rewards, block,
+                  account=address(f'staker{rng.randint(0, 30)}'), week=rng.randint(0, 60),
+                  rewardAmount=rng.randint(1, 10**4) * 10**18)
+
+    from schemas.ybs import create_tables
+    return {
+        'module': 'data_fetchers.ybs_listener',
+        'fixture': b.fixture,
+        'tables': ['stakes', 'rewards', 'ybs_positions', 'ybs_position_weeks', 'ybs_reward_weeks'],
+        'schema': create_tables,
+        'scanned_blocks': head - start + 1,
+    }
+
+
+def ll_harvests(scale=1):
+    rng = random.Random('ll_harvests')
+    start = 20_000_000
+    head = start + 20_000
+    b = FixtureBuilder('ll_harvests', head, ANCHOR_PERIOD)
+    for compounder, info in CURVE_LIQUID_LOCKER_COMPOUNDERS.items():
+        b.call(abi(info['abi']), info['assets_fn'], compounder, rng.randint(10**6, 10**8) * 10**18, args=[])
+        b.call(abi(info['abi']), 'totalSupply', compounder, rng.randint(10**6, 10**8) * 10**18, args=[])
+        for block in spread(rng, 15 * scale, start, head):
+            b.log(abi(info['abi']), info['harvest_event'], compounder, block,
+                  **{info['profit_arg']: rng.randint(1, 10**4) * 10**18})
+
+    from schemas.ll_harvests import create_tables
+    return {
+        'module': 'data_fetchers.ll_harvests',
+        'fixture': b.fixture,
+        'tables': ['crv_ll_harvests', 'll_vault_reads', 'll_harvest_aprs'],
+        'schema': create_tables,
+        'scanned_blocks': head - start + 1,
+    }
+
+
+def resupply_retention(scale=1):
+    rng = random.Random('resupply_retention')
+    contract = '0xB9415639618e70aBb71A0F4F8bbB2643Bf337892'
+    deployment_block = 22870945
+    start = deployment_block + 1
+    head = start + 20_000
+    b = FixtureBuilder('resupply_retention', head, ANCHOR_PERIOD)
+    retention_abi = abi('retention')
+
+    b.call(retention_abi, 'totalSupply', contract, 4 * 10**18, args=[])
+    for block in spread(rng, 80 * scale, start, head):
+        old = rng.randint(10**15, 10**16)
+        b.log(retention_abi, 'WeightSet', contract, block,
+              user=address(f'retention{rng.randint(0, 40)}'), oldWeight=old, newWeight=old - rng.randint(0, 10**15))
+
+    return {
+        'module': 'data_fetchers.resupply_retention',
+        'fixture': b.fixture,
+        'tables': ['weight_changes', 'retention_supply_checkpoints', 'retention_weights', 'retention_weight_history'],
+        'scanned_blocks': head - start + 1,
+    }
+
+
+def _incentive_window(name):
+    """Head/now for incentive scenarios: two complete periods before now are missing"""
+    now = ANCHOR_PERIOD + 3 * DAY
+    head = 23_800_000
+    b = FixtureBuilder(name, head, now)
+    first_period = ANCHOR_PERIOD - 2 * WEEK
+
+    def block_at(ts):
+        return head - (now - ts) // BLOCK_TIME
+
+    return b, first_period, block_at
+
+
+def _gauge_calls(b):
+    controller = '0x2F50D538606Fa9EDD2B11E2446BEb18C9D5846bB'
+    controller_abi = abi('gauge_controller')
+    b.call(controller_abi, 'vote_user_slopes', controller, (10**18, 5000, ANCHOR_PERIOD + 52 * WEEK), n_inputs=2)
+    b.call(controller_abi, 'points_weight', controller, (3_000_000 * 10**18, 10**18), n_inputs=2)
+    b.call(controller_abi, 'gauge_relative_weight', controller, 10**16, n_inputs=2)
+
+
+def _price_feed(b, token, timestamps):
+    """DeFiLlama historical price responses for `token` at each period timestamp"""
+    coin = f'ethereum:{token}'
+    for ts in timestamps:
+        b.fixture['http'][f'/prices/historical/{ts}/{coin}'] = {
+            'coins': {coin: {'symbol': 'TOKEN', 'price': 1.0, 'decimals': 18, 'timestamp': ts, 'confidence': 0.99}}
+        }
+
+
+def _patch_incentives(protocol, start):
+    def patch(module):
+        from incentives import prices
+        module.INCENTIVE_START_TIMESTAMPS[protocol] = start
+        prices.API_URL = module.WEB3_PROVIDER_URI
+    return patch
+
+
+def yb_incentives(scale=1):
+    rng = random.Random('yb_incentives')
+    b, first_period, block_at = _incentive_window('yb_incentives')
+    erc20_abi = abi('erc20')
+    _gauge_calls(b)
+    _price_feed(b, YB, (first_period + WEEK, first_period + 2 * WEEK))
+
+    for period in (first_period, first_period + WEEK):
+        for block in spread(rng, scale, block_at(period) + 10, block_at(period + WEEK) - 10):
+            tx = b.tx_hash()
+            logs = [
+                b.log(erc20_abi, 'Transfer', YB, block, tx_hash=tx,
+                      **{'from': DEPOSIT_DIVIDER, 'to': helper, 'value': rng.randint(1, 10**5) * 10**18})
+                for helper in (VOTIUM_HELPER, VOTEMARKET_HELPER)
+            ]
+            b.receipt(tx, block, logs)
+
+    return {
+        'module': 'incentives.yb_incentives',
+        'fixture': b.fixture,
+        'tables': ['incentives', 'incentive_controller_reads', 'token_prices'],
+        'scanned_blocks': 2 * WEEK // BLOCK_TIME,
+        'patch': _patch_incentives('yieldbasis', first_period),
+    }
+
+
+def rsup_incentives(scale=1):
+    rng = random.Random('rsup_incentives')
+    b, first_period, block_at = _incentive_window('rsup_incentives')
+    erc20_abi = abi('erc20')
+    rsup = '0x419905009e4656fdC02418C7Df35B1E61Ed5F726'
+    ec = '0x33333333df05b0D52edD13D230461E5A0f5a4706'
+    multisig = '0xFE11a5009f2121622271e7dd0FD470264e076af6'
+    votium = '0x63942E31E98f1833A234077f47880A66136a2D1e'
+    votemarket = '0x96006425Da428E45c282008b00004a00002B345e'
+    _gauge_calls(b)
+    b.call(abi('emissions_controller'), 'startTime', ec, first_period - 42 * WEEK, args=[])
+    b.call(abi('emissions_controller'), 'epochLength', ec, WEEK, args=[])
+    _price_feed(b, rsup, (first_period + WEEK, first_period + 2 * WEEK))
+
+    for period in (first_period, first_period + WEEK):
+        for block in spread(rng, scale, block_at(period) + 10, block_at(period + WEEK) - 10):
+            tx = b.tx_hash()
+            amount = rng.randint(2, 10**5) * 10**18
+            logs = [b.log(erc20_abi, 'Transfer', rsup, block, tx_hash=tx, **{'from': ec, 'to': multisig, 'value': amount})]
+            logs += [
+                b.log(erc20_abi, 'Transfer', rsup, block, tx_hash=tx, **{'from': multisig, 'to': to, 'value': amount // 2})
+                for to in (votium, votemarket)
+            ]
+            b.receipt(tx, block, logs)
+
+    return {
+        'module': 'incentives.rsup_incentives',
+        'fixture': b.fixture,
+        'tables': ['incentives', 'incentive_controller_reads', 'token_prices'],
+        'scanned_blocks': 2 * WEEK // BLOCK_TIME,
+        'patch': _patch_incentives('resupply', first_period),
+    }
+
+
+SCENARIOS = {
+    'resupply_dao': resupply_dao,
+    'curve_gauge_votes': curve_gauge_votes,
+    'gauge_weight_snapshots': gauge_weight_snapshots,
+    'ybs_listener': ybs_listener,
+    'll_harvests': ll_harvests,
+    'resupply_retention': resupply_retention,
+    'yb_incentives': yb_incentives,
+    'rsup_incentives': rsup_incentives,
+}
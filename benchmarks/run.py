@@ -0,0 +1,250 @@
+"""
+RPC call-count benchmarks for the listeners.
+
+Runs one scan loop of each listener against a local fake JSON-RPC node and a
+throwaway database, then reports calls per method per scanned block, rows/sec
+and wall time. Results are compared to benchmarks/baseline.json and the run
+fails when a listener's call counts grow beyond the threshold or the rows it
+writes change. Wall time and rows/sec depend on the machine, so timing
+regressions are only reported unless --time-threshold is given.
+
+    python -m benchmarks.run                      # all listeners, compare to baseline
+    python -m benchmarks.run --listener ybs_listener
+    python -m benchmarks.run --update-baseline    # record current numbers
+    python -m benchmarks.run --time-threshold 0.5 # also fail on 50% slower runs
+    python -m benchmarks.run --database-uri postgresql://localhost/bench
+
+Each listener runs in its own subprocess because the listener modules connect
+to the node and database at import time. The default database is a fresh
+SQLite file per listener; a Postgres URI must point at a throwaway database,
+the scenario tables are dropped before each run.
+"""
+import argparse
+import importlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from benchmarks.fake_node import FakeNode
+from benchmarks.fixtures import SCENARIOS
+
+BASELINE_PATH = os.path.join(ROOT_DIR, 'benchmarks', 'baseline.json')
+DEFAULT_CALL_THRESHOLD = 0.10  # fail if any method's call count grows more than 10%
+DEFAULT_TIME_THRESHOLD = 0.50  # report wall time and rows/sec beyond this; they only fail with --time-threshold
+
+
+class StopBenchmark(BaseException):
+    """Raised from the patched sleep to end a listener loop (escapes `except Exception`)"""
+
+
+class AlertRecorder:
+    """Stand-in for telebot.TeleBot that records messages instead of sending them"""
+
+    def __init__(self):
+        self.messages = []
+
+    def send_message(self, chat_id, msg, **kwargs):
+        self.messages.append((chat_id, msg))
+
+
+def clock(now, loops):
+    """Module-local replacement for `time` that pins time.time() and stops after `loops` sleeps"""
+    state = {'sleeps': 0}
+
+    def sleep(seconds):
+        state['sleeps'] += 1
+        if state['sleeps'] >= loops:
+            raise StopBenchmark()
+
+    return types.SimpleNamespace(time=lambda: now, sleep=sleep, perf_counter=time.perf_counter)
+
+
+def prepare_database(database_uri, scenario):
+    from sqlalchemy import create_engine, MetaData, Table, inspect
+
+    engine = create_engine(database_uri)
+    existing = set(inspect(engine).get_table_names())
+    with engine.begin() as conn:
+        for name in scenario['tables']:
+            if name in existing:
+                Table(name, MetaData(), autoload_with=conn).drop(conn)
+    if scenario.get('schema'):
+        metadata = MetaData()
+        scenario['schema'](metadata)
+        metadata.create_all(engine)
+    return engine
+
+
+def count_rows(engine, tables):
+    from sqlalchemy import MetaData, Table, func, select
+
+    counts = {}
+    with engine.connect() as conn:
+        for name in tables:
+            table = Table(name, MetaData(), autoload_with=conn)
+            counts[name] = conn.execute(select(func.count()).select_from(table)).scalar()
+    return counts
+
+
+def run_listener(name, scale=1, loops=1, database_uri=None):
+    """Run one listener scenario in this process and return its metrics"""
+    scenario = SCENARIOS[name](scale)
+    node = FakeNode(scenario['fixture'])
+    url = node.start()
+    tmpdir = tempfile.mkdtemp(prefix=f'bench-{name}-')
+    database_uri = database_uri or f"sqlite:///{os.path.join(tmpdir, 'bench.db')}"
+
+    os.environ['WEB3_PROVIDER_URI'] = url
+    os.environ['DATABASE_URI'] = database_uri
+    os.environ['WAVEY_ALERTS_BOT_KEY'] = '123456:benchmark'  # alerts go to AlertRecorder
+    os.chdir(ROOT_DIR)  # listeners load ABIs from ./abis
+    engine = prepare_database(database_uri, scenario)
+
+    try:
+        started = time.perf_counter()
+        module = importlib.import_module(scenario['module'])
+        module.time = clock(scenario['fixture']['now'], loops)
+        if hasattr(module, 'bot'):
+            module.bot = AlertRecorder()
+        if scenario.get('patch'):
+            scenario['patch'](module)
+        try:
+            getattr(module, scenario.get('entry', 'main'))()
+        except StopBenchmark:
+            pass
+        wall_time = time.perf_counter() - started
+    finally:
+        node.stop()
+
+    rows = count_rows(engine, scenario['tables'])
+    total_rows = sum(rows.values())
+    scanned = scenario['scanned_blocks'] * loops
+    calls = dict(sorted(node.counts.items()))
+    return {
+        'listener': name,
+        'scale': scale,
+        'scanned_blocks': scanned,
+        'calls': calls,
+        'calls_per_block': {method: n / scanned for method, n in calls.items()},
+        'total_calls': sum(calls.values()),
+        'round_trips': node.round_trips,
+        'rows': rows,
+        'rows_per_sec': total_rows / wall_time if wall_time else 0,
+        'wall_time': wall_time,
+    }
+
+
+def run_in_subprocess(name, args):
+    cmd = [
+        sys.executable, '-m', 'benchmarks.run', '--listener', name, '--json',
+        '--scale', str(args.scale), '--loops', str(args.loops),
+    ]
+    if args.database_uri:
+        cmd += ['--database-uri', args.database_uri]
+    result = subprocess.run(cmd, cwd=ROOT_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f'{name} benchmark failed:\n{result.stderr[-4000:]}')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(result, baseline, call_threshold):
+    """Return a list of call-count and row regression messages for one listener"""
+    problems = []
+    base_calls = baseline.get('calls', {})
+    for method, n in result['calls'].items():
+        allowed = base_calls.get(method, 0) * (1 + call_threshold)
+        if n > allowed:
+            problems.append(f"{method}: {n} calls (baseline {base_calls.get(method, 0)})")
+    if result['rows'] != baseline.get('rows', result['rows']):
+        problems.append(f"rows written changed: {result['rows']} (baseline {baseline['rows']})")
+    return problems
+
+
+def compare_timing(result, baseline, time_threshold):
+    """Return a list of wall time and rows/sec regression messages for one listener"""
+    problems = []
+    if result['wall_time'] > baseline.get('wall_time', float('inf')) * (1 + time_threshold):
+        problems.append(f"wall time {result['wall_time']:.2f}s (baseline {baseline['wall_time']:.2f}s)")
+    if result['rows_per_sec'] < baseline.get('rows_per_sec', 0) * (1 - time_threshold):
+        problems.append(f"rows/sec {result['rows_per_sec']:.1f} (baseline {baseline['rows_per_sec']:.1f})")
+    return problems
+
+
+def print_report(result):
+    print(f"\n== {result['listener']} ({result['scanned_blocks']:,} blocks, scale {result['scale']})")
+    print(f"   wall time: {result['wall_time']:.2f}s | rows: {sum(result['rows'].values())} "
+          f"| rows/sec: {result['rows_per_sec']:.1f} | http round trips: {result['round_trips']}")
+    for method, n in result['calls'].items():
+        print(f"   {method:<32} {n:>7}  {result['calls_per_block'][method]:.6f}/block")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--listener', default='all', choices=['all'] + list(SCENARIOS))
+    parser.add_argument('--scale', type=int, default=1, help='multiply the number of fixture events')
+    parser.add_argument('--loops', type=int, default=1, help='listener loop iterations to run')
+    parser.add_argument('--database-uri', default=None, help='throwaway database (default: temp SQLite)')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_CALL_THRESHOLD)
+    parser.add_argument('--time-threshold', type=float, default=None,
+                        help=f'fail when wall time or rows/sec regress beyond this (default: report beyond {DEFAULT_TIME_THRESHOLD})')
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--json', action='store_true', help='print raw metrics for a single listener')
+    args = parser.parse_args()
+
+    if args.json:
+        print(json.dumps(run_listener(args.listener, args.scale, args.loops, args.database_uri)))
+        return
+
+    names = list(SCENARIOS) if args.listener == 'all' else [args.listener]
+    results = {name: run_in_subprocess(name, args) for name in names}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    failures = {}
+    for name, result in results.items():
+        print_report(result)
+        if name not in baseline:
+            print('   (no baseline recorded)')
+            continue
+        if baseline[name].get('scale') != result['scale']:
+            print(f"   (baseline recorded at scale {baseline[name].get('scale')}, not compared)")
+            continue
+        problems = compare(result, baseline[name], args.threshold)
+        timing = compare_timing(result, baseline[name], DEFAULT_TIME_THRESHOLD if args.time_threshold is None else args.time_threshold)
+        if args.time_threshold is not None:
+            problems += timing
+        else:
+            for note in timing:
+                print(f'   (slower) {note}')
+        for problem in problems:
+            print(f'   REGRESSION {problem}')
+        if problems:
+            failures[name] = problems
+
+    if args.update_baseline:
+        baseline.update(results)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f'\nBaseline written to {args.baseline}')
+        return
+
+    if failures:
+        print(f"\nFAILED: {', '.join(failures)} regressed")
+        sys.exit(1)
+    print('\nOK')
+
+
+if __name__ == '__main__':
+    main()
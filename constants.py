@@ -8,6 +8,11 @@ CURVE_LIQUID_LOCKER_COMPOUNDERS = {
         'pool': '0x971add32Ea87f10bD192671630be3BE8A11b8623',
         'color': 'orange',
         'deploy_block': 16904032,
+        'abi': 'ucvxcrv',  # ./abis/<abi>.json
+        'harvest_event': 'Harvest',
+        'profit_arg': '_value',  # harvest event arg holding profit in underlying
+        'profit_decimals': 18,
+        'assets_fn': 'totalUnderlying',  # view returning total underlying held
     },
     '0x27B5739e22ad9033bcBf192059122d163b60349D': {
         'name': 'Staked Yearn CRV',
@@ -16,6 +21,11 @@ CURVE_LIQUID_LOCKER_COMPOUNDERS = {
         'pool': '0x99f5aCc8EC2Da2BC0771c32814EFF52b712de1E5',
         'color': 'blue',
         'deploy_block': 15624989,
+        'abi': 'yvycrv',
+        'harvest_event': 'StrategyReported',
+        'profit_arg': 'gain',
+        'profit_decimals': 18,
+        'assets_fn': 'totalAssets',
     },
     '0x43E54C2E7b3e294De3A155785F52AB49d87B9922': {
         'name': 'Aladin StakeDao CRV',
@@ -24,6 +34,11 @@ CURVE_LIQUID_LOCKER_COMPOUNDERS = {
         'pool': '0xCA0253A98D16e9C1e3614caFDA19318EE69772D0',
         'color': 'black',
         'deploy_block': 16904032,
+        'abi': 'asdcrv',
+        'harvest_event': 'Harvest',
+        'profit_arg': 'assets',
+        'profit_decimals': 18,
+        'assets_fn': 'totalAssets',
     },
 }
 
@@ -3,7 +3,7 @@ from sqlalchemy import create_engine, Table, Column, Integer, String, MetaData,
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from psycopg2 import errors
-import time, os, json, sys
+import time, os, json, sys, threading
 import telebot
 from datetime import datetime
 from dotenv import load_dotenv
@@ -13,6 +13,8 @@ parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(parent_dir)
 import utils
 from constants import CHAT_IDS
+from data_fetchers import gauge_directory, ve_locks
+from schemas.curve_gauge_votes import create_ve_balance_tables, create_ve_lock_tables, create_gauge_directory_tables
 
 
 telegram_bot_key = os.environ.get('WAVEY_ALERTS_BOT_KEY')
@@ -28,11 +30,15 @@ DATABASE_URI = os.getenv('DATABASE_URI')
 DEPLOY_BLOCK=10647875
 MAX_WIDTH = 250_000
 POLL_INTERVAL = 10 # seconds
+GAUGE_DIRECTORY_REFRESH = 3600 # seconds between conditional gauge API refreshes
+VE_VERIFY_EVERY = int(os.getenv('VE_VERIFY_EVERY', 100))  # check every Nth local vote balance against balanceOf; 0 disables
 
 last_block_alerted = 0
+votes_since_verify = 0
+locks = {}  # account -> VotingEscrow lock, see ve_locks
 
 # Connect to Ethereum network
-w3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER_URI))
+w3 = Web3(utils.make_provider(WEB3_PROVIDER_URI))
 # Ensure that connection is successful
 if not w3.is_connected():
     raise Exception("Failed to connect to Ethereum node")
@@ -44,6 +50,12 @@ session = Session()
 metadata = MetaData()
 
 table = Table('curve_gauge_votes', metadata, autoload_with=engine)
+ve_balances_table = create_ve_balance_tables(metadata)
+ve_locks_table, ve_lock_progress_table = create_ve_lock_tables(metadata)
+gauge_names_table, gauge_directory_sync_table = create_gauge_directory_tables(metadata)
+metadata.create_all(engine, tables=[
+    ve_balances_table, ve_locks_table, ve_lock_progress_table, gauge_names_table, gauge_directory_sync_table
+])
 
 gauge_controller_abi = utils.load_abi('./abis/gauge_controller.json')
 ve_abi = utils.load_abi('./abis/ve.json')
@@ -52,6 +64,16 @@ gauge_name_dict = {}
 gauge_controller_contract = w3.eth.contract(address=GAUGE_CONTROLLER_ADDRESS, abi=gauge_controller_abi)
 ve_contract = w3.eth.contract(address=VE_ADDRESS, abi=ve_abi)
 
+# (address, topic0) -> (event name, event processor)
+decoders = {
+    (contract.address.lower(), utils.topic_for_event(contract, event_name)): (event_name, getattr(contract.events, event_name)())
+    for contract, event_name in (
+        (gauge_controller_contract, 'VoteForGauge'),
+        (ve_contract, 'Deposit'),
+        (ve_contract, 'Withdraw'),
+    )
+}
+
 GAUGE_NAME_EXCEPTIONS = {
     '0x6C09F6727113543Fd061a721da512B7eFCDD0267': 'xdai x3pool',
     '0xb9C05B8EE41FDCbd9956114B3aF15834FDEDCb54': 'ftm 2pool',
@@ -91,79 +113,192 @@ ALIASES = {
 }
 
 def main():
-    global gauge_name_dict
-    gauge_name_dict = get_gauge_list()
-    
+    load_gauge_names()
+    reload_locks()
+    threading.Thread(target=gauge_directory_loop, name='gauge-directory', daemon=True).start()
+
     log_loop()
 
-def handle_vote_event(event):
-    global last_block_alerted
-    # Initialize gauge_name at the start to ensure it always has a value
-    gauge_name = 'Unknown Gauge Name'
-    
-    # Parse the event data and write to the database
-    block = event.blockNumber
-    timestamp = w3.eth.get_block(block).timestamp
-    date_str = datetime.utcfromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
-    txn_hash = event.transactionHash.hex()
-    # Inserting data into the PostgreSQL database
-    gauge = event['args']['gauge_addr']
-    weight = event['args']['weight']
-    user = event['args']['user']
-    alias = '' if user not in ALIASES else ALIASES[user]
-    amount = ve_contract.functions.balanceOf(user).call(block_identifier=block) / 1e18 * weight / 10_000
-    if gauge in gauge_name_dict:
-        gauge_name = gauge_name_dict[gauge]
-    elif gauge in GAUGE_NAME_EXCEPTIONS:
-        gauge_name = GAUGE_NAME_EXCEPTIONS[gauge]
-    else:
-        gauge_name = 'Unknown Gauge Name'
+def load_gauge_names():
+    """Fill gauge_name_dict from the persisted directory, downloading it only on first start"""
+    with engine.begin() as conn:
+        names = gauge_directory.load_names(conn, gauge_names_table)
+        manual = {gauge: name for gauge, name in GAUGE_NAME_EXCEPTIONS.items() if gauge not in names}
+        gauge_directory.store_names(conn, gauge_names_table, manual, 'manual')
+        synced = conn.execute(select(gauge_directory_sync_table.c.id).limit(1)).first() is not None
+    gauge_name_dict.update(names)
+    gauge_name_dict.update(manual)
+    if not synced:
+        refresh_gauge_directory()
+
+def refresh_gauge_directory():
+    try:
+        changed = gauge_directory.refresh(engine, gauge_names_table, gauge_directory_sync_table)
+        gauge_name_dict.update(changed)
+        with engine.begin() as conn:
+            backfilled = gauge_directory.backfill_unknown(conn, table, gauge_name_dict)
+        print(f'Gauge directory refreshed: {len(changed)} names updated, {backfilled} unknown votes backfilled', flush=True)
+    except Exception as e:
+        print("Gauge directory refresh failed:", e, flush=True)
+
+def gauge_directory_loop():
+    # Runs off the vote loop so scanning never waits on the API
+    stop = threading.Event()
+    while not stop.wait(GAUGE_DIRECTORY_REFRESH):
+        refresh_gauge_directory()
+
+def resolve_gauge_names(gauges):
+    """Name gauges missing from the directory on chain; alert for any that stay unnamed"""
+    names = gauge_directory.resolve_onchain(w3, gauges)
+    if names:
+        with engine.begin() as conn:
+            gauge_directory.store_names(conn, gauge_names_table, names, 'onchain')
+            gauge_directory.backfill_unknown(conn, table, names)
+        gauge_name_dict.update(names)
+    for gauge in sorted(set(gauges) - set(names)):
         send_alert(CHAT_IDS['WAVEY_ALERTS'], f"New Curve vote for a gauge that doesn't have a name!\n{gauge}")
 
+def decode_logs(raw_logs):
+    """Decode raw logs, ordering lock events ahead of votes within each block"""
+    events = []
+    for log in raw_logs:
+        _, processor = decoders[(log['address'].lower(), w3.to_hex(log['topics'][0]))]
+        events.append(processor.process_log(log))
+    # balanceOf at a vote block sees every lock change made in that block
+    return sorted(events, key=lambda e: (e.blockNumber, e.event == 'VoteForGauge', e.logIndex))
+
+def handle_window(raw_logs, to_block):
+    """Apply lock events and write all VoteForGauge events from one scan window"""
+    global last_block_alerted
+    events = decode_logs(raw_logs)
+    vote_blocks = sorted({e.blockNumber for e in events if e.event == 'VoteForGauge'})
+    timestamps = utils.get_block_timestamps(w3, vote_blocks)
+    unnamed = {e['args']['gauge_addr'] for e in events if e.event == 'VoteForGauge'} - set(gauge_name_dict)
+    if unnamed:
+        resolve_gauge_names(unnamed)
+
+    rows = []
+    changed = set()
+    for event in events:
+        if event.event != 'VoteForGauge':
+            account = ve_locks.apply_event(locks, event)
+            if account:
+                changed.add(account)
+            continue
+        block = event.blockNumber
+        timestamp = timestamps[block]
+        gauge = event['args']['gauge_addr']
+        weight = event['args']['weight']
+        user = event['args']['user']
+        gauge_name = gauge_name_dict.get(gauge, gauge_directory.UNKNOWN_GAUGE_NAME)
+        ve_balance = ve_locks.balance_of(locks.get(user), timestamp)
+        rows.append({
+            'gauge': gauge,
+            'gauge_name': gauge_name,
+            'account': user,
+            'amount': ve_balance / 1e18 * weight / 10_000,
+            've_balance': ve_balance,
+            'weight': weight,
+            'account_alias': ALIASES.get(user, ''),
+            'txn_hash': event.transactionHash.hex(),
+            'timestamp': timestamp,
+            'date_str': datetime.utcfromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S'),
+            'block': block,
+        })
+    verify_balances(rows)
+
     try:
-        ins = table.insert().values(
-            gauge=gauge,
-            gauge_name=gauge_name,
-            account=user,
-            amount=amount,
-            weight=weight,
-            account_alias=alias,
-            txn_hash = txn_hash,
-            timestamp = timestamp,
-            date_str = date_str,
-            block = event.blockNumber,
-        )
-        conn = engine.connect()
-        conn.execute(ins)
-        conn.commit()
-        # conn.close()
-        print(f'{gauge} {gauge_name} vote worth {amount:,.0f} veCRV written successfully | Block: {block} Txn: {txn_hash}', flush=True)
-    except IntegrityError as e:
-        conn.rollback()
+        with engine.begin() as conn:
+            written = set()
+            if rows:
+                values = [{k: v for k, v in row.items() if k != 've_balance'} for row in rows]
+                ins = utils.insert_for(conn, table).values(values).on_conflict_do_nothing()
+                written = set(conn.execute(ins.returning(table.c.txn_hash, table.c.gauge, table.c.account)).all())
+            ve_locks.write_locks(conn, ve_locks_table, locks, changed)
+            ve_locks.set_cursor(conn, ve_lock_progress_table, VE_ADDRESS, to_block)
+        for row in rows:
+            if (row['txn_hash'], row['gauge'], row['account']) in written:
+                print(f"{row['gauge']} {row['gauge_name']} vote worth {row['amount']:,.0f} veCRV written successfully | Block: {row['block']} Txn: {row['txn_hash']}", flush=True)
     except SQLAlchemyError as e:
         print("Database error occurred:", e, flush=True)
-    except Exception as e:
-        print("An error occurred:", e, flush=True)
-
-    if (
-        amount > 1_000_000
-        and user in ALIASES 
-        and block > last_block_alerted
-    ):
-        last_block_alerted = block
-        alias = ALIASES[user]
-        m = f'🗳️ Curve Gauge Vote Detected'
-        m += f'\n\n {alias}'
-        m += f'\n\n🔗 [View on Etherscan](https://etherscan.io/tx/{txn_hash})'
-        send_alert(CHAT_IDS['YLOCKERS'], m)
-
-def fetch_logs(contract, event_name, from_block, to_block):
-    event = getattr(contract.events, event_name)
-    logs = event.get_logs(
-        fromBlock=from_block,
-        toBlock=to_block
-    )
-    return logs
+        # Locks in memory may now be ahead of the database; reload them
+        reload_locks()
+        return
+
+    for row in rows:
+        if (
+            row['amount'] > 1_000_000
+            and row['account'] in ALIASES
+            and row['block'] > last_block_alerted
+        ):
+            last_block_alerted = row['block']
+            m = f'🗳️ Curve Gauge Vote Detected'
+            m += f"\n\n {ALIASES[row['account']]}"
+            m += f"\n\n🔗 [View on Etherscan](https://etherscan.io/tx/{row['txn_hash']})"
+            send_alert(CHAT_IDS['YLOCKERS'], m)
+
+def reload_locks():
+    global locks
+    with engine.connect() as conn:
+        locks = ve_locks.load_locks(conn, ve_locks_table)
+
+def verify_balances(rows):
+    """Compare every VE_VERIFY_EVERY-th locally computed balance with balanceOf"""
+    global votes_since_verify
+    if not VE_VERIFY_EVERY:
+        return
+    sample = []
+    for row in rows:
+        votes_since_verify += 1
+        if votes_since_verify >= VE_VERIFY_EVERY:
+            votes_since_verify = 0
+            sample.append(row)
+    if not sample:
+        return
+    balances = get_ve_balances({(row['account'], row['block']) for row in sample})
+    for row in sample:
+        onchain = balances[(row['account'], row['block'])]
+        if onchain != row['ve_balance']:
+            print(f"veCRV balance mismatch for {row['account']} at block {row['block']}: local {row['ve_balance']} chain {onchain}", flush=True)
+
+def sync_locks(to_block, height):
+    """Apply lock events up to `to_block` ahead of the vote scan"""
+    with engine.connect() as conn:
+        cursor = ve_locks.get_cursor(conn, ve_lock_progress_table, VE_ADDRESS)
+    topics = [topic for address, topic in decoders if address == VE_ADDRESS.lower()]
+    while cursor < to_block:
+        window_end = min(cursor + MAX_WIDTH, to_block)
+        print(f'Syncing veCRV locks {cursor + 1} --> {window_end}', flush=True)
+        raw_logs = utils.fetch_raw_logs(w3, VE_ADDRESS, topics, cursor + 1, window_end, head=height)
+        handle_window(raw_logs, window_end)
+        cursor = window_end
+
+def get_ve_balances(keys):
+    """Raw veCRV balances for (user, block) keys; misses are multicalled per block and cached"""
+    keys = set(keys)
+    balances = {}
+    with engine.connect() as conn:
+        query = select(ve_balances_table.c.account, ve_balances_table.c.block, ve_balances_table.c.balance).where(
+            ve_balances_table.c.account.in_({user for user, _ in keys}),
+            ve_balances_table.c.block.in_({block for _, block in keys}),
+        )
+        for account, block, balance in conn.execute(query):
+            if (account, block) in keys:
+                balances[(account, block)] = int(balance)
+
+    users_by_block = {}
+    for user, block in keys - set(balances):
+        users_by_block.setdefault(block, []).append(user)
+    for block, users in sorted(users_by_block.items()):
+        results = utils.multicall(w3, [ve_contract.functions.balanceOf(user) for user in users], block)
+        if any(balance is None for balance in results):
+            raise Exception(f"veCRV balanceOf failed at block {block}")
+        rows = [{'account': user, 'block': block, 'balance': balance} for user, balance in zip(users, results)]
+        with engine.begin() as conn:
+            ins = utils.insert_for(conn, ve_balances_table).values(rows)
+            conn.execute(ins.on_conflict_do_nothing(index_elements=['account', 'block']))
+        balances.update({(user, block): balance for user, balance in zip(users, results)})
+    return balances
 
 def log_loop():
     i = 0
@@ -172,17 +307,19 @@ def log_loop():
         if i % 100 == 0: print(f"Loops since startup: {i}", flush=True)
         height = w3.eth.get_block_number()
         last_block_written = get_last_block_written()
+        # Locks must be current up to the first block of the vote window
+        sync_locks(last_block_written - 1, height)
         print(f'Listening from block {last_block_written}', flush=True)
         to_block = min(last_block_written + MAX_WIDTH, height)
-        logs = fetch_logs(
-            gauge_controller_contract, 
-            'VoteForGauge', 
-            last_block_written, 
-            to_block
+        raw_logs = utils.fetch_raw_logs(
+            w3,
+            [GAUGE_CONTROLLER_ADDRESS, VE_ADDRESS],
+            list({topic for _, topic in decoders}),
+            last_block_written,
+            to_block,
+            head=height,
         )
-        
-        for log in logs:
-            handle_vote_event(log)
+        handle_window(raw_logs, to_block)
 
         time.sleep(POLL_INTERVAL)
 
@@ -196,20 +333,6 @@ def get_last_block_written():
         return result + 1 if result is not None else DEPLOY_BLOCK
 
 
-def get_gauge_list():
-    import requests, re
-    url = 'https://api.curve.finance/api/getAllGauges'
-    data = requests.get(url).json()['data']
-    gauge_list = {}
-    for gauge_name, d in data.items():
-        gauge_name = re.sub(r'\s*\(.*?\)', '', gauge_name)
-        if 'rootGauge' in d:
-            gauge_list[w3.to_checksum_address(d['rootGauge'])] = gauge_name
-        else:
-            gauge_list[w3.to_checksum_address(d['gauge'])] = gauge_name
-    return gauge_list
-
-
 def send_alert(chat_id, msg):
     bot.send_message(chat_id, msg, parse_mode="markdown", disable_web_page_preview = True)
 
@@ -0,0 +1,126 @@
+"""
+Persisted Curve gauge name directory.
+
+Names live in curve_gauge_names so listeners start without any HTTP call. The
+directory is refreshed from the Curve API with conditional requests (ETag /
+Last-Modified, stored in curve_gauge_directory_sync), and only rows whose name
+changed are written. Gauges the API doesn't know are resolved on chain with a
+multicall of the gauge's name(), falling back to its LP token's symbol().
+
+CURVE_GAUGES_API_URL overrides the API endpoint (the benchmarks point it at the
+fake node).
+"""
+import os
+import re
+import sys
+import time
+
+import requests
+from sqlalchemy import select
+from web3 import Web3
+
+# Add the parent directory of the current file to sys.path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+import utils
+
+API_URL = os.getenv('CURVE_GAUGES_API_URL', 'https://api.curve.finance/api/getAllGauges')
+REQUEST_TIMEOUT = 30  # seconds
+UNKNOWN_GAUGE_NAME = 'Unknown Gauge Name'
+
+gauge_abi = utils.load_abi('./abis/curve_gauge.json')
+
+
+def parse_gauges(data):
+    """{gauge: name} from a getAllGauges payload; sidechain gauges are keyed by their root gauge"""
+    gauges = {}
+    for gauge_name, d in data.items():
+        gauge_name = re.sub(r'\s*\(.*?\)', '', gauge_name)
+        gauge = d.get('rootGauge') or d.get('gauge')
+        if gauge:
+            gauges[Web3.to_checksum_address(gauge)] = gauge_name
+    return gauges
+
+
+def load_names(conn, names_table):
+    return dict(conn.execute(select(names_table.c.gauge, names_table.c.name)).all())
+
+
+def store_names(conn, names_table, names, source, known=None):
+    """Upsert names that differ from `known`; returns the number written"""
+    known = known or {}
+    now = int(time.time())
+    written = 0
+    for gauge, name in names.items():
+        if known.get(gauge) == name:
+            continue
+        utils.upsert(conn, names_table, {'gauge': gauge, 'name': name, 'source': source, 'updated_at': now}, index_elements=['gauge'])
+        written += 1
+    return written
+
+
+def refresh(engine, names_table, sync_table, url=None):
+    """Conditionally re-download the API directory; returns {gauge: name} for rows that changed"""
+    url = url or API_URL
+    with engine.connect() as conn:
+        sync = conn.execute(select(sync_table.c.etag, sync_table.c.last_modified).where(sync_table.c.url == url)).first()
+        known = load_names(conn, names_table)
+
+    headers = {}
+    if sync and sync.etag:
+        headers['If-None-Match'] = sync.etag
+    if sync and sync.last_modified:
+        headers['If-Modified-Since'] = sync.last_modified
+    response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
+    changed = {}
+    if response.status_code != 304:
+        response.raise_for_status()
+        changed = {gauge: name for gauge, name in parse_gauges(response.json()['data']).items() if known.get(gauge) != name}
+
+    with engine.begin() as conn:
+        store_names(conn, names_table, changed, 'api')
+        utils.upsert(conn, sync_table, {
+            'url': url,
+            'etag': response.headers.get('ETag') if response.status_code != 304 else sync.etag,
+            'last_modified': response.headers.get('Last-Modified') if response.status_code != 304 else sync.last_modified,
+            'synced_at': int(time.time()),
+        }, index_elements=['url'])
+    return changed
+
+
+def resolve_onchain(w3, gauges, block_identifier='latest'):
+    """{gauge: name} from each gauge's name(), or its LP token's symbol(); unresolved gauges are left out"""
+    gauges = list(gauges)
+    if not gauges:
+        return {}
+    contracts = [w3.eth.contract(address=gauge, abi=gauge_abi) for gauge in gauges]
+    results = utils.multicall(
+        w3, [fn for c in contracts for fn in (c.functions.name(), c.functions.lp_token())], block_identifier
+    )
+    names = {gauge: name for gauge, name in zip(gauges, results[::2]) if name}
+
+    lp_tokens = {
+        gauge: lp_token for gauge, lp_token in zip(gauges, results[1::2])
+        if gauge not in names and lp_token and lp_token != utils.ZERO_ADDRESS
+    }
+    if lp_tokens:
+        symbols = utils.multicall(
+            w3, [w3.eth.contract(address=lp, abi=gauge_abi).functions.symbol() for lp in lp_tokens.values()], block_identifier
+        )
+        names.update({gauge: symbol for gauge, symbol in zip(lp_tokens, symbols) if symbol})
+    return names
+
+
+def backfill_unknown(conn, votes_table, names):
+    """Replace stored 'Unknown Gauge Name' rows for gauges that now have a name; returns rows updated"""
+    query = select(votes_table.c.gauge).where(votes_table.c.gauge_name == UNKNOWN_GAUGE_NAME).distinct()
+    updated = 0
+    for (gauge,) in conn.execute(query).all():
+        if gauge in names:
+            result = conn.execute(
+                votes_table.update()
+                .where(votes_table.c.gauge == gauge, votes_table.c.gauge_name == UNKNOWN_GAUGE_NAME)
+                .values(gauge_name=names[gauge])
+            )
+            updated += result.rowcount
+    return updated
@@ -0,0 +1,233 @@
+"""
+Weekly snapshots of every Curve gauge's weight.
+
+Once per epoch, for every gauge in the GaugeController, writes points_weight,
+gauge_relative_weight and the largest voters' slopes at the epoch to
+curve_gauge_weights. Reads are multicalled at the epoch's first block, each
+gauge preceded by checkpoint_gauge() inside the same aggregate3 so the weekly
+points are filled even if nobody checkpointed the gauge on chain. That fill
+can't run before the Multicall3 deployment, so earlier epochs are answered by a
+local GaugeControllerEngine (see gauge_weights) replayed up to their first
+block, which returns the same filled values.
+Voters are the (account, gauge) pairs whose latest vote in curve_gauge_votes
+can still be live, selected in SQL. Missing epochs are filled in parallel.
+
+    python data_fetchers/gauge_weight_snapshots.py [--refill-early]
+
+--refill-early rewrites pre-Multicall3 epochs stored without the fill.
+"""
+import argparse
+from web3 import Web3
+from sqlalchemy import create_engine, Table, MetaData, func, select
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import time, os, sys
+from dotenv import load_dotenv
+
+# Add the parent directory of the current file to sys.path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+import utils
+from utils.multicall import MULTICALL3_DEPLOY_BLOCK
+from schemas.gauge_weights import create_tables
+from data_fetchers import gauge_weights, ve_locks
+
+load_dotenv()
+
+WEB3_PROVIDER_URI = os.getenv('WEB3_PROVIDER_URI')
+DATABASE_URI = os.getenv('DATABASE_URI')
+GAUGE_CONTROLLER_ADDRESS = '0x2F50D538606Fa9EDD2B11E2446BEb18C9D5846bB'
+START_EPOCH = 1597881600  # first epoch after the GaugeController deployment
+TOP_VOTERS = 10
+SNAPSHOT_BATCH_SIZE = 498  # a multiple of 3, so a gauge's checkpoint and reads share one aggregate3
+SNAPSHOT_WORKERS = int(os.getenv('SNAPSHOT_WORKERS', 4))
+POLL_INTERVAL = 3600 # seconds
+
+w3 = Web3(utils.make_provider(WEB3_PROVIDER_URI))
+if not w3.is_connected():
+    raise Exception("Failed to connect to Ethereum node")
+
+engine = create_engine(DATABASE_URI)
+metadata = MetaData()
+votes_table = Table('curve_gauge_votes', metadata, autoload_with=engine)
+gauge_weights_table = create_tables(metadata)
+metadata.create_all(engine, tables=[gauge_weights_table])
+
+gauge_controller = w3.eth.contract(address=GAUGE_CONTROLLER_ADDRESS, abi=utils.load_abi('./abis/gauge_controller.json'))
+
+
+def main():
+    while True:
+        fill_missing_epochs()
+        time.sleep(POLL_INTERVAL)
+
+
+def get_missing_epochs():
+    current_epoch = int(time.time()) // utils.WEEK * utils.WEEK
+    with engine.connect() as conn:
+        written = set(conn.execute(select(gauge_weights_table.c.epoch).distinct()).scalars())
+    return [epoch for epoch in range(START_EPOCH, current_epoch + 1, utils.WEEK) if epoch not in written]
+
+
+def fill_missing_epochs():
+    epochs = get_missing_epochs()
+    if not epochs:
+        return
+    print(f'Snapshotting {len(epochs)} epochs with {SNAPSHOT_WORKERS} workers', flush=True)
+    early = []
+    with ThreadPoolExecutor(max_workers=SNAPSHOT_WORKERS) as pool:
+        futures = {pool.submit(snapshot_epoch, epoch): epoch for epoch in epochs}
+        for future in as_completed(futures):
+            epoch = futures[future]
+            try:
+                block, rows = future.result()
+            except Exception as e:
+                print(f'Error snapshotting epoch {epoch}: {e}', flush=True)
+                continue
+            if rows is None:
+                early.append((epoch, block))
+                continue
+            write_snapshot(rows)
+            print(f'Epoch {utils.timestamp_to_date_string(epoch)}: {len(rows)} gauges written', flush=True)
+    if early:
+        fill_early_epochs(early)
+
+
+def fill_early_epochs(epoch_blocks):
+    """Snapshot pre-Multicall3 epochs in order from one GaugeControllerEngine replayed up to each epoch's block"""
+    print(f'Replaying the gauge controller for {len(epoch_blocks)} pre-Multicall3 epochs', flush=True)
+    controller = gauge_weights.GaugeControllerEngine()
+    for epoch, block in sorted(epoch_blocks):
+        try:
+            gauge_weights.build_engine(w3, block, controller)
+        except Exception as e:
+            # Later epochs need this replay too; they are retried on the next loop
+            print(f'Error replaying the gauge controller to epoch {epoch}: {e}', flush=True)
+            return
+        rows = snapshot_epoch_from_engine(controller, epoch, block)
+        write_snapshot(rows)
+        print(f'Epoch {utils.timestamp_to_date_string(epoch)}: {len(rows)} gauges written from the local engine', flush=True)
+
+
+def delete_early_epochs():
+    """Drop stored epochs whose block predates Multicall3 so they are refilled"""
+    with engine.begin() as conn:
+        deleted = conn.execute(
+            gauge_weights_table.delete().where(gauge_weights_table.c.block < MULTICALL3_DEPLOY_BLOCK)
+        ).rowcount
+    print(f'Deleted {deleted} pre-Multicall3 snapshot rows', flush=True)
+
+
+def get_gauges(block):
+    n_gauges = gauge_controller.functions.n_gauges().call(block_identifier=block)
+    return utils.multicall(w3, [gauge_controller.functions.gauges(i) for i in range(n_gauges)], block)
+
+
+def get_voters(epoch, block):
+    """(account, gauge) pairs whose latest vote before `block` has non-zero weight and may still be live at `epoch`"""
+    # Locks last at most MAXTIME, so only votes cast within MAXTIME of the epoch can carry a live end;
+    # a pair's latest vote in that span supersedes anything older
+    ranked = select(
+        votes_table.c.account,
+        votes_table.c.gauge,
+        votes_table.c.weight,
+        func.row_number().over(
+            partition_by=(votes_table.c.account, votes_table.c.gauge),
+            order_by=(votes_table.c.block.desc(), votes_table.c.id.desc()),
+        ).label('rank'),
+    ).where(
+        votes_table.c.block < block,
+        votes_table.c.timestamp > epoch - ve_locks.MAXTIME,
+    ).subquery()
+    query = select(ranked.c.account, ranked.c.gauge).where(ranked.c.rank == 1, ranked.c.weight > 0)
+    with engine.connect() as conn:
+        return [tuple(pair) for pair in conn.execute(query)]
+
+
+def get_top_voters(epoch, block):
+    """{gauge: top voters by bias at the epoch} from vote_user_slopes"""
+    pairs = get_voters(epoch, block)
+    slopes = utils.multicall(w3, [gauge_controller.functions.vote_user_slopes(account, gauge) for account, gauge in pairs], block)
+    return rank_voters(epoch, zip(pairs, slopes))
+
+
+def rank_voters(epoch, slopes):
+    """{gauge: top voters by bias at the epoch} from ((account, gauge), (slope, power, end)) pairs"""
+    voters = {}
+    for (account, gauge), result in slopes:
+        if not result:
+            continue
+        slope, power, end = result
+        if end <= epoch or slope == 0:
+            continue
+        voters.setdefault(gauge, []).append({
+            'account': account,
+            'bias': slope * (end - epoch) / 1e18,
+            'slope': slope / 1e18,
+            'power': power,
+            'end': end,
+        })
+    return {gauge: sorted(v, key=lambda voter: voter['bias'], reverse=True)[:TOP_VOTERS] for gauge, v in voters.items()}
+
+
+def snapshot_epoch(epoch):
+    """(block, rows) for an epoch read on chain; rows is None before Multicall3, see fill_early_epochs"""
+    block = utils.closest_block_after_timestamp(w3, epoch)
+    if block < MULTICALL3_DEPLOY_BLOCK:
+        return block, None
+    gauges = [gauge for gauge in get_gauges(block) if gauge]
+    calls = []
+    for gauge in gauges:
+        calls += [
+            gauge_controller.functions.checkpoint_gauge(gauge),
+            gauge_controller.functions.points_weight(gauge, epoch),
+            gauge_controller.functions.gauge_relative_weight(gauge, epoch),
+        ]
+    results = utils.multicall(w3, calls, block, batch_size=SNAPSHOT_BATCH_SIZE)
+    top_voters = get_top_voters(epoch, block)
+    return block, [
+        snapshot_row(epoch, gauge, block, point if point else (0, 0), relative_weight or 0, top_voters.get(gauge, []))
+        for gauge, point, relative_weight in zip(gauges, results[1::3], results[2::3])
+    ]
+
+
+def snapshot_epoch_from_engine(controller, epoch, block):
+    """Rows for an epoch from a GaugeControllerEngine replayed up to `block`"""
+    top_voters = rank_voters(epoch, controller.vote_user_slopes.items())
+    return [
+        snapshot_row(
+            epoch, gauge, block, controller.points_weight_point_at(gauge, epoch),
+            controller.gauge_relative_weight(gauge, epoch), top_voters.get(gauge, [])
+        )
+        for gauge in controller.gauge_types
+    ]
+
+
+def snapshot_row(epoch, gauge, block, point, relative_weight, top_voters):
+    bias, slope = point
+    return {
+        'epoch': epoch,
+        'gauge': gauge,
+        'block': block,
+        'weight': bias / 1e18,
+        'slope': slope / 1e18,
+        'relative_weight': relative_weight / 1e18,
+        'top_voters': top_voters,
+        'date_str': datetime.utcfromtimestamp(epoch).strftime('%Y-%m-%d %H:%M:%S'),
+    }
+
+
+def write_snapshot(rows):
+    if not rows:
+        return
+    with engine.begin() as conn:
+        ins = utils.insert_for(conn, gauge_weights_table).values(rows)
+        conn.execute(ins.on_conflict_do_nothing(index_elements=['epoch', 'gauge']))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Weekly Curve gauge weight snapshots')
+    parser.add_argument('--refill-early', action='store_true', help='rewrite epochs read before the Multicall3 deployment')
+    if parser.parse_args().refill_early:
+        delete_early_epochs()
+    main()
@@ -0,0 +1,426 @@
+"""
+Local replay of the Curve GaugeController.
+
+GaugeControllerEngine applies VoteForGauge, NewGauge, NewTypeWeight and
+NewGaugeWeight events (plus the VotingEscrow lock events votes depend on) with
+the same integer arithmetic as the contract: per-gauge and per-type
+(bias, slope) points on the weekly grid, scheduled slope changes at lock ends,
+and the lazy weekly fills done by _get_weight/_get_sum/_get_type_weight.
+
+materialize() then fills every series out to a horizon as numpy arrays
+(gauges x weeks), so points_weight, gauge weights, totals and relative
+weights for any gauge and epoch are array lookups. Values are what the
+contract returns once a week has been checkpointed; weeks nobody has
+checkpointed on chain read as 0 there.
+
+    python data_fetchers/gauge_weights.py --verify 200     # compare a sample with chain reads
+"""
+import argparse
+import os
+import random
+import sys
+
+import numpy as np
+
+# Add the parent directory of the current file to sys.path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+import utils
+from data_fetchers import ve_locks
+
+GAUGE_CONTROLLER_ADDRESS = '0x2F50D538606Fa9EDD2B11E2446BEb18C9D5846bB'
+VE_ADDRESS = '0x5f3b5DfEb7B28CDbD7FAba78963EE202a494e2A2'
+WEEK = utils.WEEK
+MULTIPLIER = 10 ** 18
+MAX_WIDTH = 250_000
+CONTROLLER_EVENTS = ('VoteForGauge', 'NewGauge', 'NewTypeWeight', 'NewGaugeWeight')
+
+
+def next_week(timestamp):
+    return (timestamp + WEEK) // WEEK * WEEK
+
+
+def fill_points(points, changes, t, now):
+    """Contract weekly fill of a (bias, slope) series from week t until it passes `now`"""
+    bias, slope = points.get(t, (0, 0))
+    while t <= now:
+        t += WEEK
+        d_bias = slope * WEEK
+        if bias > d_bias:
+            bias -= d_bias
+            slope -= changes.get(t, 0)
+        else:
+            bias, slope = 0, 0
+        points[t] = (bias, slope)
+    return t, bias
+
+
+class GaugeControllerEngine:
+    """In-memory GaugeController state rebuilt from events"""
+
+    def __init__(self):
+        self.gauge_types = {}  # gauge -> type id
+        self.points_weight = {}  # gauge -> {week: (bias, slope)}
+        self.changes_weight = {}  # gauge -> {week: slope}
+        self.time_weight = {}  # gauge -> last filled week
+        self.points_sum = {}  # type -> {week: (bias, slope)}
+        self.changes_sum = {}
+        self.time_sum = {}
+        self.points_type_weight = {}  # type -> {week: weight}
+        self.time_type_weight = {}
+        self.vote_user_slopes = {}  # (user, gauge) -> (slope, power, end)
+        self.locks = {}  # VotingEscrow locks, see ve_locks
+        self.last_block = 0
+        self._arrays = None
+
+    # --- contract internals ---------------------------------------------------
+
+    def _get_weight(self, gauge, now):
+        t = self.time_weight.get(gauge, 0)
+        if not t:
+            return 0
+        t, bias = fill_points(self.points_weight[gauge], self.changes_weight[gauge], t, now)
+        self.time_weight[gauge] = t
+        return bias
+
+    def _get_sum(self, gauge_type, now):
+        t = self.time_sum.get(gauge_type, 0)
+        if not t:
+            return 0
+        t, bias = fill_points(self.points_sum[gauge_type], self.changes_sum[gauge_type], t, now)
+        self.time_sum[gauge_type] = t
+        return bias
+
+    def _get_type_weight(self, gauge_type, now):
+        t = self.time_type_weight.get(gauge_type, 0)
+        if not t:
+            return 0
+        weights = self.points_type_weight[gauge_type]
+        weight = weights[t]
+        while t <= now:
+            t += WEEK
+            weights[t] = weight
+        self.time_type_weight[gauge_type] = t
+        return weight
+
+    def _ensure_type(self, gauge_type):
+        self.points_sum.setdefault(gauge_type, {})
+        self.changes_sum.setdefault(gauge_type, {})
+        self.points_type_weight.setdefault(gauge_type, {})
+
+    # --- events ---------------------------------------------------------------
+
+    def apply(self, event, timestamp=None):
+        """Apply one decoded event; NewGauge needs the block `timestamp`"""
+        name = event.event
+        args = event['args']
+        self._arrays = None
+        self.last_block = event.blockNumber
+        if name in ve_locks.LOCK_EVENTS:
+            ve_locks.apply_event(self.locks, event)
+        elif name == 'VoteForGauge':
+            self.vote(args['user'], args['gauge_addr'], args['weight'], args['time'])
+        elif name == 'NewGauge':
+            self.add_gauge(args['addr'], args['gauge_type'], args['weight'], timestamp)
+        elif name == 'NewTypeWeight':
+            # `time` is already the next week; any timestamp in the week before fills the same way
+            self.change_type_weight(args['type_id'], args['weight'], args['time'] - 1)
+        elif name == 'NewGaugeWeight':
+            self.change_gauge_weight(args['gauge_address'], args['weight'], args['time'])
+
+    def add_gauge(self, gauge, gauge_type, weight, now):
+        self._ensure_type(gauge_type)
+        self.gauge_types[gauge] = gauge_type
+        self.points_weight[gauge] = {}
+        self.changes_weight[gauge] = {}
+        next_time = next_week(now)
+        if weight > 0:
+            self._get_type_weight(gauge_type, now)
+            old_sum = self._get_sum(gauge_type, now)
+            self.points_sum[gauge_type][next_time] = (weight + old_sum, self.points_sum[gauge_type].get(next_time, (0, 0))[1])
+            self.time_sum[gauge_type] = next_time
+            self.points_weight[gauge][next_time] = (weight, 0)
+        if not self.time_sum.get(gauge_type):
+            self.time_sum[gauge_type] = next_time
+        self.time_weight[gauge] = next_time
+
+    def change_type_weight(self, gauge_type, weight, now):
+        self._ensure_type(gauge_type)
+        self._get_type_weight(gauge_type, now)
+        self._get_sum(gauge_type, now)
+        next_time = next_week(now)
+        self.points_type_weight[gauge_type][next_time] = weight
+        self.time_type_weight[gauge_type] = next_time
+
+    def change_gauge_weight(self, gauge, weight, now):
+        gauge_type = self.gauge_types[gauge]
+        old_gauge_weight = self._get_weight(gauge, now)
+        self._get_type_weight(gauge_type, now)
+        old_sum = self._get_sum(gauge_type, now)
+        next_time = next_week(now)
+        slope = self.points_weight[gauge].get(next_time, (0, 0))[1]
+        self.points_weight[gauge][next_time] = (weight, slope)
+        self.time_weight[gauge] = next_time
+        sum_slope = self.points_sum[gauge_type].get(next_time, (0, 0))[1]
+        self.points_sum[gauge_type][next_time] = (old_sum + weight - old_gauge_weight, sum_slope)
+        self.time_sum[gauge_type] = next_time
+
+    def vote(self, user, gauge, user_weight, now):
+        if gauge not in self.gauge_types:
+            print(f'Vote for unknown gauge {gauge} by {user}, skipping', flush=True)
+            return
+        gauge_type = self.gauge_types[gauge]
+        lock = self.locks.get(user)
+        slope = lock['amount'] // ve_locks.MAXTIME if lock else 0
+        lock_end = lock['end'] if lock else 0
+        next_time = next_week(now)
+
+        old_slope, old_power, old_end = self.vote_user_slopes.get((user, gauge), (0, 0, 0))
+        old_bias = old_slope * (old_end - next_time) if old_end > next_time else 0
+        new_slope = slope * user_weight // 10_000
+        new_bias = new_slope * (lock_end - next_time)
+
+        old_weight_bias = self._get_weight(gauge, now)
+        old_weight_slope = self.points_weight[gauge].get(next_time, (0, 0))[1]
+        old_sum_bias = self._get_sum(gauge_type, now)
+        old_sum_slope = self.points_sum[gauge_type].get(next_time, (0, 0))[1]
+
+        weight_bias = max(old_weight_bias + new_bias, old_bias) - old_bias
+        sum_bias = max(old_sum_bias + new_bias, old_bias) - old_bias
+        if old_end > next_time:
+            weight_slope = max(old_weight_slope + new_slope, old_slope) - old_slope
+            sum_slope = max(old_sum_slope + new_slope, old_slope) - old_slope
+        else:
+            weight_slope = old_weight_slope + new_slope
+            sum_slope = old_sum_slope + new_slope
+        self.points_weight[gauge][next_time] = (weight_bias, weight_slope)
+        self.points_sum[gauge_type][next_time] = (sum_bias, sum_slope)
+
+        if old_end > now:
+            # Cancel old slope changes that haven't happened yet
+            self.changes_weight[gauge][old_end] = self.changes_weight[gauge].get(old_end, 0) - old_slope
+            self.changes_sum[gauge_type][old_end] = self.changes_sum[gauge_type].get(old_end, 0) - old_slope
+        self.changes_weight[gauge][lock_end] = self.changes_weight[gauge].get(lock_end, 0) + new_slope
+        self.changes_sum[gauge_type][lock_end] = self.changes_sum[gauge_type].get(lock_end, 0) + new_slope
+
+        self.vote_user_slopes[(user, gauge)] = (new_slope, user_weight, lock_end)
+
+    # --- materialized views ----------------------------------------------------
+
+    def materialize(self, horizon):
+        """Fill every series out to week `horizon` as (rows x weeks) object arrays of exact ints"""
+        stored = [t for series in (self.points_weight, self.points_sum, self.points_type_weight) for points in series.values() for t in points]
+        first = min(stored, default=horizon)
+        weeks = np.arange(first, max(horizon, first) + WEEK, WEEK, dtype=np.int64)
+        gauges = list(self.gauge_types)
+        types = sorted(self.points_type_weight)
+
+        weight_bias, weight_slope = self._fill_matrix(gauges, self.points_weight, self.changes_weight, self.time_weight, weeks)
+        sum_bias, _ = self._fill_matrix(types, self.points_sum, self.changes_sum, self.time_sum, weeks)
+
+        type_weight = np.zeros((len(types), len(weeks)), dtype=object)
+        for row, gauge_type in enumerate(types):
+            stored = sorted(self.points_type_weight[gauge_type].items())
+            if not stored:
+                continue
+            times = np.array([t for t, _ in stored], dtype=np.int64)
+            values = np.array([w for _, w in stored] + [0], dtype=object)
+            # Latest stored weight at or before each week; weeks before the first one are 0
+            idx = np.searchsorted(times, weeks, side='right') - 1
+            type_weight[row] = np.where(idx >= 0, values[idx], 0)
+
+        total = (sum_bias * type_weight).sum(axis=0) if types else np.zeros(len(weeks), dtype=object)
+        type_rows = np.array([types.index(self.gauge_types[g]) for g in gauges], dtype=np.int64)
+        gauge_type_weight = type_weight[type_rows] if gauges else np.zeros((0, len(weeks)), dtype=object)
+        safe_total = np.where(total > 0, total, 1)
+        relative = np.where(total > 0, MULTIPLIER * gauge_type_weight * weight_bias // safe_total, 0)
+
+        self._arrays = {
+            'weeks': weeks,
+            'gauge_index': {gauge: i for i, gauge in enumerate(gauges)},
+            'type_index': {gauge_type: i for i, gauge_type in enumerate(types)},
+            'weight_bias': weight_bias,
+            'weight_slope': weight_slope,
+            'sum_bias': sum_bias,
+            'type_weight': type_weight,
+            'total': total,
+            'relative': relative,
+        }
+        return self._arrays
+
+    @staticmethod
+    def _fill_matrix(keys, points, changes, filled_to, weeks):
+        """(bias, slope) matrices: stored points up to each row's last filled week, then the contract fill vectorised across rows"""
+        n = len(weeks)
+        bias = np.zeros((len(keys), n), dtype=object)
+        slope = np.zeros((len(keys), n), dtype=object)
+        delta = np.zeros((len(keys), n), dtype=object)
+        start = weeks[0]
+        for row, key in enumerate(keys):
+            for t, (b, s) in points[key].items():
+                i = (t - start) // WEEK
+                if 0 <= i < n:
+                    bias[row, i], slope[row, i] = b, s
+            for t, d in changes[key].items():
+                i = (t - start) // WEEK
+                if 0 <= i < n:
+                    delta[row, i] = d
+        last = np.array([filled_to.get(key, 0) for key in keys], dtype=np.int64)
+        for i in range(1, n):
+            pending = weeks[i] > last
+            if not pending.any():
+                continue
+            d_bias = slope[:, i - 1] * WEEK
+            alive = bias[:, i - 1] > d_bias
+            new_bias = np.where(alive, bias[:, i - 1] - d_bias, 0)
+            new_slope = np.where(alive, slope[:, i - 1] - delta[:, i], 0)
+            bias[:, i] = np.where(pending, new_bias, bias[:, i])
+            slope[:, i] = np.where(pending, new_slope, slope[:, i])
+        return bias, slope
+
+    def _view(self, timestamp):
+        arrays = self._arrays
+        if arrays is None or timestamp // WEEK * WEEK > arrays['weeks'][-1]:
+            arrays = self.materialize(max(timestamp // WEEK * WEEK, next_week(self._latest_time())))
+        i = (timestamp // WEEK * WEEK - arrays['weeks'][0]) // WEEK
+        return arrays, int(i)
+
+    def _latest_time(self):
+        times = [t for series in (self.time_weight, self.time_sum, self.time_type_weight) for t in series.values()]
+        return max(times, default=0)
+
+    # --- queries ----------------------------------------------------------------
+
+    def points_weight_at(self, gauge, timestamp):
+        """points_weight(gauge, week).bias"""
+        arrays, i = self._view(timestamp)
+        row = arrays['gauge_index'].get(gauge)
+        return int(arrays['weight_bias'][row, i]) if row is not None and i >= 0 else 0
+
+    def points_weight_point_at(self, gauge, timestamp):
+        """points_weight(gauge, week) as (bias, slope)"""
+        arrays, i = self._view(timestamp)
+        row = arrays['gauge_index'].get(gauge)
+        if row is None or i < 0:
+            return 0, 0
+        return int(arrays['weight_bias'][row, i]), int(arrays['weight_slope'][row, i])
+
+    def type_weight_at(self, gauge_type, timestamp):
+        arrays, i = self._view(timestamp)
+        row = arrays['type_index'].get(gauge_type)
+        return int(arrays['type_weight'][row, i]) if row is not None and i >= 0 else 0
+
+    def gauge_weight_at(self, gauge, timestamp):
+        """Type-weighted gauge weight, the gauge's share of points_total"""
+        return self.points_weight_at(gauge, timestamp) * self.type_weight_at(self.gauge_types.get(gauge), timestamp)
+
+    def total_weight_at(self, timestamp):
+        """points_total(week)"""
+        arrays, i = self._view(timestamp)
+        return int(arrays['total'][i]) if i >= 0 else 0
+
+    def gauge_relative_weight(self, gauge, timestamp):
+        """gauge_relative_weight(gauge, time), 1e18 = 100%"""
+        arrays, i = self._view(timestamp)
+        row = arrays['gauge_index'].get(gauge)
+        return int(arrays['relative'][row, i]) if row is not None and i >= 0 else 0
+
+    def relative_weights(self, timestamp):
+        """{gauge: relative weight} for every gauge at an epoch"""
+        arrays, i = self._view(timestamp)
+        if i < 0:
+            return {}
+        column = arrays['relative'][:, i]
+        return {gauge: int(column[row]) for gauge, row in arrays['gauge_index'].items()}
+
+    def vote_user_slope(self, user, gauge):
+        """vote_user_slopes(user, gauge) as (slope, power, end)"""
+        return self.vote_user_slopes.get((user, gauge), (0, 0, 0))
+
+
+# --- building from logs --------------------------------------------------------
+
+def controller_contracts(w3):
+    controller = w3.eth.contract(address=GAUGE_CONTROLLER_ADDRESS, abi=utils.load_abi('./abis/gauge_controller.json'))
+    ve = w3.eth.contract(address=VE_ADDRESS, abi=utils.load_abi('./abis/ve.json'))
+    return controller, ve
+
+
+def build_engine(w3, to_block=None, engine=None):
+    """Replay controller and VotingEscrow logs into `engine` (or a new one) up to `to_block`"""
+    engine = engine or GaugeControllerEngine()
+    controller, ve = controller_contracts(w3)
+    decoders = {
+        (contract.address.lower(), utils.topic_for_event(contract, name)): getattr(contract.events, name)()
+        for contract, names in ((controller, CONTROLLER_EVENTS), (ve, ve_locks.LOCK_EVENTS))
+        for name in names
+    }
+    height = w3.eth.get_block_number()
+    to_block = height if to_block is None else to_block
+    cursor = max(engine.last_block + 1, ve_locks.START_BLOCK)
+    while cursor <= to_block:
+        window_end = min(cursor + MAX_WIDTH, to_block)
+        raw_logs = utils.fetch_raw_logs(
+            w3, [GAUGE_CONTROLLER_ADDRESS, VE_ADDRESS], list({topic for _, topic in decoders}), cursor, window_end, head=height
+        )
+        events = [decoders[(log['address'].lower(), w3.to_hex(log['topics'][0]))].process_log(log) for log in raw_logs]
+        gauge_blocks = {e.blockNumber for e in events if e.event == 'NewGauge'}
+        timestamps = {block: w3.eth.get_block(block).timestamp for block in sorted(gauge_blocks)}
+        for event in events:
+            engine.apply(event, timestamps.get(event.blockNumber))
+        engine.last_block = window_end
+        print(f'Replayed gauge controller {cursor} --> {window_end}: {len(events)} events', flush=True)
+        cursor = window_end + 1
+    return engine
+
+
+def verify(w3, engine, samples=100, block=None, seed=None):
+    """Compare engine answers with chain reads for random (gauge, epoch) pairs up to the current week"""
+    block = engine.last_block if block is None else block
+    now = w3.eth.get_block(block).timestamp
+    controller, _ = controller_contracts(w3)
+    rng = random.Random(seed)
+    gauges = list(engine.gauge_types)
+    # Earliest week any gauge has a stored point, so the sample reaches back to the first votes
+    first_week = min((t for points in engine.points_weight.values() for t in points), default=now // WEEK * WEEK)
+    epochs = list(range(first_week, now // WEEK * WEEK + 1, WEEK))
+    pairs = [(rng.choice(gauges), rng.choice(epochs)) for _ in range(samples)]
+
+    calls = []
+    for gauge, epoch in pairs:
+        calls += [controller.functions.points_weight(gauge, epoch), controller.functions.gauge_relative_weight(gauge, epoch)]
+    results = utils.multicall(w3, calls, block)
+
+    mismatches = 0
+    for (gauge, epoch), point, relative in zip(pairs, results[::2], results[1::2]):
+        local_bias = engine.points_weight_at(gauge, epoch)
+        local_relative = engine.gauge_relative_weight(gauge, epoch)
+        chain_bias = point[0] if point else None
+        if chain_bias != local_bias or relative != local_relative:
+            mismatches += 1
+            print(f'Mismatch {gauge} @ {epoch}: bias local {local_bias} chain {chain_bias} | '
+                  f'relative local {local_relative} chain {relative}', flush=True)
+    print(f'Verified {len(pairs)} (gauge, epoch) pairs at block {block}: {mismatches} mismatches', flush=True)
+    return mismatches
+
+
+def main():
+    from dotenv import load_dotenv
+    from web3 import Web3
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Rebuild Curve gauge weights locally')
+    parser.add_argument('--to-block', type=int, default=None)
+    parser.add_argument('--verify', type=int, default=0, help='number of (gauge, epoch) pairs to check against chain reads')
+    parser.add_argument('--seed', type=int, default=None)
+    args = parser.parse_args()
+
+    w3 = Web3(utils.make_provider(os.getenv('WEB3_PROVIDER_URI')))
+    engine = build_engine(w3, args.to_block)
+    print(f'{len(engine.gauge_types)} gauges, {len(engine.vote_user_slopes)} user votes', flush=True)
+    if args.verify:
+        verify(w3, engine, args.verify, seed=args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,228 @@
+"""
+Harvest APR engine for the liquid-locker compounders.
+
+For every harvest block in crv_ll_harvests the compounder's total assets and
+total supply are read with one multicall per block and cached in
+ll_vault_reads, so each block is only ever read once. Period APRs between
+consecutive harvests are then computed with numpy and stored in
+ll_harvest_aprs:
+
+    pps_apr     (pps / prev_pps - 1) * YEAR / (timestamp - prev_timestamp)
+    profit_apr  profit / prev_total_assets * YEAR / (timestamp - prev_timestamp)
+
+ll_harvests calls update_harvest_aprs() after each scan. Run this module
+directly to recompute the whole history:
+
+    python data_fetchers/ll_harvest_apr.py [--compounder 0x...]
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+from sqlalchemy import func, select
+
+# Add the parent directory of the current file to sys.path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+from constants import CURVE_LIQUID_LOCKER_COMPOUNDERS
+from schemas.ll_harvests import create_apr_tables
+import utils
+
+YEAR = 365 * utils.DAY
+DECIMALS = 18
+
+_contracts = {}
+
+
+def vault_contract(w3, compounder):
+    if compounder not in _contracts:
+        info = CURVE_LIQUID_LOCKER_COMPOUNDERS[compounder]
+        _contracts[compounder] = w3.eth.contract(address=compounder, abi=utils.load_abi(f"./abis/{info['abi']}.json"))
+    return _contracts[compounder]
+
+
+def harvest_history(conn, harvest_table, compounder, from_block=0):
+    """(block, timestamp, profit) per harvest block, profit summed within a block"""
+    query = select(
+        harvest_table.c.block,
+        func.max(harvest_table.c.timestamp),
+        func.sum(harvest_table.c.profit),
+    ).where(
+        harvest_table.c.compounder == compounder,
+        harvest_table.c.block >= from_block,
+    ).group_by(harvest_table.c.block).order_by(harvest_table.c.block)
+    return [(int(block), int(timestamp), float(profit or 0)) for block, timestamp, profit in conn.execute(query)]
+
+
+def fetch_vault_reads(w3, engine, vault_reads_table, blocks_by_compounder):
+    """Read and cache total assets/supply for every (compounder, block) not cached yet"""
+    all_blocks = [block for blocks in blocks_by_compounder.values() for block in blocks]
+    if not all_blocks:
+        return 0
+    with engine.connect() as conn:
+        cached = set(conn.execute(
+            select(vault_reads_table.c.compounder, vault_reads_table.c.block).where(
+                vault_reads_table.c.compounder.in_(list(blocks_by_compounder)),
+                vault_reads_table.c.block >= min(all_blocks),
+            )
+        ).all())
+
+    compounders_by_block = {}
+    for compounder, blocks in blocks_by_compounder.items():
+        for block in blocks:
+            if (compounder, block) not in cached:
+                compounders_by_block.setdefault(block, []).append(compounder)
+
+    for block, compounders in sorted(compounders_by_block.items()):
+        calls = []
+        for compounder in compounders:
+            contract = vault_contract(w3, compounder)
+            assets_fn = CURVE_LIQUID_LOCKER_COMPOUNDERS[compounder]['assets_fn']
+            calls += [getattr(contract.functions, assets_fn)(), contract.functions.totalSupply()]
+        results = utils.multicall(w3, calls, block)
+        rows = [
+            {
+                'compounder': compounder,
+                'block': block,
+                'total_assets': None if assets is None else assets / 10 ** DECIMALS,
+                'total_supply': None if supply is None else supply / 10 ** DECIMALS,
+            }
+            for compounder, assets, supply in zip(compounders, results[::2], results[1::2])
+        ]
+        with engine.begin() as conn:
+            ins = utils.insert_for(conn, vault_reads_table).values(rows)
+            conn.execute(ins.on_conflict_do_nothing(index_elements=['compounder', 'block']))
+    return len(compounders_by_block)
+
+
+def load_vault_reads(conn, vault_reads_table, compounder, blocks):
+    query = select(vault_reads_table.c.block, vault_reads_table.c.total_assets, vault_reads_table.c.total_supply).where(
+        vault_reads_table.c.compounder == compounder,
+        vault_reads_table.c.block.in_(blocks),
+    )
+    return {block: (assets, supply) for block, assets, supply in conn.execute(query)}
+
+
+def compute_aprs(timestamps, profits, total_assets, total_supply):
+    """Vectorised period APRs; element i covers harvest i-1 -> i, element 0 is NaN"""
+    timestamps = np.asarray(timestamps, dtype=float)
+    profits = np.asarray(profits, dtype=float)
+    total_assets = np.asarray(total_assets, dtype=float)
+    total_supply = np.asarray(total_supply, dtype=float)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pps = np.where(total_supply > 0, total_assets / total_supply, np.nan)
+        elapsed = np.diff(timestamps)
+        pps_apr = np.full(len(timestamps), np.nan)
+        profit_apr = np.full(len(timestamps), np.nan)
+        if len(timestamps) > 1:
+            pps_apr[1:] = np.where(elapsed > 0, (pps[1:] / pps[:-1] - 1) * YEAR / elapsed, np.nan)
+            profit_apr[1:] = np.where(elapsed > 0, profits[1:] / total_assets[:-1] * YEAR / elapsed, np.nan)
+    return pps, pps_apr, profit_apr
+
+
+def none_if_nan(value):
+    return None if value is None or np.isnan(value) else float(value)
+
+
+def apr_rows(compounder, history, reads):
+    """ll_harvest_aprs rows for consecutive harvest blocks in `history`"""
+    blocks = [block for block, _, _ in history]
+    timestamps = [timestamp for _, timestamp, _ in history]
+    profits = [profit for _, _, profit in history]
+    assets = [reads.get(block, (None, None))[0] for block in blocks]
+    supply = [reads.get(block, (None, None))[1] for block in blocks]
+    pps, pps_apr, profit_apr = compute_aprs(
+        timestamps, profits,
+        [np.nan if a is None else a for a in assets],
+        [np.nan if s is None else s for s in supply],
+    )
+    name = CURVE_LIQUID_LOCKER_COMPOUNDERS[compounder]['symbol']
+    return [
+        {
+            'compounder': compounder,
+            'name': name,
+            'block': blocks[i],
+            'timestamp': timestamps[i],
+            'prev_block': blocks[i - 1] if i else None,
+            'prev_timestamp': timestamps[i - 1] if i else None,
+            'profit': profits[i],
+            'total_assets': assets[i],
+            'price_per_share': none_if_nan(pps[i]),
+            'pps_apr': none_if_nan(pps_apr[i]),
+            'profit_apr': none_if_nan(profit_apr[i]),
+        }
+        for i in range(len(blocks))
+    ]
+
+
+def update_harvest_aprs(w3, engine, harvest_table, vault_reads_table, harvest_aprs_table, compounders=None, recompute=False):
+    """Compute APRs for harvests newer than each compounder's last APR row (or all of them)"""
+    compounders = compounders or list(CURVE_LIQUID_LOCKER_COMPOUNDERS)
+    histories = {}
+    anchored = set()  # compounders whose first history entry already has an APR row
+    with engine.connect() as conn:
+        for compounder in compounders:
+            from_block = 0
+            if not recompute:
+                last = conn.execute(
+                    select(func.max(harvest_aprs_table.c.block)).where(harvest_aprs_table.c.compounder == compounder)
+                ).scalar()
+                # Keep the last computed harvest as the anchor for the next period
+                from_block = last or 0
+            history = harvest_history(conn, harvest_table, compounder, from_block)
+            if from_block:
+                if len(history) < 2:
+                    continue
+                anchored.add(compounder)
+            if history:
+                histories[compounder] = history
+
+    if not histories:
+        return 0
+    fetch_vault_reads(w3, engine, vault_reads_table, {c: [b for b, _, _ in h] for c, h in histories.items()})
+
+    written = 0
+    with engine.begin() as conn:
+        for compounder, history in histories.items():
+            reads = load_vault_reads(conn, vault_reads_table, compounder, [block for block, _, _ in history])
+            rows = apr_rows(compounder, history, reads)
+            if recompute:
+                conn.execute(harvest_aprs_table.delete().where(harvest_aprs_table.c.compounder == compounder))
+            if compounder in anchored:
+                rows = rows[1:]
+            if rows:
+                ins = utils.insert_for(conn, harvest_aprs_table).values(rows)
+                conn.execute(ins.on_conflict_do_update(
+                    index_elements=['compounder', 'block'],
+                    set_={k: ins.excluded[k] for k in rows[0] if k not in ('compounder', 'block')}
+                ))
+            written += len(rows)
+    return written
+
+
+def main():
+    from dotenv import load_dotenv
+    from sqlalchemy import create_engine, MetaData, Table
+    from web3 import Web3
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description='Recompute liquid-locker harvest APRs')
+    parser.add_argument('--compounder', default=None, help='only recompute this compounder')
+    args = parser.parse_args()
+
+    w3 = Web3(utils.make_provider(os.getenv('WEB3_PROVIDER_URI')))
+    engine = create_engine(os.getenv('DATABASE_URI'))
+    metadata = MetaData()
+    harvest_table = Table('crv_ll_harvests', metadata, autoload_with=engine)
+    vault_reads_table, harvest_aprs_table = create_apr_tables(metadata)
+    metadata.create_all(engine, tables=[vault_reads_table, harvest_aprs_table])
+
+    compounders = [args.compounder] if args.compounder else None
+    written = update_harvest_aprs(w3, engine, harvest_table, vault_reads_table, harvest_aprs_table, compounders, recompute=True)
+    print(f'Recomputed {written} harvest APR rows')
+
+
+if __name__ == '__main__':
+    main()
@@ -12,6 +12,8 @@ import os
 parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(parent_dir)
 from constants import CURVE_LIQUID_LOCKER_COMPOUNDERS
+from schemas.ll_harvests import create_apr_tables
+from data_fetchers import ll_harvest_apr
 import utils
 from dotenv import load_dotenv
 
@@ -23,7 +25,7 @@ DATABASE_URI = os.getenv('DATABASE_URI')
 POLL_INTERVAL = 120
 
 # Connect to Ethereum network
-w3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER_URI))
+w3 = Web3(utils.make_provider(WEB3_PROVIDER_URI))
 # Ensure that connection is successful
 if not w3.is_connected():
     raise Exception("Failed to connect to Ethereum node")
@@ -34,10 +36,28 @@ Session = sessionmaker(bind=engine)
 session = Session()
 metadata = MetaData()
 harvest_table = Table('crv_ll_harvests', metadata, autoload_with=engine)
-
-yvycrv_abi = utils.load_abi('./abis/yvycrv.json')
-asdcrv_abi = utils.load_abi('./abis/asdcrv.json')
-ucvxcrv_abi = utils.load_abi('./abis/ucvxcrv.json')
+vault_reads_table, harvest_aprs_table = create_apr_tables(metadata)
+metadata.create_all(engine, tables=[vault_reads_table, harvest_aprs_table])
+
+MIN_START_BLOCK = 20_000_000
+MAX_WIDTH = 200_000
+
+def build_adapter(compounder, info):
+    """Contract, decoder and profit extractor for one CURVE_LIQUID_LOCKER_COMPOUNDERS entry"""
+    contract = w3.eth.contract(address=compounder, abi=utils.load_abi(f"./abis/{info['abi']}.json"))
+    return {
+        'symbol': info['symbol'],
+        'event_name': info['harvest_event'],
+        'topic': utils.topic_for_event(contract, info['harvest_event']),
+        'processor': getattr(contract.events, info['harvest_event'])(),
+        'profit': lambda args: args[info['profit_arg']] / 10 ** info['profit_decimals'],
+    }
+
+adapters = {
+    compounder: build_adapter(compounder, info)
+    for compounder, info in CURVE_LIQUID_LOCKER_COMPOUNDERS.items()
+}
+cursors = {}  # compounder -> next block to scan
 
 def get_last_block_written(contract):
 
@@ -47,7 +67,7 @@ def get_last_block_written(contract):
         query = query.order_by(harvest_table.c.block.desc()).limit(1)
         result = conn.execute(query).scalar()
         # Return the result or DEPLOY_BLOCK if no entries found
-        min_block = max(20_000_000, CURVE_LIQUID_LOCKER_COMPOUNDERS[contract]['deploy_block'])
+        min_block = max(MIN_START_BLOCK, CURVE_LIQUID_LOCKER_COMPOUNDERS[contract]['deploy_block'])
         return result + 1 if result is not None else min_block
 
 
@@ -57,52 +77,45 @@ def main():
         i += 1
         if i % 100 == 0: print(f"Loops since startup: {i}")
         height = w3.eth.get_block_number()
-        for compounder, info in CURVE_LIQUID_LOCKER_COMPOUNDERS.items():
-            last_block_written = get_last_block_written(compounder)
-            print(f'{info["symbol"]} listening from block: {last_block_written}')
-
-            abi, event_name = get_abi_and_event_name(info)
-            contract = w3.eth.contract(address=compounder, abi=abi)
-            event = getattr(contract.events, event_name)
-
-            logs = fetch_logs(contract, event_name, last_block_written, height)
-            for log in logs:
-                handle_harvested_event(compounder, log)
-    
+        scan_harvests(height)
+        try:
+            written = ll_harvest_apr.update_harvest_aprs(w3, engine, harvest_table, vault_reads_table, harvest_aprs_table)
+            if written: print(f'{written} harvest APR rows updated')
+        except Exception as e:
+            print("An error occurred computing harvest APRs:", e)
         time.sleep(POLL_INTERVAL)
 
-def fetch_logs(contract, event_name, from_block, to_block):
-    event = getattr(contract.events, event_name)
-    logs = event.get_logs(
-        fromBlock=from_block,
-        toBlock=to_block
-    )
-    return logs
-
-def get_abi_and_event_name(info):
-    abi = ucvxcrv_abi
-    event_name = 'Harvest'
-    if info['symbol'] == 'asdCRV':
-        abi = asdcrv_abi
-    if info['symbol'] == 'yvyCRV':
-        abi = yvycrv_abi
-        event_name = 'StrategyReported'
-    return abi, event_name
+def scan_harvests(to_height):
+    """Scan every compounder's harvest event in one query per MAX_WIDTH window"""
+    for compounder in adapters:
+        if compounder not in cursors:
+            cursors[compounder] = get_last_block_written(compounder)
+            print(f'{adapters[compounder]["symbol"]} listening from block: {cursors[compounder]}')
+    by_key = {(compounder.lower(), adapter['topic']): compounder for compounder, adapter in adapters.items()}
+    topics = list({adapter['topic'] for adapter in adapters.values()})
+
+    start = min(cursors.values())
+    while start <= to_height:
+        end = min(start + MAX_WIDTH - 1, to_height)
+        logs = utils.fetch_raw_logs(w3, list(adapters), topics, start, end, head=to_height)
+        for log in logs:
+            compounder = by_key.get((log['address'].lower(), w3.to_hex(log['topics'][0])))
+            # Another compounder's event shares the topic, or this one already wrote past it
+            if compounder is None or log['blockNumber'] < cursors[compounder]:
+                continue
+            handle_harvested_event(compounder, adapters[compounder]['processor'].process_log(log))
+        for compounder in cursors:
+            cursors[compounder] = max(cursors[compounder], end + 1)
+        start = end + 1
 
 def handle_harvested_event(address, event):
-    profit = 0
     block = event.blockNumber
     timestamp = w3.eth.get_block(block)['timestamp']
     name = CURVE_LIQUID_LOCKER_COMPOUNDERS[address]['symbol']
     underlying = CURVE_LIQUID_LOCKER_COMPOUNDERS[address]['underlying']
     compounder = address
     txn_hash = event.transactionHash.hex()
-    if address == '0x43E54C2E7b3e294De3A155785F52AB49d87B9922':
-        profit = event['args']['assets'] / 1e18
-    if address == '0xde2bEF0A01845257b4aEf2A2EAa48f6EAeAfa8B7':
-        profit = event['args']['_value'] / 1e18
-    if address == '0x27B5739e22ad9033bcBf192059122d163b60349D':
-        profit = event['args']['gain'] / 1e18
+    profit = adapters[address]['profit'](event['args'])
     date_str = datetime.utcfromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
 
     try:
@@ -129,21 +142,6 @@ def handle_harvested_event(address, event):
     return
 
 
-def create_filter(compounder, info, last_block_written):
-    abi = ucvxcrv_abi
-    event_name = 'Harvest'
-    if info['symbol'] == 'asdCRV':
-        abi = asdcrv_abi
-    if info['symbol'] == 'yvyCRV':
-        abi = yvycrv_abi
-        event_name = 'StrategyReported'
-    
-    compounder_contract = w3.eth.contract(address=compounder, abi=abi)
-    event = getattr(compounder_contract.events, event_name)
-    
-    return event.create_filter(fromBlock=max(info['deploy_block'], last_block_written))
-
-
 if __name__ == '__main__':
     main()
 
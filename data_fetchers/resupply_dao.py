@@ -1,8 +1,10 @@
 from web3 import Web3
-from sqlalchemy import create_engine, MetaData, select, and_
+from sqlalchemy import create_engine, MetaData, Table, inspect, select, func, and_, tuple_, bindparam
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
+import heapq
 import time
+import types
 from datetime import datetime, UTC
 import sys
 import os
@@ -41,6 +43,10 @@ INITIAL_RETRY_DELAY = 1  # Initial retry delay in seconds
 VOTING_PERIOD = 60 * 60 * 24 * 7  # 7 days
 DAY_IN_SECONDS = 24 * 60 * 60
 VOTE_ALERT_POWER_THRESHOLD = 1_000_000
+REGISTRY_ADDRESS = '0x10101010E0C3171D894B71B3400668aF311e7D94'
+VOTER_EVENTS = ['ProposalCreated', 'VoteCast', 'ProposalCancelled', 'ProposalExecuted', 'ProposalDescriptionUpdated']
+VOTER_REGISTRY_KEY = 'VOTER'
+START_BLOCK = 22_200_000  # scan from here when no progress has been recorded
 PERMASTAKERS = {
     '0x12341234B35c8a48908c716266db79CAeA0100E8': 'Yearn',
     '0xCCCCCccc94bFeCDd365b4Ee6B86108fC91848901': 'Convex',
@@ -53,7 +59,7 @@ VOTER_ADDRESSES = [
 ]
 
 # Connect to Ethereum network
-w3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER_URI, request_kwargs={'timeout': 60}))
+w3 = Web3(utils.make_provider(WEB3_PROVIDER_URI, request_kwargs={'timeout': 60}))
 if not w3.is_connected():
     raise Exception("Failed to connect to Ethereum node")
 
@@ -72,58 +78,90 @@ bot = telebot.TeleBot(TELEGRAM_BOT_KEY)
 
 # Load ABI
 voter_abi = utils.load_abi('./abis/resupply_voter.json')
+registry = w3.eth.contract(address=REGISTRY_ADDRESS, abi=utils.load_abi('./abis/resupply_registry.json'))
+
+# Status deadlines (end-24h, end, end+EXECUTION_DELAY, end+EXECUTION_DEADLINE) as a heap of
+# (timestamp, proposal_id, voter_address); only proposals in `scheduled` are still live
+PENDING_STATUSES = [
+    ProposalStatus.OPEN.value,
+    ProposalStatus.PASSED.value,
+    ProposalStatus.EXECUTION_DELAY.value,
+    ProposalStatus.EXECUTABLE.value
+]
+deadlines = []
+scheduled = {}
+
+# (proposal_id, voter_address) -> yes_votes, no_votes, quorum and description of proposals
+# still taking votes; kept in step with the atomic SQL increments and reloaded periodically
+RECONCILE_INTERVAL = 60 * 60  # seconds between on-chain reconciliations of pending proposals
+tallies = {}
+last_reconcile = 0
 
 def format_address(address):
     """Format an address as 0x123...456 with an Etherscan link."""
     return f"[0x{address[2:5]}...{address[-4:]}](https://etherscan.io/address/{address})"
 
-def get_last_block_written():
+def get_last_block_written(voter_address):
+    """Next block to scan for `voter_address`"""
     try:
         with engine.connect() as conn:
-            # First check scanner_progress_table for last scanned block
-            progress_query = select(scanner_progress_table.c.last_scanned_block).order_by(scanner_progress_table.c.id.desc()).limit(1)
+            # First check scanner_progress_table for the voter's cursor
+            progress_query = select(scanner_progress_table.c.last_scanned_block).where(
+                scanner_progress_table.c.voter_address == voter_address
+            )
             last_scanned = conn.execute(progress_query).scalar()
             
             if last_scanned is not None:
                 return last_scanned + 1
             
-            # Fallback: Get highest block from proposals table using a subquery
-            proposals_subquery = select(proposals_table.c.block).order_by(proposals_table.c.block.desc()).limit(1).subquery()
-            proposals_query = select(proposals_subquery.c.block)
+            # Fallback: highest block among the voter's proposals
+            proposals_query = select(func.max(proposals_table.c.block)).where(
+                proposals_table.c.voter_address == voter_address
+            )
             proposals_block = conn.execute(proposals_query).scalar()
             
-            # Get highest block from votes table using a subquery
-            votes_subquery = select(votes_table.c.block).order_by(votes_table.c.block.desc()).limit(1).subquery()
-            votes_query = select(votes_subquery.c.block)
-            votes_block = conn.execute(votes_query).scalar()
-            
-            # Get the highest block between both tables
-            highest_block = max(
-                block for block in [proposals_block, votes_block] 
-                if block is not None
-            ) if any(block is not None for block in [proposals_block, votes_block]) else 22_200_000
-            
-            return highest_block + 1
+            return (proposals_block if proposals_block is not None else START_BLOCK) + 1
     except SQLAlchemyError as e:
         logger.error(f"Database error in get_last_block_written: {str(e)}")
         raise  # Re-raise to prevent silent failures
 
-def update_scanner_progress(block_number):
-    """Update the last scanned block in the database"""
+def update_scanner_progress(voter_address, block_number):
+    """Move the voter's cursor row to `block_number`"""
     try:
-        with engine.connect() as conn:
-            # Insert new progress record
-            ins = scanner_progress_table.insert().values(
-                last_scanned_block=block_number,
-                updated_at=int(time.time())
-            )
-            conn.execute(ins)
-            conn.commit()
-            logger.info(f"Updated scanner progress to block {block_number}")
+        with engine.begin() as conn:
+            utils.upsert(conn, scanner_progress_table, {
+                'voter_address': voter_address,
+                'last_scanned_block': block_number,
+                'updated_at': int(time.time())
+            }, index_elements=['voter_address'])
     except SQLAlchemyError as e:
         logger.error(f"Database error in update_scanner_progress: {str(e)}")
         # Don't raise - we don't want to stop scanning if progress update fails
 
+def migrate_scanner_progress(voter_addresses):
+    """One-time migration of the append-only progress log to one cursor row per voter.
+
+    The old table gained a row per loop and had no voter column; its highest
+    block becomes every voter's cursor. Returns the number of legacy rows
+    removed, 0 when the table is already compacted.
+    """
+    columns = {c['name'] for c in inspect(engine).get_columns(scanner_progress_table.name)}
+    if 'voter_address' in columns:
+        return 0
+    with engine.begin() as conn:
+        legacy = Table(scanner_progress_table.name, MetaData(), autoload_with=conn)
+        n_rows, last_scanned = conn.execute(select(func.count(), func.max(legacy.c.last_scanned_block))).one()
+        legacy.drop(conn)
+        scanner_progress_table.create(conn)
+        if last_scanned is not None:
+            updated_at = int(time.time())
+            conn.execute(scanner_progress_table.insert(), [
+                {'voter_address': voter_address, 'last_scanned_block': last_scanned, 'updated_at': updated_at}
+                for voter_address in voter_addresses
+            ])
+    logger.info(f"Compacted {n_rows} scanner progress rows into {len(voter_addresses)} voter cursor(s)")
+    return n_rows
+
 def send_alert(chat_id, msg):
     """Send a Telegram alert with retry logic for rate limiting."""
     retry_count = 0
@@ -155,11 +193,10 @@ def send_alert(chat_id, msg):
         logger.error(f"Failed to send Telegram message after {MAX_TELEGRAM_RETRIES} retries")
         logger.error(f"Message was: {msg}")
 
-def handle_proposal_created(event, voter_address):
+def handle_proposal_created(event, voter_address, timestamp):
     logger.info(f"Processing ProposalCreated: proposal_id={event['args']['id']}, voter={voter_address}, block={event.blockNumber}, tx={event.transactionHash.hex()}")
     
     block = event.blockNumber
-    timestamp = w3.eth.get_block(block).timestamp
     date_str = datetime.fromtimestamp(timestamp, UTC).strftime('%Y-%m-%d %H:%M UTC')
     txn_hash = event.transactionHash.hex()
     
@@ -196,6 +233,13 @@ def handle_proposal_created(event, voter_address):
         conn.execute(ins)
         conn.commit()
         logger.info(f"Successfully inserted proposal {proposal_id} into database")
+        schedule_proposal(proposal_id, voter_address, end_time)
+        tallies[(str(proposal_id), voter_address)] = {
+            'yes_votes': 0,
+            'no_votes': 0,
+            'quorum': event['args']['quorumWeight'],
+            'description': description
+        }
     except IntegrityError as e:
         # Duplicate entry - already processed, skip alert
         logger.warning(f"Duplicate proposal skipped (proposal_id: {proposal_id}, voter: {voter_address}): {str(e)}")
@@ -220,101 +264,250 @@ def get_proposal_description(proposal_id, voter_address):
     description = voter_contract.functions.proposalDescription(int(proposal_id)).call()
     return description
 
-def handle_vote_cast(event, voter_address):
-    block = event.blockNumber
-    timestamp = w3.eth.get_block(block).timestamp
-    date_str = datetime.fromtimestamp(timestamp, UTC).strftime('%Y-%m-%d %H:%M UTC')
-    txn_hash = event.transactionHash.hex()
-    log_index = event.logIndex
-    
-    proposal_id = str(event['args']['id'])
-    voter = event['args']['account']
-    weight_yes = event['args']['weightYes']
-    weight_no = event['args']['weightNo']
-    description = ""
-    
-    description = get_proposal_description(proposal_id, voter_address)
-    
-    # First, try to insert into database - this must succeed before sending alert
-    try:
-        with engine.connect() as conn:
-            # Insert vote
-            ins = votes_table.insert().values(
-                proposal_id=proposal_id,
-                voter=voter,
-                support=weight_yes > 0,  # If weightYes > 0, it's a yes vote
-                weight=weight_yes if weight_yes > 0 else weight_no,  # Use the non-zero weight
-                reason='',  # Reason not available in event
-                block=block,
-                txn_hash=txn_hash,
-                timestamp=timestamp,
-                date_str=date_str,
-                log_index=log_index
-            )
-            conn.execute(ins)
-            
-            # Update proposal vote counts and last_updated
-            update = proposals_table.update().where(
-                and_(
-                    proposals_table.c.proposal_id == proposal_id,
-                    proposals_table.c.voter_address == voter_address
+def load_tallies(keys=None):
+    """Cache yes/no totals, quorum and description for `keys` (default: every pending proposal)"""
+    query = select(
+        proposals_table.c.proposal_id,
+        proposals_table.c.voter_address,
+        proposals_table.c.yes_votes,
+        proposals_table.c.no_votes,
+        proposals_table.c.quorum,
+        proposals_table.c.description
+    )
+    if keys is None:
+        query = query.where(proposals_table.c.status.in_(PENDING_STATUSES))
+    else:
+        query = query.where(tuple_(proposals_table.c.proposal_id, proposals_table.c.voter_address).in_(list(keys)))
+    with engine.connect() as conn:
+        rows = conn.execute(query).fetchall()
+    loaded = {
+        (row.proposal_id, row.voter_address): {
+            'yes_votes': row.yes_votes,
+            'no_votes': row.no_votes,
+            'quorum': row.quorum,
+            'description': row.description
+        }
+        for row in rows
+    }
+    if keys is None:
+        tallies.clear()
+    tallies.update(loaded)
+    return loaded
+
+def reconcile_tallies():
+    """Reload cached tallies from the database, logging any that drifted"""
+    cached = dict(tallies)
+    loaded = load_tallies()
+    for key, tally in loaded.items():
+        if key in cached and (cached[key]['yes_votes'], cached[key]['no_votes']) != (tally['yes_votes'], tally['no_votes']):
+            logger.warning(f"Tally drift for proposal {key[0]} on {key[1]}: cached {cached[key]['yes_votes']:,.0f}/{cached[key]['no_votes']:,.0f}, stored {tally['yes_votes']:,.0f}/{tally['no_votes']:,.0f}")
+
+def reconcile_proposals(block):
+    """Correct pending proposals from one getProposalData multicall at `block`; returns proposals corrected"""
+    global last_reconcile
+    last_reconcile = time.time()
+    with engine.connect() as conn:
+        proposals = conn.execute(
+            select(proposals_table).where(proposals_table.c.status.in_(PENDING_STATUSES))
+        ).fetchall()
+    if not proposals:
+        return 0
+
+    contracts = {}
+    calls = []
+    for proposal in proposals:
+        if proposal.voter_address not in contracts:
+            contracts[proposal.voter_address] = w3.eth.contract(address=proposal.voter_address, abi=voter_abi)
+        calls.append(contracts[proposal.voter_address].functions.getProposalData(int(proposal.proposal_id)))
+    results = utils.multicall(w3, calls, block)
+
+    corrections = []
+    transitions = []
+    processed = []
+    for proposal, data in zip(proposals, results):
+        if data is None:
+            logger.warning(f"getProposalData failed for proposal {proposal.proposal_id} on {proposal.voter_address}")
+            continue
+        description, epoch, created_at, quorum, weight_yes, weight_no, is_processed, executable, payload = data
+        if is_processed:
+            processed.append(proposal)
+            continue
+        values = {
+            'description': description,
+            'start_time': created_at,
+            'end_time': created_at + VOTING_PERIOD,
+            'quorum': quorum,
+            'yes_votes': weight_yes,
+            'no_votes': weight_no
+        }
+        status = proposal.status
+        # A proposal past its vote that no longer passes on chain has failed
+        if proposal.status != ProposalStatus.OPEN.value and not (weight_yes + weight_no >= quorum and weight_yes > weight_no):
+            status = ProposalStatus.FAILED.value
+        drift = {name: (getattr(proposal, name), value) for name, value in {**values, 'status': status}.items() if getattr(proposal, name) != value}
+        if drift:
+            logger.warning(f"Proposal {proposal.proposal_id} on {proposal.voter_address} drifted from chain: {drift}")
+            corrections.append((proposal, values))
+            if status != proposal.status:
+                # Alert from the corrected tallies, leaving the move itself to the transition code
+                transitions.append((types.SimpleNamespace(**{**proposal._asdict(), **values}), status))
+
+    if corrections:
+        try:
+            with engine.begin() as conn:
+                update = proposals_table.update().where(
+                    and_(
+                        proposals_table.c.proposal_id == bindparam('b_proposal_id'),
+                        proposals_table.c.voter_address == bindparam('b_voter_address')
+                    )
+                ).values(
+                    description=bindparam('b_description'),
+                    start_time=bindparam('b_start_time'),
+                    end_time=bindparam('b_end_time'),
+                    quorum=bindparam('b_quorum'),
+                    yes_votes=bindparam('b_yes_votes'),
+                    no_votes=bindparam('b_no_votes'),
+                    last_updated=block
                 )
-            ).values(
-                yes_votes=proposals_table.c.yes_votes + weight_yes,
-                no_votes=proposals_table.c.no_votes + weight_no,
-                last_updated=block
-            )
-            
-            result = conn.execute(update)
-            if result.rowcount == 0:
-                logger.warning(f"No proposal found to update for proposal_id {proposal_id} and voter {voter_address}")
-            
-            conn.commit()
-    except IntegrityError as e:
-        # Duplicate entry - already processed, skip alert
-        logger.warning(f"Duplicate vote skipped (txn: {txn_hash}, log_index: {log_index}): {str(e)}")
+                conn.execute(update, [
+                    {'b_proposal_id': proposal.proposal_id, 'b_voter_address': proposal.voter_address,
+                     **{f'b_{name}': value for name, value in values.items()}}
+                    for proposal, values in corrections
+                ])
+                if transitions:
+                    update_statuses(conn, transitions, block)
+        except SQLAlchemyError as e:
+            logger.error(f"Database error in reconcile_proposals: {str(e)}")
+            raise
+        statuses = {(p.proposal_id, p.voter_address): status for p, status in transitions}
+        for proposal, values in corrections:
+            key = (proposal.proposal_id, proposal.voter_address)
+            if statuses.get(key, proposal.status) in PENDING_STATUSES:
+                if values['end_time'] != proposal.end_time:
+                    schedule_proposal(proposal.proposal_id, proposal.voter_address, values['end_time'], proposal.ending_soon_alert_sent)
+            else:
+                unschedule_proposal(proposal.proposal_id, proposal.voter_address)
+            if key in tallies:
+                tallies[key].update({name: values[name] for name in ('yes_votes', 'no_votes', 'quorum', 'description')})
+        send_transition_alerts(transitions)
+
+    # Executed or cancelled on chain without us seeing the event: replay it
+    for proposal in processed:
+        replay_missed_outcome(proposal, block)
+    return len(corrections) + len(processed)
+
+def replay_missed_outcome(proposal, block):
+    """Find and handle the ProposalExecuted/ProposalCancelled event of a proposal processed on chain"""
+    contract = w3.eth.contract(address=proposal.voter_address, abi=voter_abi)
+    handlers = {'ProposalExecuted': handle_proposal_executed, 'ProposalCancelled': handle_proposal_cancelled}
+    for event_name, handler in handlers.items():
+        for log in fetch_logs(contract, event_name, proposal.block, block, head=block):
+            if str(log['args']['proposalId']) == proposal.proposal_id:
+                logger.warning(f"Replaying missed {event_name} for proposal {proposal.proposal_id} on {proposal.voter_address}")
+                handler(log, proposal.voter_address, utils.get_block_timestamps(w3, [log.blockNumber])[log.blockNumber])
+                return
+    logger.warning(f"Proposal {proposal.proposal_id} on {proposal.voter_address} is processed on chain but no outcome event was found")
+
+def handle_vote_cast(event, voter_address, timestamp):
+    handle_vote_casts([event], voter_address, {event.blockNumber: timestamp})
+
+def handle_vote_casts(events, voter_address, timestamps):
+    """Insert a batch of VoteCast events and add their weights to the proposal totals in one transaction"""
+    if not events:
         return
+    rows = []
+    for event in events:
+        block = event.blockNumber
+        weight_yes = event['args']['weightYes']
+        weight_no = event['args']['weightNo']
+        rows.append({
+            'proposal_id': str(event['args']['id']),
+            'voter': event['args']['account'],
+            'support': weight_yes > 0,  # If weightYes > 0, it's a yes vote
+            'weight': weight_yes if weight_yes > 0 else weight_no,  # Use the non-zero weight
+            'reason': '',  # Reason not available in event
+            'block': block,
+            'txn_hash': event.transactionHash.hex(),
+            'timestamp': timestamps[block],
+            'date_str': datetime.fromtimestamp(timestamps[block], UTC).strftime('%Y-%m-%d %H:%M UTC'),
+            'log_index': event.logIndex
+        })
+
+    missing = {(row['proposal_id'], voter_address) for row in rows} - set(tallies)
+    if missing:
+        load_tallies(missing)
+
+    # First, write to the database - this must succeed before sending alerts
+    try:
+        with engine.begin() as conn:
+            # Duplicates were already processed and are skipped, along with their alerts
+            ins = utils.insert_for(conn, votes_table).values(rows).on_conflict_do_nothing(
+                index_elements=['txn_hash', 'log_index']
+            ).returning(votes_table.c.txn_hash, votes_table.c.log_index)
+            inserted = set(conn.execute(ins).all())
+
+            totals = {}
+            for event, row in zip(events, rows):
+                if (row['txn_hash'], row['log_index']) not in inserted:
+                    logger.warning(f"Duplicate vote skipped (txn: {row['txn_hash']}, log_index: {row['log_index']})")
+                    continue
+                total = totals.setdefault(row['proposal_id'], {'yes': 0, 'no': 0, 'block': row['block']})
+                total['yes'] += event['args']['weightYes']
+                total['no'] += event['args']['weightNo']
+                total['block'] = max(total['block'], row['block'])
+
+            if totals:
+                # Accumulate in SQL so overlapping writers can't lose each other's votes
+                update = proposals_table.update().where(
+                    and_(
+                        proposals_table.c.proposal_id == bindparam('b_proposal_id'),
+                        proposals_table.c.voter_address == bindparam('b_voter_address')
+                    )
+                ).values(
+                    yes_votes=proposals_table.c.yes_votes + bindparam('b_yes'),
+                    no_votes=proposals_table.c.no_votes + bindparam('b_no'),
+                    last_updated=bindparam('b_block')
+                )
+                conn.execute(update, [
+                    {'b_proposal_id': proposal_id, 'b_voter_address': voter_address,
+                     'b_yes': total['yes'], 'b_no': total['no'], 'b_block': total['block']}
+                    for proposal_id, total in totals.items()
+                ])
     except SQLAlchemyError as e:
-        logger.error(f"Database error in handle_vote_cast: {str(e)}")
+        logger.error(f"Database error in handle_vote_casts: {str(e)}")
         raise
-    
-    # Only send alert AFTER successful database commit and only for 1M+ voting power
-    voting_power = weight_yes + weight_no
-    if voting_power < VOTE_ALERT_POWER_THRESHOLD:
-        return
-    
-    voter_name = PERMASTAKERS.get(voter)
-    
-    # Get the quorum value and vote totals for this proposal
-    with engine.connect() as conn:
-        query = select(
-            proposals_table.c.quorum,
-            proposals_table.c.yes_votes,
-            proposals_table.c.no_votes
-        ).where(
-            and_(
-                proposals_table.c.proposal_id == proposal_id,
-                proposals_table.c.voter_address == voter_address
-            )
-        )
-        result = conn.execute(query).first()
-        if result is None:
-            logger.warning(f"No proposal found for proposal_id {proposal_id} and voter {voter_address}")
-            return
+
+    # Only send alerts AFTER successful database commit, rendered from the cached tallies
+    for event, row in zip(events, rows):
+        if (row['txn_hash'], row['log_index']) not in inserted:
+            continue
+        weight_yes = event['args']['weightYes']
+        weight_no = event['args']['weightNo']
+        tally = tallies.get((row['proposal_id'], voter_address))
+        if tally is None:
+            logger.warning(f"No proposal found for proposal_id {row['proposal_id']} and voter {voter_address}")
+            continue
+        tally['yes_votes'] += weight_yes
+        tally['no_votes'] += weight_no
         
-        quorum = result.quorum
-        total_yes = result.yes_votes
-        total_no = result.no_votes
-    
-    # Send alert
+        # Only alert for 1M+ voting power
+        voting_power = weight_yes + weight_no
+        if voting_power < VOTE_ALERT_POWER_THRESHOLD:
+            continue
+        send_vote_alert(row, weight_yes, weight_no, tally)
+
+def send_vote_alert(row, weight_yes, weight_no, tally):
+    proposal_id = row['proposal_id']
+    voter = row['voter']
+    voter_name = PERMASTAKERS.get(voter)
     logger.info(
         "Sending vote alert for proposal %s by %s with voting power %s",
         proposal_id,
         voter,
-        f"{voting_power:,.0f}"
+        f"{weight_yes + weight_no:,.0f}"
     )
     msg = f"🗳️ *New Vote Cast on Resupply Proposal*\n\n"
-    msg += f"Proposal {proposal_id}: {description}\n"
+    msg += f"Proposal {proposal_id}: {tally['description']}\n"
     if voter_name:
         msg += f"User: {format_address(voter)} ({voter_name})\n"
     else:
@@ -324,17 +517,17 @@ def handle_vote_cast(event, voter_address):
         msg += f"Vote: Yes ({weight_yes:,.0f})\n"
     else:
         msg += f"Vote: No ({weight_no:,.0f})\n"
-    vote_total = total_yes + total_no
+    quorum = tally['quorum']
+    vote_total = tally['yes_votes'] + tally['no_votes']
     quorum_pct = 100 if vote_total >= quorum else (vote_total / quorum) * 100
     votes_needed = 0 if vote_total >= quorum else quorum - vote_total
     msg += f"Quorum Progress: {quorum_pct:.2f}% | {votes_needed:,.0f} needed\n"
-    msg += f"\n🔗 [Etherscan](https://etherscan.io/tx/{txn_hash}) | [Resupply](https://resupply.fi/governance/proposals) | [Hippo Army](https://hippo.army/dao/proposal/{get_hippo_id(proposal_id)})"
+    msg += f"\n🔗 [Etherscan](https://etherscan.io/tx/{row['txn_hash']}) | [Resupply](https://resupply.fi/governance/proposals) | [Hippo Army](https://hippo.army/dao/proposal/{get_hippo_id(proposal_id)})"
     
     send_alert(CHAT_IDS['RESUPPLY_ALERTS'], msg)
 
-def handle_proposal_cancelled(event, voter_address):
+def handle_proposal_cancelled(event, voter_address, timestamp):
     block = event.blockNumber
-    timestamp = w3.eth.get_block(block).timestamp
     date_str = datetime.fromtimestamp(timestamp, UTC).strftime('%Y-%m-%d %H:%M UTC')
     txn_hash = event.transactionHash.hex()
     
@@ -359,6 +552,7 @@ def handle_proposal_cancelled(event, voter_address):
         conn = engine.connect()
         conn.execute(update)
         conn.commit()
+        unschedule_proposal(proposal_id, voter_address)
         
         # Send alert
         msg = f"❌ *Resupply Proposal Cancelled*\n\n"
@@ -373,9 +567,8 @@ def handle_proposal_cancelled(event, voter_address):
         logger.error(f"Unexpected error in handle_proposal_cancelled: {str(e)}")
         raise
 
-def handle_proposal_executed(event, voter_address):
+def handle_proposal_executed(event, voter_address, timestamp):
     block = event.blockNumber
-    timestamp = w3.eth.get_block(block).timestamp
     date_str = datetime.fromtimestamp(timestamp, UTC).strftime('%Y-%m-%d %H:%M UTC')
     txn_hash = event.transactionHash.hex()
     
@@ -402,6 +595,7 @@ def handle_proposal_executed(event, voter_address):
         conn = engine.connect()
         conn.execute(update)
         conn.commit()
+        unschedule_proposal(proposal_id, voter_address)
         
         # Send alert
         msg = f"🚀 *Resupply Proposal Executed*\n\n"
@@ -416,9 +610,8 @@ def handle_proposal_executed(event, voter_address):
         logger.error(f"Unexpected error in handle_proposal_executed: {str(e)}")
         raise
 
-def handle_proposal_description_updated(event, voter_address):
+def handle_proposal_description_updated(event, voter_address, timestamp):
     block = event.blockNumber
-    timestamp = w3.eth.get_block(block).timestamp
     date_str = datetime.fromtimestamp(timestamp, UTC).strftime('%Y-%m-%d %H:%M UTC')
     txn_hash = event.transactionHash.hex()
     
@@ -444,6 +637,8 @@ def handle_proposal_description_updated(event, voter_address):
         conn = engine.connect()
         conn.execute(update)
         conn.commit()
+        if (proposal_id, voter_address) in tallies:
+            tallies[(proposal_id, voter_address)]['description'] = description
         
         # Send alert
         msg = f"📝 *Resupply Proposal Description Updated*\n\n"
@@ -456,220 +651,220 @@ def handle_proposal_description_updated(event, voter_address):
     except Exception as e:
         logger.error("An error occurred:", exc_info=True)
 
+def schedule_proposal(proposal_id, voter_address, end_time, ending_soon_alert_sent=False):
+    """Push a proposal's status deadlines onto the heap"""
+    key = (str(proposal_id), voter_address)
+    scheduled[key] = end_time
+    due_times = [end_time, end_time + EXECUTION_DELAY, end_time + EXECUTION_DEADLINE]
+    if not ending_soon_alert_sent:
+        due_times.append(end_time - DAY_IN_SECONDS)
+    for due in due_times:
+        heapq.heappush(deadlines, (due, *key))
+
+def unschedule_proposal(proposal_id, voter_address):
+    """Drop a proposal's pending deadlines; stale heap entries are skipped when popped"""
+    scheduled.pop((str(proposal_id), voter_address), None)
+
+def load_deadlines():
+    """Rebuild the deadline heap from every proposal still awaiting a transition"""
+    deadlines.clear()
+    scheduled.clear()
+    with engine.connect() as conn:
+        query = select(
+            proposals_table.c.proposal_id,
+            proposals_table.c.voter_address,
+            proposals_table.c.end_time,
+            proposals_table.c.ending_soon_alert_sent
+        ).where(proposals_table.c.status.in_(PENDING_STATUSES))
+        for row in conn.execute(query):
+            schedule_proposal(row.proposal_id, row.voter_address, row.end_time, row.ending_soon_alert_sent)
+    logger.info(f"Scheduled status deadlines for {len(scheduled)} proposal(s)")
+
+def next_deadline():
+    """Timestamp of the earliest live deadline, or None"""
+    while deadlines and (deadlines[0][1], deadlines[0][2]) not in scheduled:
+        heapq.heappop(deadlines)
+    return deadlines[0][0] if deadlines else None
+
+def seconds_until_next_check():
+    due = next_deadline()
+    if due is None:
+        return POLL_INTERVAL
+    return min(POLL_INTERVAL, max(1, due - int(time.time())))
+
+def proposal_passed(proposal):
+    quorum_met = proposal.yes_votes + proposal.no_votes >= proposal.quorum
+    return quorum_met and proposal.yes_votes > proposal.no_votes
+
+def target_status(proposal, current_time):
+    """Status a pending proposal should be in at `current_time`"""
+    if proposal.status == ProposalStatus.OPEN.value:
+        if current_time < proposal.end_time:
+            return ProposalStatus.OPEN.value
+        if not proposal_passed(proposal):
+            return ProposalStatus.FAILED.value
+    time_since_passed = current_time - proposal.end_time
+    if time_since_passed >= EXECUTION_DEADLINE:
+        return ProposalStatus.EXPIRED.value
+    if time_since_passed >= EXECUTION_DELAY:
+        return ProposalStatus.EXECUTABLE.value
+    return ProposalStatus.EXECUTION_DELAY.value
+
+def ending_soon_message(proposal):
+    msg = f"⚠️ *Resupply Proposal Ending Soon*\n\n"
+    msg += f"Proposal {proposal.proposal_id}: {proposal.description}\n\n"
+    msg += f"Ends: {datetime.fromtimestamp(proposal.end_time, UTC).strftime('%Y-%m-%d %H:%M UTC')}\n"
+    msg += f"Yes: {proposal.yes_votes:,.0f}\n"
+    msg += f"No: {proposal.no_votes:,.0f}\n"
+    vote_total = proposal.yes_votes + proposal.no_votes
+    quorum_pct = 100 if vote_total >= proposal.quorum else (vote_total / proposal.quorum) * 100
+    votes_needed = 0 if vote_total >= proposal.quorum else proposal.quorum - vote_total
+    msg += f"Quorum: {quorum_pct:.2f}% | {votes_needed:,.0f} needed\n\n"
+    msg += f"\n🔗 [Etherscan](https://etherscan.io/tx/{proposal.txn_hash}) | [Resupply](https://resupply.fi/governance/proposals) | [Hippo Army](https://hippo.army/dao/proposal/{get_hippo_id(proposal.proposal_id)})"
+    return msg
+
+def transition_messages(proposal, status):
+    """Alerts for every status entered on the way from proposal.status to `status`"""
+    links = f"\n🔗 [Etherscan](https://etherscan.io/tx/{proposal.txn_hash}) | [Resupply](https://resupply.fi/governance/proposals) | [Hippo Army](https://hippo.army/dao/proposal/{get_hippo_id(proposal.proposal_id)})"
+    vote_total = proposal.yes_votes + proposal.no_votes
+    quorum_pct = 100 if vote_total >= proposal.quorum else (vote_total / proposal.quorum) * 100
+    deadline = datetime.fromtimestamp(proposal.end_time + EXECUTION_DEADLINE, UTC).strftime('%Y-%m-%d %H:%M UTC')
+    messages = []
+    if status == ProposalStatus.FAILED.value:
+        votes_needed = 0 if vote_total >= proposal.quorum else proposal.quorum - vote_total
+        msg = f"❌ *Resupply Proposal Failed*\n\n"
+        msg += f"Proposal {proposal.proposal_id}: {proposal.description}\n\n"
+        msg += f"Yes: {proposal.yes_votes:,.0f}\n"
+        msg += f"No: {proposal.no_votes:,.0f}\n"
+        msg += f"Quorum: {quorum_pct:.2f}% | {votes_needed:,.0f} needed\n\n"
+        messages.append(msg + links)
+        return messages
+    if proposal.status == ProposalStatus.OPEN.value:
+        msg = f"✅ *Resupply Proposal Passed*\n\n"
+        msg += f"Proposal {proposal.proposal_id}: {proposal.description}\n\n"
+        msg += f"Yes: {proposal.yes_votes:,.0f}\n"
+        msg += f"No: {proposal.no_votes:,.0f}\n"
+        msg += f"Quorum: {quorum_pct:.2f}%\n\n"
+        msg += f"Executable in 24hrs\n"
+        messages.append(msg + links)
+    if status == ProposalStatus.EXECUTABLE.value:
+        msg = f"⚡ *Resupply Proposal Ready for Execution*\n\n"
+        msg += f"Proposal {proposal.proposal_id}: {proposal.description}\n"
+        msg += f"Execution Deadline: {deadline}\n"
+        messages.append(msg + links)
+    if status == ProposalStatus.EXPIRED.value:
+        msg = f"⌛ *Resupply Proposal Expired*\n\n"
+        msg += f"Proposal {proposal.proposal_id}: {proposal.description}\n"
+        msg += f"Execution Deadline: {deadline}\n"
+        messages.append(msg + links)
+    return messages
+
+def update_statuses(conn, transitions, last_updated):
+    """Move each (proposal, status) transition's row on from the status it was read with"""
+    update = proposals_table.update().where(
+        and_(
+            proposals_table.c.proposal_id == bindparam('b_proposal_id'),
+            proposals_table.c.voter_address == bindparam('b_voter_address'),
+            proposals_table.c.status == bindparam('b_status')
+        )
+    ).values(
+        status=bindparam('new_status'),
+        last_updated=last_updated
+    )
+    conn.execute(update, [
+        {'b_proposal_id': p.proposal_id, 'b_voter_address': p.voter_address, 'b_status': p.status, 'new_status': status}
+        for p, status in transitions
+    ])
+
+def send_transition_alerts(transitions):
+    for proposal, status in transitions:
+        for msg in transition_messages(proposal, status):
+            send_alert(CHAT_IDS['RESUPPLY_ALERTS'], msg)
+
 def check_proposal_statuses():
+    """Fire every deadline that is due, with one batched update per kind of change"""
     current_time = int(time.time())
-    
+    due = set()
+    while next_deadline() is not None and deadlines[0][0] <= current_time:
+        _, proposal_id, voter_address = heapq.heappop(deadlines)
+        due.add((proposal_id, voter_address))
+    if not due:
+        return
+
     try:
-        with engine.connect() as conn:
-            # Get all proposals that need status checking
+        with engine.begin() as conn:
             query = select(proposals_table).where(
-                proposals_table.c.status.in_([
-                    ProposalStatus.OPEN.value,
-                    ProposalStatus.PASSED.value,
-                    ProposalStatus.EXECUTION_DELAY.value,
-                    ProposalStatus.EXECUTABLE.value
-                ])
+                tuple_(proposals_table.c.proposal_id, proposals_table.c.voter_address).in_(list(due)),
+                proposals_table.c.status.in_(PENDING_STATUSES)
             )
             proposals = conn.execute(query).fetchall()
-            
+
+            ending_soon = []
+            transitions = []
             for proposal in proposals:
-                status = proposal.status
-                # For OPEN proposals, check if they've ended
-                if status == ProposalStatus.OPEN.value:
-                    # Check if proposal is ending in 24 hours and we haven't sent an alert yet
-                    time_remaining = proposal.end_time - current_time
-                    if time_remaining > 0 and time_remaining <= DAY_IN_SECONDS and not proposal.ending_soon_alert_sent:
-                        # Mark that we've sent the alert BEFORE sending to prevent duplicates
-                        update = proposals_table.update().where(
-                            and_(
-                                proposals_table.c.proposal_id == proposal.proposal_id,
-                                proposals_table.c.voter_address == proposal.voter_address
-                            )
-                        ).values(
-                            ending_soon_alert_sent=True,
-                            last_updated=current_time
-                        )
-                        conn.execute(update)
-                        conn.commit()
-                        
-                        # Send alert AFTER successful commit
-                        msg = f"⚠️ *Resupply Proposal Ending Soon*\n\n"
-                        msg += f"Proposal {proposal.proposal_id}: {proposal.description}\n\n"
-                        msg += f"Ends: {datetime.fromtimestamp(proposal.end_time, UTC).strftime('%Y-%m-%d %H:%M UTC')}\n"
-                        msg += f"Yes: {proposal.yes_votes:,.0f}\n"
-                        msg += f"No: {proposal.no_votes:,.0f}\n"
-                        vote_total = proposal.yes_votes + proposal.no_votes
-                        quorum_pct = 100 if vote_total >= proposal.quorum else (vote_total / proposal.quorum) * 100
-                        votes_needed = 0 if vote_total >= proposal.quorum else proposal.quorum - vote_total
-                        msg += f"Quorum: {quorum_pct:.2f}% | {votes_needed:,.0f} needed\n\n"
-                        msg += f"\n🔗 [Etherscan](https://etherscan.io/tx/{proposal.txn_hash}) | [Resupply](https://resupply.fi/governance/proposals) | [Hippo Army](https://hippo.army/dao/proposal/{get_hippo_id(proposal.proposal_id)})"
-                        send_alert(CHAT_IDS['RESUPPLY_ALERTS'], msg)
-                    
-                    # Check if proposal has ended
-                    if time_remaining <= 0:
-                        quorum_met = proposal.yes_votes + proposal.no_votes >= proposal.quorum
-                        if quorum_met and proposal.yes_votes > proposal.no_votes:
-                            # Proposal passed - update status BEFORE sending alert
-                            status = ProposalStatus.PASSED.value
-                            update = proposals_table.update().where(
-                                and_(
-                                    proposals_table.c.proposal_id == proposal.proposal_id,
-                                    proposals_table.c.voter_address == proposal.voter_address
-                                )
-                            ).values(
-                                status=ProposalStatus.PASSED.value,
-                                last_updated=current_time
-                            )
-                            result = conn.execute(update)
-                            if result.rowcount == 0:
-                                logger.warning(f"Failed to update status for proposal {proposal.proposal_id} with voter {proposal.voter_address}")
-                                continue  # Skip alert if update failed
-                            conn.commit()
-                            
-                            # Send alert AFTER successful commit
-                            msg = f"✅ *Resupply Proposal Passed*\n\n"
-                            msg += f"Proposal {proposal.proposal_id}: {proposal.description}\n\n"
-                            msg += f"Yes: {proposal.yes_votes:,.0f}\n"
-                            msg += f"No: {proposal.no_votes:,.0f}\n"
-                            vote_total = proposal.yes_votes + proposal.no_votes
-                            quorum_pct = 100 if vote_total >= proposal.quorum else (vote_total / proposal.quorum) * 100
-                            msg += f"Quorum: {quorum_pct:.2f}%\n\n"
-                            msg += f"Executable in 24hrs\n"
-                            msg += f"\n🔗 [Etherscan](https://etherscan.io/tx/{proposal.txn_hash}) | [Resupply](https://resupply.fi/governance/proposals) | [Hippo Army](https://hippo.army/dao/proposal/{get_hippo_id(proposal.proposal_id)})"
-                            send_alert(CHAT_IDS['RESUPPLY_ALERTS'], msg)
-                        else:
-                            # Proposal failed - update status BEFORE sending alert
-                            update = proposals_table.update().where(
-                                and_(
-                                    proposals_table.c.proposal_id == proposal.proposal_id,
-                                    proposals_table.c.voter_address == proposal.voter_address
-                                )
-                            ).values(
-                                status=ProposalStatus.FAILED.value,
-                                last_updated=current_time
-                            )
-                            result = conn.execute(update)
-                            if result.rowcount == 0:
-                                logger.warning(f"Failed to update status for proposal {proposal.proposal_id} with voter {proposal.voter_address}")
-                                continue  # Skip alert if update failed
-                            conn.commit()
-                            
-                            # Send alert AFTER successful commit
-                            msg = f"❌ *Resupply Proposal Failed*\n\n"
-                            msg += f"Proposal {proposal.proposal_id}: {proposal.description}\n\n"
-                            msg += f"Yes: {proposal.yes_votes:,.0f}\n"
-                            msg += f"No: {proposal.no_votes:,.0f}\n"
-                            vote_total = proposal.yes_votes + proposal.no_votes
-                            quorum_pct = 100 if vote_total >= proposal.quorum else (vote_total / proposal.quorum) * 100
-                            votes_needed = 0 if vote_total >= proposal.quorum else proposal.quorum - vote_total
-                            msg += f"Quorum: {quorum_pct:.2f}% | {votes_needed:,.0f} needed\n\n"
-                            msg += f"\n🔗 [Etherscan](https://etherscan.io/tx/{proposal.txn_hash}) | [Resupply](https://resupply.fi/governance/proposals) | [Hippo Army](https://hippo.army/dao/proposal/{get_hippo_id(proposal.proposal_id)})"
-                            send_alert(CHAT_IDS['RESUPPLY_ALERTS'], msg)
-                
-                # For PASSED proposals, check execution status
-                elif status == ProposalStatus.PASSED.value:
-                    time_since_passed = current_time - proposal.end_time
-                    
-                    if time_since_passed < EXECUTION_DELAY:
-                        status = ProposalStatus.EXECUTION_DELAY.value
-                        # In execution delay period
-                        update = proposals_table.update().where(
-                            and_(
-                                proposals_table.c.proposal_id == proposal.proposal_id,
-                                proposals_table.c.voter_address == proposal.voter_address
-                            )
-                        ).values(
-                            status=ProposalStatus.EXECUTION_DELAY.value,
-                            last_updated=current_time
-                        )
-                        conn.execute(update)
-                        conn.commit()
-                    elif time_since_passed < EXECUTION_DEADLINE:
-                        status = ProposalStatus.EXECUTABLE.value
-                
-                # For EXECUTION_DELAY proposals, check if they're ready for execution
-                elif status == ProposalStatus.EXECUTION_DELAY.value:
-                    time_since_passed = current_time - proposal.end_time
-                    
-                    if time_since_passed >= EXECUTION_DELAY and time_since_passed < EXECUTION_DEADLINE:
-                        # Ready for execution - update status BEFORE sending alert
-                        update = proposals_table.update().where(
-                            and_(
-                                proposals_table.c.proposal_id == proposal.proposal_id,
-                                proposals_table.c.voter_address == proposal.voter_address
-                            )
-                        ).values(
-                            status=ProposalStatus.EXECUTABLE.value,
-                            last_updated=current_time
-                        )
-                        result = conn.execute(update)
-                        if result.rowcount == 0:
-                            logger.warning(f"Failed to update status for proposal {proposal.proposal_id}")
-                            continue
-                        conn.commit()
-                        
-                        # Send alert AFTER successful commit
-                        msg = f"⚡ *Resupply Proposal Ready for Execution*\n\n"
-                        msg += f"Proposal {proposal.proposal_id}: {proposal.description}\n"
-                        msg += f"Execution Deadline: {datetime.fromtimestamp(proposal.end_time + EXECUTION_DEADLINE, UTC).strftime('%Y-%m-%d %H:%M UTC')}\n"
-                        msg += f"\n🔗 [Etherscan](https://etherscan.io/tx/{proposal.txn_hash}) | [Resupply](https://resupply.fi/governance/proposals) | [Hippo Army](https://hippo.army/dao/proposal/{get_hippo_id(proposal.proposal_id)})"
-                        send_alert(CHAT_IDS['RESUPPLY_ALERTS'], msg)
-                
-                # Check for expired proposals (both PASSED and EXECUTION_DELAY)
-                if status in [ProposalStatus.PASSED.value, ProposalStatus.EXECUTION_DELAY.value]:
-                    time_since_passed = current_time - proposal.end_time
-                    if time_since_passed >= EXECUTION_DEADLINE:
-                        # Past execution deadline - update status BEFORE sending alert
-                        update = proposals_table.update().where(
-                            and_(
-                                proposals_table.c.proposal_id == proposal.proposal_id,
-                                proposals_table.c.voter_address == proposal.voter_address
-                            )
-                        ).values(
-                            status=ProposalStatus.EXPIRED.value,
-                            last_updated=current_time
-                        )
-                        result = conn.execute(update)
-                        if result.rowcount == 0:
-                            logger.warning(f"Failed to update status for proposal {proposal.proposal_id}")
-                            continue
-                        conn.commit()
-                        
-                        # Send alert AFTER successful commit
-                        msg = f"⌛ *Resupply Proposal Expired*\n\n"
-                        msg += f"Proposal {proposal.proposal_id}: {proposal.description}\n"
-                        msg += f"Execution Deadline: {datetime.fromtimestamp(proposal.end_time + EXECUTION_DEADLINE, UTC).strftime('%Y-%m-%d %H:%M UTC')}\n"
-                        msg += f"\n🔗 [Etherscan](https://etherscan.io/tx/{proposal.txn_hash}) | [Resupply](https://resupply.fi/governance/proposals) | [Hippo Army](https://hippo.army/dao/proposal/{get_hippo_id(proposal.proposal_id)})"
-                        send_alert(CHAT_IDS['RESUPPLY_ALERTS'], msg)
-    
+                time_remaining = proposal.end_time - current_time
+                if (proposal.status == ProposalStatus.OPEN.value and not proposal.ending_soon_alert_sent
+                        and 0 < time_remaining <= DAY_IN_SECONDS):
+                    ending_soon.append(proposal)
+                status = target_status(proposal, current_time)
+                if status != proposal.status:
+                    transitions.append((proposal, status))
+
+            # Mark alerts and transitions BEFORE sending to prevent duplicates
+            if ending_soon:
+                update = proposals_table.update().where(
+                    and_(
+                        proposals_table.c.proposal_id == bindparam('b_proposal_id'),
+                        proposals_table.c.voter_address == bindparam('b_voter_address')
+                    )
+                ).values(
+                    ending_soon_alert_sent=True,
+                    last_updated=current_time
+                )
+                conn.execute(update, [
+                    {'b_proposal_id': p.proposal_id, 'b_voter_address': p.voter_address} for p in ending_soon
+                ])
+            if transitions:
+                update_statuses(conn, transitions, current_time)
     except SQLAlchemyError as e:
         logger.error(f"Database error in check_proposal_statuses: {str(e)}")
+        # Retry on a later loop rather than spinning on a failing database
+        for key in due:
+            heapq.heappush(deadlines, (current_time + POLL_INTERVAL, *key))
         raise
-    except Exception as e:
-        logger.error(f"Unexpected error in check_proposal_statuses: {str(e)}")
-        raise
+
+    # Proposals that left the pending statuses no longer need deadlines
+    pending = {
+        (p.proposal_id, p.voter_address) for p in proposals
+    } - {
+        (p.proposal_id, p.voter_address) for p, status in transitions if status not in PENDING_STATUSES
+    }
+    for key in due - pending:
+        unschedule_proposal(*key)
+
+    # Send alerts AFTER successful commit
+    for proposal in ending_soon:
+        send_alert(CHAT_IDS['RESUPPLY_ALERTS'], ending_soon_message(proposal))
+    send_transition_alerts(transitions)
 
 def get_registry_voter():
-    registry_address = '0x10101010E0C3171D894B71B3400668aF311e7D94'  # Replace with actual registry address
-    registry_abi = utils.load_abi('./abis/resupply_registry.json')
-    registry_contract = w3.eth.contract(address=registry_address, abi=registry_abi)
-    return registry_contract.functions.getAddress('VOTER').call()
+    return registry.functions.getAddress(VOTER_REGISTRY_KEY).call()
 
-def fetch_logs(contract, event_name, from_block, to_block):
+def get_registry_voter_updates(from_block, to_block, head=None):
+    """(block, voter address) for every VOTER entry the registry set between the blocks"""
+    key_hash = Web3.keccak(text=VOTER_REGISTRY_KEY)
+    logs = fetch_logs(registry, 'EntryUpdated', from_block, to_block, head=head)
+    return [(log.blockNumber, log['args']['addr']) for log in logs if log['args']['key'] == key_hash]
+
+def fetch_logs(contract, event_name, from_block, to_block, head=None):
     try:
-        event = getattr(contract.events, event_name)
-        
-        logs = event.get_logs(
-            fromBlock=from_block,
-            toBlock=to_block
-        )
-        return logs
+        return utils.fetch_event_logs(w3, contract, event_name, from_block, to_block, head=head)
     except Exception as e:
         logger.error(f"Error fetching logs for {event_name}: {str(e)}")
         raise
 
-def main():
-    # Get all voter addresses including from registry
+def get_voter_addresses():
+    """Known voter addresses plus the registry's current voter"""
     voter_addresses = set(VOTER_ADDRESSES)
     try:
         registry_voter = get_registry_voter()
@@ -678,6 +873,50 @@ def main():
     except Exception as e:
         logger.error(f"Error getting registry voter: {str(e)}")
         logger.info("Continuing with known voter addresses only")
+    return voter_addresses
+
+def process_voter_events(voter_address, contract, from_block, to_block, head=None):
+    logs = {
+        event_name: fetch_logs(contract, event_name, from_block, to_block, head=head)
+        for event_name in VOTER_EVENTS
+    }
+    if logs['ProposalCreated']:
+        logger.info(f"Found {len(logs['ProposalCreated'])} ProposalCreated event(s) for voter {voter_address} in blocks {from_block}-{to_block}")
+    
+    # Resolve every timestamp in the window with one batched request
+    timestamps = utils.get_block_timestamps(w3, [log.blockNumber for event_logs in logs.values() for log in event_logs])
+    
+    for log in logs['ProposalCreated']:
+        handle_proposal_created(log, voter_address, timestamps[log.blockNumber])
+    handle_vote_casts(logs['VoteCast'], voter_address, timestamps)
+    for log in logs['ProposalCancelled']:
+        handle_proposal_cancelled(log, voter_address, timestamps[log.blockNumber])
+    for log in logs['ProposalExecuted']:
+        handle_proposal_executed(log, voter_address, timestamps[log.blockNumber])
+    for log in logs['ProposalDescriptionUpdated']:
+        handle_proposal_description_updated(log, voter_address, timestamps[log.blockNumber])
+
+def get_cursor_voters():
+    """Voter contracts that already have a scanner cursor, including ones attached at runtime"""
+    with engine.connect() as conn:
+        return set(conn.execute(select(scanner_progress_table.c.voter_address)).scalars())
+
+def attach_voter(voter_address, voter_contracts, fallback_block):
+    """Start monitoring a voter contract; one without a cursor is backfilled from its creation block"""
+    if voter_address in voter_contracts or voter_address == '0x0000000000000000000000000000000000000000':
+        return
+    if voter_address not in get_cursor_voters():
+        creation_block = utils.contract_creation_block(w3, voter_address)
+        from_block = creation_block if creation_block is not None else fallback_block
+        update_scanner_progress(voter_address, from_block - 1)
+        logger.info(f"Backfilling voter {voter_address} from block {from_block}")
+    voter_contracts[voter_address] = w3.eth.contract(address=voter_address, abi=voter_abi)
+    logger.info(f"Monitoring new voter contract {voter_address}")
+
+def main():
+    voter_addresses = get_voter_addresses()
+    migrate_scanner_progress(voter_addresses)
+    voter_addresses |= get_cursor_voters()
     
     logger.info("\nMonitoring voter contracts:")
     for addr in voter_addresses:
@@ -689,67 +928,54 @@ def main():
         for address in voter_addresses
     }
     
+    load_deadlines()
+    load_tallies()
+    # Registry updates are watched from the oldest voter cursor, so a switch made while we were down is seen too
+    registry_cursor = min(get_last_block_written(address) for address in voter_addresses)
+
     i = 0
     while True:
         try:
             i += 1            
             height = w3.eth.get_block_number()
-            last_block_written = get_last_block_written()
-            to_block = min(last_block_written + MAX_WIDTH, height)
             if i % 1000 == 0:
                 logger.info(f"Loops since startup: {i}")
-                logger.info(f'Listening from block {last_block_written} --> {to_block}')
             
-            # Log every iteration to see progress
-            logger.info(f'[DAO] Scanning blocks {last_block_written} to {to_block} (current chain height: {height})')
+            # Attach voter contracts the registry switched to since the last loop, in MAX_WIDTH windows
+            while registry_cursor <= height:
+                window_end = min(registry_cursor + MAX_WIDTH, height)
+                for block, voter_address in get_registry_voter_updates(registry_cursor, window_end, head=height):
+                    attach_voter(voter_address, voter_contracts, block)
+                registry_cursor = window_end + 1
             
-            # Process events for each voter contract
-            for voter_address, contract in voter_contracts.items():
+            # Process events for each voter contract from its own cursor
+            caught_up = True
+            for voter_address, contract in list(voter_contracts.items()):
+                last_block_written = get_last_block_written(voter_address)
+                to_block = min(last_block_written + MAX_WIDTH, height)
+                logger.info(f'[DAO] Scanning {voter_address} blocks {last_block_written} to {to_block} (current chain height: {height})')
                 try:
-                    # ProposalCreated
-                    logger.info(f"[DAO] Fetching ProposalCreated events for {voter_address}...")
-                    logs = fetch_logs(contract, 'ProposalCreated', last_block_written, to_block)
-                    logger.info(f"[DAO] Got {len(logs)} ProposalCreated events")
-                    if logs:
-                        logger.info(f"Found {len(logs)} ProposalCreated event(s) for voter {voter_address} in blocks {last_block_written}-{to_block}")
-                    for log in logs:
-                        handle_proposal_created(log, voter_address)
-                    
-                    # VoteCast
-                    logs = fetch_logs(contract, 'VoteCast', last_block_written, to_block)
-                    for log in logs:
-                        handle_vote_cast(log, voter_address)
-                    
-                    # ProposalCancelled
-                    logs = fetch_logs(contract, 'ProposalCancelled', last_block_written, to_block)
-                    for log in logs:
-                        handle_proposal_cancelled(log, voter_address)
-                    
-                    # ProposalExecuted
-                    logs = fetch_logs(contract, 'ProposalExecuted', last_block_written, to_block)
-                    for log in logs:
-                        handle_proposal_executed(log, voter_address)
-                    
-                    # ProposalDescriptionUpdated
-                    logs = fetch_logs(contract, 'ProposalDescriptionUpdated', last_block_written, to_block)
-                    for log in logs:
-                        handle_proposal_description_updated(log, voter_address)
+                    process_voter_events(voter_address, contract, last_block_written, to_block, head=height)
                 except Exception as e:
                     logger.error(f"Error processing events for voter {voter_address}: {str(e)}", exc_info=True)
-                    continue  # Continue with next voter contract
+                    caught_up = False
+                    continue  # Leave this voter's cursor in place and continue with the next one
+                update_scanner_progress(voter_address, to_block)
+                caught_up = caught_up and to_block == height
             
-            # Check proposal statuses and send alerts
-            logger.info(f"[DAO] Checking proposal statuses...")
-            check_proposal_statuses()
-            logger.info(f"[DAO] Proposal status check complete")
+            # Check pending proposals against the chain once every event up to the head is applied
+            if caught_up and time.time() - last_reconcile >= RECONCILE_INTERVAL:
+                reconcile_proposals(height)
+                reconcile_tallies()
             
-            # Update scanner progress after processing all events
-            update_scanner_progress(to_block)
+            # Fire status deadlines that came due and send alerts
+            check_proposal_statuses()
             
         except Exception as e:
             logger.error(f"Error in main loop: {str(e)}")
         
-        time.sleep(POLL_INTERVAL)
+        # Wake up for the next deadline rather than a poll interval late
+        time.sleep(seconds_until_next_check())
 
 def get_hippo_id(proposal_id):
     return str(int(proposal_id) + 9)
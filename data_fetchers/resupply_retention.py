@@ -1,5 +1,5 @@
 from web3 import Web3
-from sqlalchemy import create_engine, MetaData, select
+from sqlalchemy import create_engine, MetaData, select, func, text
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 import time
@@ -25,7 +25,7 @@ parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(parent_dir)
 import utils
 from constants import CHAT_IDS
-from schemas.weight_tracker import create_tables
+from schemas.weight_tracker import create_tables, create_supply_checkpoint_tables, create_weight_index_tables, create_weight_history_tables
 
 load_dotenv()
 
@@ -39,9 +39,10 @@ MAX_TELEGRAM_RETRIES = 5  # Maximum number of retries for Telegram API
 INITIAL_RETRY_DELAY = 1  # Initial retry delay in seconds
 CONTRACT_ADDRESS = '0xB9415639618e70aBb71A0F4F8bbB2643Bf337892'
 DEPLOYMENT_BLOCK = 22870945
+SUPPLY_VERIFY_EVERY = int(os.getenv('RETENTION_SUPPLY_VERIFY_EVERY', 20))  # check every Nth checkpoint against totalSupply(); 0 disables
 
 # Connect to Ethereum network
-w3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER_URI, request_kwargs={'timeout': 60}))
+w3 = Web3(utils.make_provider(WEB3_PROVIDER_URI, request_kwargs={'timeout': 60}))
 if not w3.is_connected():
     raise Exception("Failed to connect to Ethereum node")
 
@@ -53,7 +54,15 @@ metadata = MetaData()
 
 # Create tables
 weight_changes_table = create_tables(metadata)
+supply_checkpoints_table = create_supply_checkpoint_tables(metadata)
+retention_weights_table = create_weight_index_tables(metadata)
+retention_weight_history_table = create_weight_history_tables(metadata)
 metadata.create_all(engine)
+# create_all skips indexes on tables that already exist
+for index in weight_changes_table.indexes:
+    index.create(engine, checkfirst=True)
+with engine.begin() as conn:
+    conn.execute(text('DROP INDEX IF EXISTS ix_weight_changes_user_block'))  # superseded by ix_weight_changes_user_block_log
 
 # Initialize telegram bot
 bot = telebot.TeleBot(TELEGRAM_BOT_KEY)
@@ -64,12 +73,25 @@ weight_tracker_abi = json.load(open('abis/retention.json'))
 # Initialize contract
 contract = w3.eth.contract(address=CONTRACT_ADDRESS, abi=weight_tracker_abi)
 
-# Get original total supply (1 block after deployment)
+# Running total supply (wei) at the end of supply_block, accumulated from WeightSet weight diffs
+total_supply = None
+supply_block = None
+original_total_supply = None
+checkpoints_since_verify = 0
+
 def get_original_total_supply():
-    """Get the total supply 1 block after contract deployment"""
+    """Get the total supply 1 block after contract deployment, read from chain once and kept as a checkpoint"""
     try:
+        with engine.connect() as conn:
+            stored = conn.execute(select(supply_checkpoints_table.c.total_supply).where(
+                supply_checkpoints_table.c.block == DEPLOYMENT_BLOCK + 1,
+                supply_checkpoints_table.c.verified
+            )).scalar()
+        if stored is not None:
+            return int(stored) / 10**18
         # Call totalSupply at deployment block + 1
         original_supply = contract.functions.totalSupply().call(block_identifier=DEPLOYMENT_BLOCK + 1)
+        write_checkpoint(DEPLOYMENT_BLOCK + 1, original_supply, verified=True)
         original_supply_eth = original_supply / 10**18
         logger.info(f"Original total supply: {original_supply_eth:,.2f}")
         return original_supply_eth
@@ -77,8 +99,91 @@ def get_original_total_supply():
         logger.error(f"Error getting original total supply: {str(e)}")
         return None
 
-# Get original total supply
-original_total_supply = get_original_total_supply()
+def write_checkpoint(block, supply, verified=False, conn=None):
+    values = {'block': block, 'total_supply': supply, 'verified': verified}
+    if conn is not None:
+        utils.upsert(conn, supply_checkpoints_table, values, index_elements=['block'])
+        return
+    with engine.begin() as conn:
+        utils.upsert(conn, supply_checkpoints_table, values, index_elements=['block'])
+
+def load_supply():
+    """Resume the running total supply from the checkpoint at the scan cursor, or a chain read there"""
+    global total_supply, supply_block, original_total_supply, checkpoints_since_verify
+    original_total_supply = get_original_total_supply()
+    supply_block = get_last_block_written()
+    with engine.connect() as conn:
+        stored = conn.execute(select(supply_checkpoints_table.c.total_supply).where(
+            supply_checkpoints_table.c.block == supply_block
+        )).scalar()
+    if stored is not None:
+        total_supply = int(stored)
+    else:
+        total_supply = contract.functions.totalSupply().call(block_identifier=supply_block)
+        write_checkpoint(supply_block, total_supply, verified=True)
+    checkpoints_since_verify = 0
+    logger.info(f"Running total supply at block {supply_block}: {total_supply / 10**18:,.2f}")
+
+def build_weight_index():
+    """Fill retention_weights with each user's latest weight when it is empty but weight_changes is not"""
+    with engine.begin() as conn:
+        if conn.execute(select(func.count()).select_from(retention_weights_table)).scalar():
+            return
+        ranked = select(
+            weight_changes_table.c.user_address,
+            weight_changes_table.c.new_weight,
+            weight_changes_table.c.block,
+            weight_changes_table.c.log_index,
+            func.row_number().over(
+                partition_by=weight_changes_table.c.user_address,
+                order_by=(weight_changes_table.c.block.desc(), weight_changes_table.c.log_index.desc())
+            ).label('rn')
+        ).subquery()
+        latest = select(ranked.c.user_address, ranked.c.new_weight, ranked.c.block, ranked.c.log_index).where(ranked.c.rn == 1)
+        result = conn.execute(retention_weights_table.insert().from_select(
+            ['user_address', 'weight', 'block', 'log_index'], latest
+        ))
+    if result.rowcount:
+        logger.info(f"Indexed latest retention weight for {result.rowcount} users")
+
+def build_weight_history():
+    """Fill retention_weight_history from weight_changes when it is empty but weight_changes is not"""
+    t = weight_changes_table
+    with engine.begin() as conn:
+        if conn.execute(select(func.count()).select_from(retention_weight_history_table)).scalar():
+            return
+        # Each change holds until the block of the user's next change
+        intervals = select(
+            t.c.user_address,
+            t.c.new_weight,
+            t.c.block,
+            t.c.log_index,
+            func.lead(t.c.block).over(partition_by=t.c.user_address, order_by=(t.c.block, t.c.log_index))
+        )
+        result = conn.execute(retention_weight_history_table.insert().from_select(
+            ['user_address', 'weight', 'from_block', 'log_index', 'to_block'], intervals
+        ))
+    if result.rowcount:
+        logger.info(f"Indexed {result.rowcount} retention weight history rows")
+
+def verify_supply(block):
+    """Every SUPPLY_VERIFY_EVERY checkpoints, compare the running total with totalSupply() and resync on drift"""
+    global total_supply, checkpoints_since_verify
+    if not SUPPLY_VERIFY_EVERY:
+        return
+    checkpoints_since_verify += 1
+    if checkpoints_since_verify < SUPPLY_VERIFY_EVERY:
+        return
+    checkpoints_since_verify = 0
+    try:
+        onchain = contract.functions.totalSupply().call(block_identifier=block)
+    except Exception as e:
+        logger.error(f"Error verifying total supply at block {block}: {str(e)}")
+        return
+    if onchain != total_supply:
+        logger.warning(f"Total supply drift at block {block}: running {total_supply}, on chain {onchain}")
+        total_supply = onchain
+    write_checkpoint(block, total_supply, verified=True)
 
 def format_address(address):
     """Format an address as 0x123...456 with an Etherscan link."""
@@ -150,6 +255,8 @@ def handle_weight_set(event):
     weight_diff_eth = weight_diff / 10**18
     
     # First, try to insert into database - this must succeed before sending alert
+    global total_supply, supply_block
+    new_total_supply = total_supply + weight_diff
     try:
         ins = weight_changes_table.insert().values(
             user_address=user_address,
@@ -162,9 +269,26 @@ def handle_weight_set(event):
             date_str=date_str,
             log_index=log_index
         )
-        conn = engine.connect()
-        conn.execute(ins)
-        conn.commit()
+        with engine.begin() as conn:
+            conn.execute(ins)
+            write_checkpoint(block, new_total_supply, conn=conn)
+            utils.upsert(conn, retention_weights_table, {
+                'user_address': user_address,
+                'weight': new_weight,
+                'block': block,
+                'log_index': log_index
+            }, index_elements=['user_address'])
+            conn.execute(retention_weight_history_table.update().where(
+                retention_weight_history_table.c.user_address == user_address,
+                retention_weight_history_table.c.to_block.is_(None)
+            ).values(to_block=block))
+            conn.execute(retention_weight_history_table.insert().values(
+                user_address=user_address,
+                weight=new_weight,
+                from_block=block,
+                log_index=log_index
+            ))
+        total_supply, supply_block = new_total_supply, block
     except IntegrityError as e:
         # Duplicate entry - already processed, skip alert
         logger.warning(f"Duplicate event skipped (txn: {txn_hash}): {str(e)}")
@@ -177,13 +301,8 @@ def handle_weight_set(event):
     if block == DEPLOYMENT_BLOCK:
         return
     
-    # Get current total supply at this block
-    try:
-        current_total_supply = contract.functions.totalSupply().call(block_identifier=block)
-        current_total_supply_eth = current_total_supply / 10**18
-    except Exception as e:
-        logger.error(f"Error getting current total supply: {str(e)}")
-        current_total_supply_eth = None
+    # Current total supply from the running total
+    current_total_supply_eth = total_supply / 10**18
     
     # Calculate percentages if we have original total supply
     if original_total_supply and current_total_supply_eth:
@@ -220,15 +339,9 @@ def handle_weight_set(event):
     
     send_alert(CHAT_IDS['RESUPPLY_ALERTS'], msg)
 
-def fetch_logs(contract, event_name, from_block, to_block):
+def fetch_logs(contract, event_name, from_block, to_block, head=None):
     try:
-        event = getattr(contract.events, event_name)
-        
-        logs = event.get_logs(
-            fromBlock=from_block,
-            toBlock=to_block
-        )
-        return logs
+        return utils.fetch_event_logs(w3, contract, event_name, from_block, to_block, head=head)
     except Exception as e:
         logger.error(f"Error fetching logs for {event_name}: {str(e)}")
         raise
@@ -237,6 +350,10 @@ def main():
     logger.info(f"Starting weight tracker for contract {CONTRACT_ADDRESS}")
     logger.info(f"Monitoring from block {DEPLOYMENT_BLOCK}")
     
+    build_weight_index()
+    build_weight_history()
+    load_supply()
+    
     i = 0
     while True:
         try:
@@ -251,9 +368,12 @@ def main():
             
             # Process WeightSet events
             try:
-                logs = fetch_logs(contract, 'WeightSet', last_block_written, to_block)
-                for log in logs:
+                logs = fetch_logs(contract, 'WeightSet', last_block_written, to_block, head=height)
+                for n, log in enumerate(logs):
                     handle_weight_set(log)
+                    # Blocks are complete once their last event is applied
+                    if n + 1 == len(logs) or logs[n + 1].blockNumber != log.blockNumber:
+                        verify_supply(log.blockNumber)
                     
             except Exception as e:
                 logger.error(f"Error processing WeightSet events: {str(e)}")
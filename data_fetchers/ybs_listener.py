@@ -1,5 +1,5 @@
 from web3 import Web3
-from sqlalchemy import create_engine, Table, Column, Integer, String, MetaData, select
+from sqlalchemy import create_engine, Table, Column, Integer, String, MetaData, select, case, func
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.exc import SQLAlchemyError, IntegrityError
 from psycopg2 import errors
@@ -10,6 +10,8 @@ parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.append(parent_dir)
 
 import utils
+import queries
+from schemas.ybs import create_position_tables, create_reward_rollup_tables
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -22,7 +24,7 @@ MAX_WIDTH = 200_000
 POLL_INTERVAL = 120 # seconds
 
 # Connect to Ethereum network
-w3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER_URI))
+w3 = Web3(utils.make_provider(WEB3_PROVIDER_URI))
 # Ensure that connection is successful
 if not w3.is_connected():
     raise Exception("Failed to connect to Ethereum node")
@@ -35,6 +37,9 @@ metadata = MetaData()
 
 stakes_table = Table('stakes', metadata, autoload_with=engine)
 rewards_table = Table('rewards', metadata, autoload_with=engine)
+positions_table, position_weeks_table = create_position_tables(metadata)
+reward_weeks_table = create_reward_rollup_tables(metadata)
+metadata.create_all(engine, tables=[positions_table, position_weeks_table, reward_weeks_table])
 
 # Ethereum contract details
 REGISTRY_ADDRESS = '0x262be1d31d0754399d8d5dc63B99c22146E9f738'
@@ -44,46 +49,91 @@ registry_abi = utils.load_abi('./abis/registry.json')
 rewards_abi = utils.load_abi('./abis/rewards.json')
 erc20_abi = utils.load_abi('./abis/erc20.json')
 
+registry = w3.eth.contract(address=REGISTRY_ADDRESS, abi=registry_abi)
+
 deployments = {}
 deployments_by_rewards = {}
 deployments_by_ybs = {}
+registry_token_count = 0  # registry.tokens() entries already loaded
+registry_checked_block = None  # block the registry was last read at
+decoders = {}  # token -> {(address, topic0): (event name, event processor)}
+cursors = {}  # token -> {event name: next block to scan}
 
-height = w3.eth.get_block_number()
+height = None  # chain head as of the current loop
 
 def main():
-    global deployments
-    global deployments_by_rewards
-    global deployments_by_ybs
+    backfill_positions()
+    backfill_reward_rollups()
+    log_loop()
 
-    registry = w3.eth.contract(address=REGISTRY_ADDRESS, abi=registry_abi)
-    num_tokens = registry.functions.numTokens().call()
-    for i in range(num_tokens):
-        token = registry.functions.tokens(i).call()
-        token_symbol = w3.eth.contract(address=token, abi=erc20_abi).functions.symbol().call()
-        deployment = registry.functions.deployments(token).call()
-        deployments[token] = {
-            'ybs': deployment[0],
-            'rewards': deployment[1],
-            'utils': deployment[2],
-            'decimals': 18,
-            'symbol': token_symbol,
-        }
-        deployments_by_rewards[deployments[token]['rewards']] = {
-            'ybs': deployment[0],
-            'token': token,
-            'utils': deployment[2],
-            'decimals': 18,
-            'symbol': token_symbol,
-        }
-        deployments_by_ybs[deployment[0]] = {
-            'rewards': deployment[1],
-            'token': token,
-            'utils': deployment[2],
-            'decimals': 18,
-            'symbol': token_symbol,
-        }
+def load_deployments(block=None):
+    """Add registry deployments not seen yet as of `block`; returns the tokens that were added"""
+    global registry_token_count
+    global registry_checked_block
 
-    log_loop()
+    if block is None:
+        block = w3.eth.get_block_number()
+    num_tokens = registry.functions.numTokens().call(block_identifier=block)
+    new_tokens = []
+    if num_tokens > registry_token_count:
+        new_tokens = utils.multicall(
+            w3, [registry.functions.tokens(i) for i in range(registry_token_count, num_tokens)], block
+        )
+        results = utils.multicall(w3, [
+            fn for token in new_tokens
+            for fn in (
+                registry.functions.deployments(token),
+                w3.eth.contract(address=token, abi=erc20_abi).functions.symbol(),
+            )
+        ], block)
+        for token, deployment, token_symbol in zip(new_tokens, results[::2], results[1::2]):
+            start_block = DEPLOY_BLOCK
+            if registry_checked_block is not None:
+                # Found after startup: scan from the contracts' creation, which can predate their registry entry
+                created = [utils.contract_creation_block(w3, address) for address in deployment[:2]]
+                created = [n for n in created if n is not None]
+                start_block = min(created) if created else registry_checked_block
+            add_deployment(token, deployment, token_symbol, start_block)
+            print(f'Tracking {token_symbol} deployment: ybs {deployment[0]}, rewards {deployment[1]}')
+        registry_token_count = num_tokens
+    registry_checked_block = block
+    return new_tokens
+
+def add_deployment(token, deployment, token_symbol, start_block):
+    ybs_contract = w3.eth.contract(address=deployment[0], abi=ybs_abi)
+    rewards_contract = w3.eth.contract(address=deployment[1], abi=rewards_abi)
+    decoders[token] = {
+        (contract.address.lower(), utils.topic_for_event(contract, event_name)): (event_name, getattr(contract.events, event_name)())
+        for contract, event_name in (
+            (ybs_contract, 'Staked'),
+            (ybs_contract, 'Unstaked'),
+            (rewards_contract, 'RewardDeposited'),
+            (rewards_contract, 'RewardsClaimed'),
+        )
+    }
+    deployments[token] = {
+        'ybs': deployment[0],
+        'rewards': deployment[1],
+        'utils': deployment[2],
+        'decimals': 18,
+        'symbol': token_symbol,
+        'start_block': start_block,
+    }
+    deployments_by_rewards[deployment[1]] = {
+        'ybs': deployment[0],
+        'token': token,
+        'utils': deployment[2],
+        'decimals': 18,
+        'symbol': token_symbol,
+    }
+    deployments_by_ybs[deployment[0]] = {
+        'rewards': deployment[1],
+        'token': token,
+        'utils': deployment[2],
+        'decimals': 18,
+        'symbol': token_symbol,
+        'start_block': start_block,
+    }
 
 def handle_stake_event(event, decimals):
     # Parse the event data and write to the database
@@ -101,13 +151,14 @@ def handle_stake_event(event, decimals):
     date_str = datetime.utcfromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
     txn_hash = event.transactionHash.hex()
     token = deployments_by_ybs[event.address]['token']
-    # Inserting data into the PostgreSQL database
+    is_stake = event['event'] == 'Staked'
+    # Write the event and the account's position in one transaction
     try:
         ins = stakes_table.insert().values(
             ybs=staker,
             account=account,
             amount=amount,
-            is_stake=event['event'] == 'Staked',
+            is_stake=is_stake,
             week=week,
             new_weight=new_weight,   
             net_weight_change=weight_change,
@@ -117,27 +168,114 @@ def handle_stake_event(event, decimals):
             block = event.blockNumber,
             token = token
         )
-        conn = engine.connect()
-        conn.execute(ins)
-        conn.commit()
-        # conn.close()
+        with engine.begin() as conn:
+            conn.execute(ins)
+            position = update_position(
+                conn, staker, token, account, amount if is_stake else -amount, new_weight, week, event.blockNumber, timestamp
+            )
+        queries.position_cache.put((staker, account), position)
         print(f'{deployments[token]["symbol"]} {event["event"]} event written successfully. Txn: {txn_hash}')
     except IntegrityError as e:
-        conn.rollback()
+        pass
     except SQLAlchemyError as e:
         print("Database error occurred:", e)
     except Exception as e:
         print("An error occurred:", e)
-    # finally:
-    #     conn.close()
 
-def fetch_logs(contract, event_name, from_block, to_block):
-    event = getattr(contract.events, event_name)
-    logs = event.get_logs(
-        fromBlock=from_block,
-        toBlock=to_block
+def update_position(conn, ybs, token, account, balance_change, weight, week, block, timestamp):
+    """Apply one stake/unstake to ybs_positions and the account's week row; returns the new position"""
+    ins = utils.insert_for(conn, positions_table).values(
+        ybs=ybs,
+        token=token,
+        account=account,
+        balance=balance_change,
+        weight=weight,
+        week=week,
+        last_block=block,
+        last_timestamp=timestamp
     )
-    return logs
+    ins = ins.on_conflict_do_update(
+        index_elements=['ybs', 'account'],
+        set_={
+            'balance': positions_table.c.balance + ins.excluded.balance,
+            'weight': ins.excluded.weight,
+            'week': ins.excluded.week,
+            'last_block': ins.excluded.last_block,
+            'last_timestamp': ins.excluded.last_timestamp,
+        }
+    ).returning(*positions_table.c)
+    position = dict(conn.execute(ins).one()._mapping)
+    utils.upsert(conn, position_weeks_table, {
+        'ybs': ybs,
+        'account': account,
+        'week': week,
+        'balance': position['balance'],
+        'weight': weight,
+        'block': block,
+    }, index_elements=['ybs', 'account', 'week'])
+    return position
+
+def backfill_positions():
+    """Seed the position tables from the stakes history when they are empty"""
+    with engine.begin() as conn:
+        if conn.execute(select(positions_table.c.id).limit(1)).first() is not None:
+            return
+        rows = conn.execute(select(stakes_table).order_by(stakes_table.c.block, stakes_table.c.id)).all()
+        if not rows:
+            return
+        positions = {}
+        weeks = {}
+        for row in rows:
+            key = (row.ybs, row.account)
+            position = positions.setdefault(key, {'ybs': row.ybs, 'token': row.token, 'account': row.account, 'balance': 0})
+            position['balance'] += row.amount if row.is_stake else -row.amount
+            position.update(weight=row.new_weight, week=row.week, last_block=row.block, last_timestamp=row.timestamp)
+            weeks[key + (row.week,)] = {
+                'ybs': row.ybs, 'account': row.account, 'week': row.week,
+                'balance': position['balance'], 'weight': row.new_weight, 'block': row.block,
+            }
+        conn.execute(positions_table.insert(), list(positions.values()))
+        conn.execute(position_weeks_table.insert(), list(weeks.values()))
+    print(f'Backfilled {len(positions)} positions from {len(rows)} stake events')
+
+def backfill_reward_rollups():
+    """Seed ybs_reward_weeks from the rewards history when it is empty"""
+    with engine.connect() as conn:
+        if conn.execute(select(reward_weeks_table.c.id).limit(1)).first() is not None:
+            return
+        if conn.execute(select(rewards_table.c.id).limit(1)).first() is None:
+            return
+    rebuild_reward_rollups()
+
+def rebuild_reward_rollups(ybs=None):
+    """Recompute ybs_reward_weeks (for one YBS, or all) from the rewards table in one transaction"""
+    deposited = func.sum(case((rewards_table.c.is_claim, 0), else_=rewards_table.c.amount))
+    claimed = func.sum(case((rewards_table.c.is_claim, rewards_table.c.amount), else_=0))
+    query = select(
+        rewards_table.c.ybs,
+        rewards_table.c.token,
+        func.max(rewards_table.c.reward_distributor).label('reward_distributor'),
+        rewards_table.c.week,
+        deposited.label('deposited'),
+        claimed.label('claimed'),
+        func.sum(case((rewards_table.c.is_claim, 0), else_=1)).label('deposit_count'),
+        func.sum(case((rewards_table.c.is_claim, 1), else_=0)).label('claim_count'),
+        func.max(rewards_table.c.block).label('last_block'),
+    ).group_by(rewards_table.c.ybs, rewards_table.c.token, rewards_table.c.week)
+    delete = reward_weeks_table.delete()
+    if ybs:
+        query = query.where(rewards_table.c.ybs == ybs)
+        delete = delete.where(reward_weeks_table.c.ybs == ybs)
+
+    with engine.begin() as conn:
+        rows = [
+            {**row._mapping, 'unclaimed': row.deposited - row.claimed}
+            for row in conn.execute(query)
+        ]
+        conn.execute(delete)
+        if rows:
+            conn.execute(reward_weeks_table.insert(), rows)
+    print(f"Rebuilt {len(rows)} weekly reward rollups{f' for {ybs}' if ybs else ''}")
 
 def handle_reward_event(event, decimals, is_claim):
     # Parse the event data and write to the database
@@ -169,79 +307,88 @@ def handle_reward_event(event, decimals, is_claim):
             block = event.blockNumber,
             token = token
         )
-
-        conn = engine.connect()
-        conn.execute(ins)
-        conn.commit()
+        with engine.begin() as conn:
+            conn.execute(ins)
+            update_reward_week(conn, ybs, token, reward_distributor, week, amount, is_claim, event.blockNumber)
         print(f'{deployments[token]["symbol"]} {event["event"]} event written successfully. Txn: {txn_hash}')
     except IntegrityError as e:
-        conn.rollback()
+        pass
     except SQLAlchemyError as e:
         print("Database error occurred:", e)
     except Exception as e:
         print("An error occurred:", e)
-    # finally:
-    #     conn.close()
+
+def update_reward_week(conn, ybs, token, reward_distributor, week, amount, is_claim, block):
+    """Add one deposit or claim to the (ybs, token, week) rollup"""
+    deposited = 0 if is_claim else amount
+    claimed = amount if is_claim else 0
+    ins = utils.insert_for(conn, reward_weeks_table).values(
+        ybs=ybs,
+        token=token,
+        reward_distributor=reward_distributor,
+        week=week,
+        deposited=deposited,
+        claimed=claimed,
+        unclaimed=deposited - claimed,
+        deposit_count=0 if is_claim else 1,
+        claim_count=1 if is_claim else 0,
+        last_block=block
+    )
+    conn.execute(ins.on_conflict_do_update(
+        index_elements=['ybs', 'token', 'week'],
+        set_={
+            'deposited': reward_weeks_table.c.deposited + ins.excluded.deposited,
+            'claimed': reward_weeks_table.c.claimed + ins.excluded.claimed,
+            'unclaimed': reward_weeks_table.c.unclaimed + ins.excluded.unclaimed,
+            'deposit_count': reward_weeks_table.c.deposit_count + ins.excluded.deposit_count,
+            'claim_count': reward_weeks_table.c.claim_count + ins.excluded.claim_count,
+            'last_block': ins.excluded.last_block,
+        }
+    ))
 
 def log_loop():
+    global height
     i = 0
     while True:
         i += 1
         if i % 100 == 0: print(f"Loops since startup: {i}")
+        height = w3.eth.get_block_number()
+        load_deployments(height)
         for token, deployment in deployments.items():
-            decimals = deployments[token]['decimals']
-            ybs_contract = w3.eth.contract(address=deployment['ybs'], abi=ybs_abi)
-            rewards_contract = w3.eth.contract(address=deployment['rewards'], abi=rewards_abi)
-
-            # Get the last block for Staked and Unstaked events
-            last_block_stake = get_last_block_written(deployment['ybs'], 'Staked')
-            last_block_unstake = get_last_block_written(deployment['ybs'], 'Unstaked')
-            last_block_reward_deposit = get_last_block_written(deployment['ybs'], 'RewardDeposited')
-            last_block_reward_claim = get_last_block_written(deployment['ybs'], 'RewardsClaimed')
-
-            print(f'{deployments[token]["symbol"]} Staked listening from block {last_block_stake}')
-            print(f'{deployments[token]["symbol"]} Staked listening from block {last_block_unstake}')
-            print(f'{deployments[token]["symbol"]} RewardDeposited listening from block {last_block_reward_deposit}')
-            print(f'{deployments[token]["symbol"]} RewardsClaimed listening from block {last_block_reward_claim}')
-            print('----')
-
-            staked_logs = fetch_logs(
-                ybs_contract, 
-                'Staked', 
-                last_block_stake, 
-                height
-            )
-            for log in staked_logs:
-                handle_stake_event(log, decimals)
-
-            unstaked_logs = fetch_logs(
-                ybs_contract, 
-                'Unstaked', 
-                last_block_unstake, 
-                height
-            )
-            for log in unstaked_logs:
-                handle_stake_event(log, decimals)
+            scan_deployment(token, deployment, height)
 
-            reward_claim_logs = fetch_logs(
-                rewards_contract, 
-                'RewardsClaimed', 
-                last_block_reward_claim, 
-                height
-            )
-            for log in reward_claim_logs:
-                handle_reward_event(log, decimals, True)
+        time.sleep(POLL_INTERVAL)
 
-            reward_deposit_logs = fetch_logs(
-                rewards_contract, 
-                'RewardDeposited', 
-                last_block_reward_deposit, 
-                height
-            )
-            for log in reward_deposit_logs:
-                handle_reward_event(log, decimals, False)
+def scan_deployment(token, deployment, to_height):
+    """Scan all four YBS events for one deployment in MAX_WIDTH windows up to `to_height`"""
+    if token not in cursors:
+        cursors[token] = {
+            event_name: get_last_block_written(deployment['ybs'], event_name)
+            for event_name in ('Staked', 'Unstaked', 'RewardDeposited', 'RewardsClaimed')
+        }
+    token_cursors = cursors[token]
+    token_decoders = decoders[token]
+    topics = list({topic for _, topic in token_decoders})
+    decimals = deployment['decimals']
 
-        time.sleep(POLL_INTERVAL)
+    start = min(token_cursors.values())
+    while start <= to_height:
+        end = min(start + MAX_WIDTH - 1, to_height)
+        print(f'{deployment["symbol"]} scanning blocks {start} --> {end}')
+        logs = utils.fetch_raw_logs(w3, [deployment['ybs'], deployment['rewards']], topics, start, end, head=to_height)
+        for log in logs:
+            event_name, processor = token_decoders[(log['address'].lower(), w3.to_hex(log['topics'][0]))]
+            # Each event type resumes from its own cursor; skip what it has already written
+            if log['blockNumber'] < token_cursors[event_name]:
+                continue
+            event = processor.process_log(log)
+            if event_name in ('Staked', 'Unstaked'):
+                handle_stake_event(event, decimals)
+            else:
+                handle_reward_event(event, decimals, event_name == 'RewardsClaimed')
+        for event_name in token_cursors:
+            token_cursors[event_name] = max(token_cursors[event_name], end + 1)
+        start = end + 1
 
 def get_last_block_written(ybs, event_type):
     # Verify which table corresponds to a given event type in the schema
@@ -259,8 +406,8 @@ def get_last_block_written(ybs, event_type):
             query = query.where((table.c.is_claim == is_claim))
         query = query.order_by(table.c.block.desc()).limit(1)
         result = conn.execute(query).scalar()
-        # Return the result or DEPLOY_BLOCK if no entries found
-        return result + 1 if result is not None else DEPLOY_BLOCK
+        # Return the result or the deployment's start block if no entries found
+        return result + 1 if result is not None else deployments_by_ybs[ybs]['start_block']
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
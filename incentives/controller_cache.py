@@ -0,0 +1,97 @@
+"""
+Persistent cache of GaugeController and EmissionsController reads shared by the
+incentive fetchers.
+
+Reads are keyed by (contract, function, args, block) in
+incentive_controller_reads. Cached reads are served from the table, and misses
+are multicalled at their block and stored. A historical read is therefore issued
+once across both fetchers, backfills and restarts. Failed calls are cached as
+null because a revert at a past block is final (reads taken at another block,
+like 'latest' for immutables, are only cached when they succeed).
+
+Immutable values (the EmissionsController's startTime/epochLength) are cached
+under block 0, and the RSUP epoch of a timestamp is derived from them instead of
+calling getEpoch() at every transfer block.
+"""
+import json
+import os
+import sys
+
+from sqlalchemy import select, tuple_
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+import utils
+
+IMMUTABLE_BLOCK = 0
+
+
+def call_key(fn):
+    return fn.address, fn.fn_name, json.dumps(list(fn.args))
+
+
+def cached_reads(w3, engine, table, calls, block, read_block=None):
+    """Decoded results of `calls` at `block`, reading on chain (at `read_block`, default `block`) only what isn't cached"""
+    keys = [call_key(fn) for fn in calls]
+    if not keys:
+        return []
+    with engine.connect() as conn:
+        query = select(table.c.contract, table.c.function, table.c.args, table.c.result).where(
+            table.c.block == block,
+            tuple_(table.c.contract, table.c.function, table.c.args).in_(set(keys)),
+        )
+        cached = {(contract, function, args): result for contract, function, args, result in conn.execute(query)}
+
+    missing = {}
+    for key, fn in zip(keys, calls):
+        if key not in cached:
+            missing.setdefault(key, fn)
+    if missing:
+        results = utils.multicall(w3, list(missing.values()), block if read_block is None else read_block)
+        rows = [
+            {'contract': contract, 'function': function, 'args': args, 'block': block, 'result': result}
+            for (contract, function, args), result in zip(missing, results)
+            if result is not None or read_block is None
+        ]
+        if rows:
+            with engine.begin() as conn:
+                ins = utils.insert_for(conn, table).values(rows)
+                conn.execute(ins.on_conflict_do_nothing(index_elements=['contract', 'function', 'args', 'block']))
+        cached.update(zip(missing, results))
+    return [cached[key] for key in keys]
+
+
+def epoch_schedule(w3, engine, table, emissions_controller):
+    """(startTime, epochLength) of an EmissionsController, read once and cached"""
+    return cached_reads(w3, engine, table, [
+        emissions_controller.functions.startTime(),
+        emissions_controller.functions.epochLength(),
+    ], IMMUTABLE_BLOCK, read_block='latest')
+
+
+def get_epoch(w3, engine, table, emissions_controller, block, timestamp):
+    """EmissionsController.getEpoch() at `block`, computed from its `timestamp`"""
+    start_time, epoch_length = epoch_schedule(w3, engine, table, emissions_controller)
+    if start_time is None or not epoch_length:
+        return emissions_controller.functions.getEpoch().call(block_identifier=block)
+    return (timestamp - start_time) // epoch_length
+
+
+def gauge_reads(w3, engine, table, gauge_controller, gauges, voters, period_ts, block):
+    """{gauge: ([vote_user_slopes for each voter], points_weight, gauge_relative_weight)} at `block`, None if a read failed"""
+    calls = []
+    for gauge in gauges:
+        calls += [gauge_controller.functions.vote_user_slopes(voter, gauge) for voter in voters]
+        calls += [
+            gauge_controller.functions.points_weight(gauge, period_ts),
+            gauge_controller.functions.gauge_relative_weight(gauge, period_ts),
+        ]
+    results = cached_reads(w3, engine, table, calls, block)
+    width = len(voters) + 2
+    reads = {}
+    for i, gauge in enumerate(gauges):
+        gauge_results = results[i * width:(i + 1) * width]
+        reads[gauge] = None if None in gauge_results else (gauge_results[:-2], gauge_results[-2], gauge_results[-1])
+    return reads
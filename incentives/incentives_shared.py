@@ -1,6 +1,5 @@
 """Shared utilities for incentive tracking (YB and RSUP)"""
 import time
-import requests
 import logging
 
 logger = logging.getLogger(__name__)
@@ -14,27 +13,6 @@ def get_periods():
     next_period = current_period + WEEK
     return current_period, next_period
 
-def get_token_price(token_address):
-    """Get token price from DeFiLlama API"""
-    try:
-        response = requests.get(
-            f"https://coins.llama.fi/prices/current/ethereum:{token_address}",
-            timeout=10
-        )
-        if response.status_code != 200:
-            logger.warning(
-                "Token price request failed for %s with status %s",
-                token_address,
-                response.status_code
-            )
-            return None
-
-        data = response.json()
-        return data['coins'][f'ethereum:{token_address}']['price']
-    except Exception as e:
-        logger.error(f"Error fetching token price for {token_address}: {str(e)}")
-        return None
-
 def get_bias(slope: int, end: int, current_period: int) -> int:
     """Calculate bias from slope and end time"""
     if end <= current_period:
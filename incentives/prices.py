@@ -0,0 +1,97 @@
+"""
+Token prices from DeFiLlama for the incentive fetchers.
+
+get_token_prices() prices several tokens with one request, either now or at a
+historical timestamp, and stores the results in token_prices keyed by (token,
+timestamp bucket). Historical prices don't change, so they are served from the
+table indefinitely. The current price is stored under timestamp 0 and refetched
+once it is older than CURRENT_PRICE_TTL. A backfill therefore makes at most one
+price request per period, and none when it is rerun.
+
+DEFILLAMA_API_URL overrides the API base (the benchmarks point it at the fake
+node).
+"""
+import logging
+import os
+import sys
+import time
+
+import requests
+from sqlalchemy import select
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+import utils
+
+logger = logging.getLogger(__name__)
+
+API_URL = os.getenv('DEFILLAMA_API_URL', 'https://coins.llama.fi')
+REQUEST_TIMEOUT = 10  # seconds
+CURRENT_PRICE_TTL = int(os.getenv('TOKEN_PRICE_TTL', 15 * 60))  # seconds
+PRICE_BUCKET = 60 * 60  # historical prices are cached per hour
+SEARCH_WIDTH = '6h'  # how far from the timestamp DeFiLlama may look for a historical price
+CHAIN = 'ethereum'
+CURRENT = 0
+
+
+def price_bucket(timestamp):
+    return CURRENT if timestamp is None else int(timestamp) // PRICE_BUCKET * PRICE_BUCKET
+
+
+def fetch_prices(tokens, timestamp=None):
+    """{token: price} from one DeFiLlama request; tokens it has no price for are left out"""
+    coins = ','.join(f'{CHAIN}:{token}' for token in tokens)
+    if timestamp is None:
+        response = requests.get(f'{API_URL}/prices/current/{coins}', timeout=REQUEST_TIMEOUT)
+    else:
+        response = requests.get(
+            f'{API_URL}/prices/historical/{timestamp}/{coins}',
+            params={'searchWidth': SEARCH_WIDTH},
+            timeout=REQUEST_TIMEOUT
+        )
+    response.raise_for_status()
+    found = {coin.lower(): data for coin, data in response.json().get('coins', {}).items()}
+    prices = {}
+    for token in tokens:
+        data = found.get(f'{CHAIN}:{token}'.lower())
+        if data and data.get('price') is not None:
+            prices[token] = data['price']
+    return prices
+
+
+def get_token_prices(engine, table, tokens, timestamp=None):
+    """{token: USD price, or None if unavailable} at `timestamp` (default: now)"""
+    tokens = list(dict.fromkeys(tokens))
+    bucket = price_bucket(timestamp)
+    now = int(time.time())
+    query = select(table.c.token, table.c.price).where(table.c.token.in_(tokens), table.c.timestamp == bucket)
+    if timestamp is None:
+        query = query.where(table.c.fetched_at > now - CURRENT_PRICE_TTL)
+    with engine.connect() as conn:
+        prices = dict(conn.execute(query).all())
+
+    missing = [token for token in tokens if token not in prices]
+    if missing:
+        try:
+            fetched = fetch_prices(missing, None if timestamp is None else bucket)
+        except Exception as e:
+            logger.warning("Token price request failed for %s: %s", missing, e)
+            fetched = {}
+        if fetched:
+            with engine.begin() as conn:
+                for token, price in fetched.items():
+                    utils.upsert(conn, table, {
+                        'token': token,
+                        'timestamp': bucket,
+                        'price': price,
+                        'fetched_at': now,
+                    }, index_elements=['token', 'timestamp'])
+        prices.update(fetched)
+    return {token: prices.get(token) for token in tokens}
+
+
+def get_token_price(engine, table, token, timestamp=None):
+    """USD price of `token` at `timestamp` (default: now), None if unavailable"""
+    return get_token_prices(engine, table, [token], timestamp)[token]
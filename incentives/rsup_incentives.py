@@ -19,9 +19,11 @@ from constants import CHAT_IDS, RESUPPLY_GAUGES
 import utils
 load_dotenv()
 from incentives.config import INCENTIVE_START_TIMESTAMPS, resolve_chat_id
-from incentives.schema import create_tables
+from incentives.schema import create_tables, create_controller_cache_tables, create_price_tables
+from incentives.controller_cache import gauge_reads, get_epoch
 from utils.web3_utils import closest_block_before_timestamp, closest_block_after_timestamp
-from incentives.incentives_shared import get_periods, get_token_price, get_bias, WEEK
+from incentives.incentives_shared import get_periods, get_bias, WEEK
+from incentives.prices import get_token_price
 
 # Configure logging
 logging.basicConfig(
@@ -62,7 +64,7 @@ CURVE_VOTERS = {
 }
 
 # Connect to Ethereum network
-w3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER_URI, request_kwargs={'timeout': 60}))
+w3 = Web3(utils.make_provider(WEB3_PROVIDER_URI, request_kwargs={'timeout': 60}))
 if not w3.is_connected():
     raise Exception("Failed to connect to Ethereum node")
 
@@ -74,6 +76,8 @@ metadata = MetaData()
 
 # Create tables
 incentives_table = create_tables(metadata)
+controller_reads_table = create_controller_cache_tables(metadata)
+token_prices_table = create_price_tables(metadata)
 metadata.create_all(engine)
 
 # Load ABIs
@@ -160,7 +164,8 @@ def calculate_efficiency(block_number: int, period_ts: int, total_incentives: fl
         votium_incentives = votium_amount / 2  # Divide by 2 because each campaign is 2 weeks
         votemarket_incentives = (total_incentives - votium_amount) / 2
         
-        rsup_price = get_token_price(RSUP)
+        # Value the incentives at the period they buy votes for
+        rsup_price = get_token_price(engine, token_prices_table, RSUP, period_ts)
         price_available = rsup_price is not None and rsup_price > 0
         if not price_available:
             logger.warning("Unable to fetch RSUP price; efficiency metrics will be null")
@@ -171,48 +176,34 @@ def calculate_efficiency(block_number: int, period_ts: int, total_incentives: fl
         prisma_total_bias = 0
         total_bias = 0
         
-        # Calculate biases for each gauge
-        for gauge in RESUPPLY_GAUGES:
-            try:
-                convex_slope = gauge_controller.functions.vote_user_slopes(
-                    CURVE_VOTERS['CONVEX'], 
-                    gauge
-                ).call(block_identifier=block_number)
-                
-                prisma_slope = gauge_controller.functions.vote_user_slopes(
-                    CURVE_VOTERS['PRISMA'], 
-                    gauge
-                ).call(block_identifier=block_number)
-                
-                convex_bias = get_bias(convex_slope[0], convex_slope[2], period_ts) / 1e18
-                prisma_bias = get_bias(prisma_slope[0], prisma_slope[2], period_ts) / 1e18
-                total_gauge_bias = gauge_controller.functions.points_weight(
-                    gauge, 
-                    period_ts
-                ).call(block_identifier=block_number)[0] / 1e18
-                
-                # Get relative weight for this gauge
-                relative_weight = gauge_controller.functions.gauge_relative_weight(
-                    gauge,
-                    period_ts
-                ).call(block_identifier=block_number) / 1e18
-                
-                convex_total_bias += convex_bias
-                prisma_total_bias += prisma_bias
-                total_bias += total_gauge_bias
-                
-                # Store gauge data
-                gauge_data[RESUPPLY_GAUGES[gauge]] = {
-                    'votium_bias': convex_bias,
-                    'prisma_bias': prisma_bias,
-                    'total_bias': total_gauge_bias,
-                    'relative_weight': relative_weight
-                }
-                
-            except Exception as e:
-                logger.warning(f"Failed to get gauge data for {RESUPPLY_GAUGES[gauge]}: {str(e)}")
+        # Calculate biases for each gauge from cached controller reads
+        reads = gauge_reads(
+            w3, engine, controller_reads_table, gauge_controller, list(RESUPPLY_GAUGES),
+            [CURVE_VOTERS['CONVEX'], CURVE_VOTERS['PRISMA']], period_ts, block_number
+        )
+        for gauge, gauge_result in reads.items():
+            if gauge_result is None:
+                logger.warning(f"Failed to get gauge data for {RESUPPLY_GAUGES[gauge]}")
                 continue
-        
+            (convex_slope, prisma_slope), points_weight, relative_weight = gauge_result
+
+            convex_bias = get_bias(convex_slope[0], convex_slope[2], period_ts) / 1e18
+            prisma_bias = get_bias(prisma_slope[0], prisma_slope[2], period_ts) / 1e18
+            total_gauge_bias = points_weight[0] / 1e18
+            relative_weight = relative_weight / 1e18
+
+            convex_total_bias += convex_bias
+            prisma_total_bias += prisma_bias
+            total_bias += total_gauge_bias
+
+            # Store gauge data
+            gauge_data[RESUPPLY_GAUGES[gauge]] = {
+                'votium_bias': convex_bias,
+                'prisma_bias': prisma_bias,
+                'total_bias': total_gauge_bias,
+                'relative_weight': relative_weight
+            }
+
         votemarket_bias = total_bias - convex_total_bias - prisma_total_bias
         
         # Calculate efficiency metrics - votes per USD
@@ -294,7 +285,7 @@ def handle_incentive_transfer(event):
     txn_hash = event.transactionHash.hex()
     log_index = event.logIndex
 
-    epoch = ec.functions.getEpoch().call(block_identifier=block)
+    epoch = get_epoch(w3, engine, controller_reads_table, ec, block, timestamp)
     receipt = w3.eth.get_transaction_receipt(txn_hash)
     votium_amt = 0
     votemarket_amt = 0
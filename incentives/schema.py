@@ -27,3 +27,36 @@ def create_tables(metadata):
     )
 
     return incentives_table
+
+def create_controller_cache_tables(metadata):
+    """Create the shared cache of gauge/emissions controller reads"""
+
+    controller_reads_table = Table(
+        'incentive_controller_reads',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('contract', String, nullable=False),
+        Column('function', String, nullable=False),
+        Column('args', String, nullable=False),  # JSON-encoded call arguments
+        Column('block', BigInteger, nullable=False),  # 0 for immutable values
+        Column('result', JSON, nullable=True),  # decoded return value, null if the call failed
+        UniqueConstraint('contract', 'function', 'args', 'block', name='uq_incentive_controller_reads_call')
+    )
+
+    return controller_reads_table
+
+def create_price_tables(metadata):
+    """Create the token price cache"""
+
+    token_prices_table = Table(
+        'token_prices',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('token', String, nullable=False),
+        Column('timestamp', BigInteger, nullable=False),  # price bucket start, 0 for the current price
+        Column('price', Float, nullable=False),  # USD
+        Column('fetched_at', BigInteger, nullable=False),
+        UniqueConstraint('token', 'timestamp', name='uq_token_prices_token_timestamp')
+    )
+
+    return token_prices_table
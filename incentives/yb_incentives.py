@@ -20,9 +20,11 @@ from constants import CHAT_IDS, YB_GAUGES, YB, DEPOSIT_DIVIDER, VOTIUM_HELPER, V
 import utils
 load_dotenv()
 from incentives.config import INCENTIVE_START_TIMESTAMPS, resolve_chat_id
-from incentives.schema import create_tables
+from incentives.schema import create_tables, create_controller_cache_tables, create_price_tables
+from incentives.controller_cache import gauge_reads
 from utils.web3_utils import closest_block_before_timestamp, closest_block_after_timestamp
-from incentives.incentives_shared import get_periods, get_token_price, get_bias, WEEK
+from incentives.incentives_shared import get_periods, get_bias, WEEK
+from incentives.prices import get_token_price
 
 # Configure logging
 logging.basicConfig(
@@ -49,7 +51,7 @@ CURVE_VOTERS = {
 }
 
 # Connect to Ethereum network
-w3 = Web3(Web3.HTTPProvider(WEB3_PROVIDER_URI, request_kwargs={'timeout': 60}))
+w3 = Web3(utils.make_provider(WEB3_PROVIDER_URI, request_kwargs={'timeout': 60}))
 if not w3.is_connected():
     raise Exception("Failed to connect to Ethereum node")
 
@@ -61,6 +63,8 @@ metadata = MetaData()
 
 # Create tables
 incentives_table = create_tables(metadata)
+controller_reads_table = create_controller_cache_tables(metadata)
+token_prices_table = create_price_tables(metadata)
 metadata.create_all(engine)
 
 # Load ABIs
@@ -152,7 +156,8 @@ def calculate_efficiency(block_number: int, period_ts: int, total_incentives: fl
         votium_incentives = votium_amount / 2  # Divide by 2 because each campaign is 2 weeks
         votemarket_incentives = (total_incentives - votium_amount) / 2
 
-        yb_price = get_token_price(YB)
+        # Value the incentives at the period they buy votes for
+        yb_price = get_token_price(engine, token_prices_table, YB, period_ts)
         price_available = yb_price is not None and yb_price > 0
         if not price_available:
             logger.warning("Unable to fetch YB price; efficiency metrics will be null")
@@ -162,39 +167,30 @@ def calculate_efficiency(block_number: int, period_ts: int, total_incentives: fl
         votium_total_bias = 0
         total_bias = 0
 
-        # Calculate biases for each gauge
-        for gauge in YB_GAUGES:
-            try:
-                convex_slope = gauge_controller.functions.vote_user_slopes(
-                    CURVE_VOTERS['CONVEX'],
-                    gauge
-                ).call(block_identifier=block_number)
-
-                convex_bias = get_bias(convex_slope[0], convex_slope[2], period_ts) / 1e18
-                total_gauge_bias = gauge_controller.functions.points_weight(
-                    gauge,
-                    period_ts
-                ).call(block_identifier=block_number)[0] / 1e18
-
-                # Get relative weight for this gauge
-                relative_weight = gauge_controller.functions.gauge_relative_weight(
-                    gauge,
-                    period_ts
-                ).call(block_identifier=block_number) / 1e18
-
-                votium_total_bias += convex_bias
-                total_bias += total_gauge_bias
-
-                # Store gauge data
-                gauge_data[YB_GAUGES[gauge]] = {
-                    'votium_bias': convex_bias,
-                    'total_bias': total_gauge_bias,
-                    'relative_weight': relative_weight
-                }
-
-            except Exception as e:
-                logger.warning(f"Failed to get gauge data for {YB_GAUGES[gauge]}: {str(e)}")
+        # Calculate biases for each gauge from cached controller reads
+        reads = gauge_reads(
+            w3, engine, controller_reads_table, gauge_controller, list(YB_GAUGES),
+            [CURVE_VOTERS['CONVEX']], period_ts, block_number
+        )
+        for gauge, gauge_result in reads.items():
+            if gauge_result is None:
+                logger.warning(f"Failed to get gauge data for {YB_GAUGES[gauge]}")
                 continue
+            (convex_slope,), points_weight, relative_weight = gauge_result
+
+            convex_bias = get_bias(convex_slope[0], convex_slope[2], period_ts) / 1e18
+            total_gauge_bias = points_weight[0] / 1e18
+            relative_weight = relative_weight / 1e18
+
+            votium_total_bias += convex_bias
+            total_bias += total_gauge_bias
+
+            # Store gauge data
+            gauge_data[YB_GAUGES[gauge]] = {
+                'votium_bias': convex_bias,
+                'total_bias': total_gauge_bias,
+                'relative_weight': relative_weight
+            }
 
         votemarket_bias = total_bias - votium_total_bias
 
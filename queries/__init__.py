@@ -0,0 +1,19 @@
+"""
+Read APIs over the listener tables for dashboards and services
+"""
+from .ybs import (
+    get_position,
+    get_account_positions,
+    get_position_history,
+    get_reward_week,
+    get_reward_weeks,
+    position_cache,
+)
+from .gauge_weights import (
+    get_gauge_weights,
+    get_gauge_weight_history,
+)
+from .retention import (
+    get_retention_weight,
+    get_top_retention_holders,
+)
@@ -0,0 +1,29 @@
+"""
+Curve gauge weight lookups against the weekly curve_gauge_weights snapshots.
+"""
+from sqlalchemy import MetaData, select
+
+from schemas.gauge_weights import create_tables
+
+metadata = MetaData()
+gauge_weights_table = create_tables(metadata)
+
+
+def get_gauge_weights(engine, epoch: int, gauges: list = None) -> dict:
+    """{gauge: snapshot row} for one epoch, optionally limited to `gauges`"""
+    query = select(gauge_weights_table).where(gauge_weights_table.c.epoch == epoch)
+    if gauges is not None:
+        query = query.where(gauge_weights_table.c.gauge.in_(list(gauges)))
+    with engine.connect() as conn:
+        rows = conn.execute(query).all()
+    return {row.gauge: dict(row._mapping) for row in rows}
+
+
+def get_gauge_weight_history(engine, gauge: str, from_epoch: int = None) -> list:
+    """Epoch-by-epoch weight of one gauge, oldest first"""
+    query = select(gauge_weights_table).where(gauge_weights_table.c.gauge == gauge)
+    if from_epoch is not None:
+        query = query.where(gauge_weights_table.c.epoch >= from_epoch)
+    with engine.connect() as conn:
+        rows = conn.execute(query.order_by(gauge_weights_table.c.epoch)).all()
+    return [dict(row._mapping) for row in rows]
@@ -0,0 +1,51 @@
+"""
+Point-in-time retention weight lookups.
+
+get_retention_weight() answers balance-at-block with one indexed read of
+weight_changes (user_address, block, log_index). Current top holders come from
+the retention_weights table ordered by its weight index. Historical top holders
+come from retention_weight_history, where every WeightSet opens an interval that
+the user's next change closes: the weight index is walked from the top and the
+walk stops at the first `n` intervals live at the block, with no replay or sort
+of weight_changes.
+"""
+from sqlalchemy import MetaData, or_, select
+
+from schemas.weight_tracker import create_tables, create_weight_index_tables, create_weight_history_tables
+
+metadata = MetaData()
+weight_changes_table = create_tables(metadata)
+retention_weights_table = create_weight_index_tables(metadata)
+retention_weight_history_table = create_weight_history_tables(metadata)
+
+
+def get_retention_weight(engine, user: str, block: int = None):
+    """Retention weight of `user` at the end of `block` (default: latest), 0 if they had none"""
+    if block is None:
+        query = select(retention_weights_table.c.weight).where(retention_weights_table.c.user_address == user)
+    else:
+        query = select(weight_changes_table.c.new_weight).where(
+            weight_changes_table.c.user_address == user,
+            weight_changes_table.c.block <= block,
+        ).order_by(weight_changes_table.c.block.desc(), weight_changes_table.c.log_index.desc()).limit(1)
+    with engine.connect() as conn:
+        weight = conn.execute(query).scalar()
+    return weight if weight is not None else 0
+
+
+def get_top_retention_holders(engine, n: int = 10, block: int = None) -> list:
+    """[(user, weight)] of the `n` largest retention weights at `block` (default: latest)"""
+    if block is None:
+        query = select(retention_weights_table.c.user_address, retention_weights_table.c.weight).where(
+            retention_weights_table.c.weight > 0
+        ).order_by(retention_weights_table.c.weight.desc()).limit(n)
+    else:
+        t = retention_weight_history_table
+        # Closed at `block` means a later change in the same block replaced it
+        query = select(t.c.user_address, t.c.weight).where(
+            t.c.weight > 0,
+            t.c.from_block <= block,
+            or_(t.c.to_block.is_(None), t.c.to_block > block),
+        ).order_by(t.c.weight.desc()).limit(n)
+    with engine.connect() as conn:
+        return [tuple(row) for row in conn.execute(query)]
@@ -0,0 +1,107 @@
+"""
+YBS position lookups against the incrementally maintained ybs_positions tables.
+
+get_position() is a single-row read served from an in-process LRU cache for
+hot accounts. The listener writes through to the cache when it runs in the
+same process; readers elsewhere see new rows once the entry's TTL expires.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from sqlalchemy import MetaData, select
+
+from schemas.ybs import create_position_tables, create_reward_rollup_tables
+
+POSITION_CACHE_SIZE = 10_000
+POSITION_CACHE_TTL = 60  # seconds
+
+metadata = MetaData()
+positions_table, position_weeks_table = create_position_tables(metadata)
+reward_weeks_table = create_reward_rollup_tables(metadata)
+
+
+class PositionCache:
+    """Thread-safe LRU of (ybs, account) -> position row with a TTL"""
+
+    def __init__(self, maxsize=POSITION_CACHE_SIZE, ttl=POSITION_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return (hit, value); a cached None means the position is known not to exist"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                return False, None
+            self._entries.move_to_end(key)
+            return True, entry[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+position_cache = PositionCache()
+
+
+def get_position(engine, ybs: str, account: str) -> dict:
+    """Current balance and weight of `account` in one YBS, or None if it never staked"""
+    key = (ybs, account)
+    hit, position = position_cache.get(key)
+    if hit:
+        return position
+    with engine.connect() as conn:
+        row = conn.execute(
+            select(positions_table).where(positions_table.c.ybs == ybs, positions_table.c.account == account)
+        ).first()
+    position = dict(row._mapping) if row else None
+    position_cache.put(key, position)
+    return position
+
+
+def get_account_positions(engine, account: str) -> list:
+    """Positions of `account` across every YBS"""
+    with engine.connect() as conn:
+        rows = conn.execute(select(positions_table).where(positions_table.c.account == account)).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def get_position_history(engine, ybs: str, account: str, from_week: int = None) -> list:
+    """Week-by-week balance and weight of `account` in one YBS, oldest first"""
+    query = select(position_weeks_table).where(
+        position_weeks_table.c.ybs == ybs, position_weeks_table.c.account == account
+    )
+    if from_week is not None:
+        query = query.where(position_weeks_table.c.week >= from_week)
+    with engine.connect() as conn:
+        rows = conn.execute(query.order_by(position_weeks_table.c.week)).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def get_reward_week(engine, ybs: str, week: int) -> dict:
+    """Deposited, claimed and unclaimed rewards of one YBS for one week"""
+    with engine.connect() as conn:
+        row = conn.execute(
+            select(reward_weeks_table).where(reward_weeks_table.c.ybs == ybs, reward_weeks_table.c.week == week)
+        ).first()
+    return dict(row._mapping) if row else None
+
+
+def get_reward_weeks(engine, ybs: str, from_week: int = None) -> list:
+    """Weekly reward rollups of one YBS, oldest first"""
+    query = select(reward_weeks_table).where(reward_weeks_table.c.ybs == ybs)
+    if from_week is not None:
+        query = query.where(reward_weeks_table.c.week >= from_week)
+    with engine.connect() as conn:
+        rows = conn.execute(query.order_by(reward_weeks_table.c.week)).all()
+    return [dict(row._mapping) for row in rows]
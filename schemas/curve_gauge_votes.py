@@ -0,0 +1,94 @@
+from sqlalchemy import Table, Column, Integer, String, Float, BigInteger, MetaData, Numeric, UniqueConstraint
+
+def create_tables(metadata):
+    """Create tables for Curve gauge vote data"""
+
+    votes_table = Table(
+        'curve_gauge_votes',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('gauge', String, nullable=False),
+        Column('gauge_name', String),
+        Column('account', String, nullable=False),
+        Column('account_alias', String),
+        Column('amount', Float, nullable=False),
+        Column('weight', Integer, nullable=False),
+        Column('txn_hash', String, nullable=False),
+        Column('timestamp', BigInteger, nullable=False),
+        Column('date_str', String, nullable=False),
+        Column('block', BigInteger, nullable=False),
+        UniqueConstraint('txn_hash', 'gauge', 'account', name='uq_curve_gauge_votes_txn_gauge_account')
+    )
+
+    return votes_table
+
+
+def create_ve_balance_tables(metadata):
+    """Create the cache of historical veCRV balances, keyed by (account, block)"""
+
+    ve_balances_table = Table(
+        've_balances',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('account', String, nullable=False),
+        Column('block', BigInteger, nullable=False),
+        Column('balance', Numeric(78, 0), nullable=False),  # raw balanceOf, 18 decimals
+        UniqueConstraint('account', 'block', name='uq_ve_balances_account_block')
+    )
+
+    return ve_balances_table
+
+
+def create_ve_lock_tables(metadata):
+    """Create tables for the VotingEscrow lock indexer"""
+
+    ve_locks_table = Table(
+        've_locks',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('account', String, nullable=False),
+        Column('amount', Numeric(78, 0), nullable=False),  # locked CRV, 18 decimals
+        Column('end', BigInteger, nullable=False),  # unlock timestamp, 0 once withdrawn
+        Column('block', BigInteger, nullable=False),  # last event applied
+        Column('log_index', Integer, nullable=False),
+        UniqueConstraint('account', name='uq_ve_locks_account')
+    )
+
+    ve_lock_progress_table = Table(
+        've_lock_progress',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('contract', String, nullable=False),
+        Column('last_scanned_block', BigInteger, nullable=False),
+        UniqueConstraint('contract', name='uq_ve_lock_progress_contract')
+    )
+
+    return ve_locks_table, ve_lock_progress_table
+
+
+def create_gauge_directory_tables(metadata):
+    """Create the persisted gauge name directory and its API sync state"""
+
+    gauge_names_table = Table(
+        'curve_gauge_names',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('gauge', String, nullable=False),
+        Column('name', String, nullable=False),
+        Column('source', String, nullable=False),  # 'api', 'manual' or 'onchain'
+        Column('updated_at', BigInteger, nullable=False),
+        UniqueConstraint('gauge', name='uq_curve_gauge_names_gauge')
+    )
+
+    gauge_directory_sync_table = Table(
+        'curve_gauge_directory_sync',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('url', String, nullable=False),
+        Column('etag', String),
+        Column('last_modified', String),
+        Column('synced_at', BigInteger, nullable=False),
+        UniqueConstraint('url', name='uq_curve_gauge_directory_sync_url')
+    )
+
+    return gauge_names_table, gauge_directory_sync_table
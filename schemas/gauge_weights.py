@@ -0,0 +1,21 @@
+from sqlalchemy import Table, Column, Integer, String, Float, BigInteger, MetaData, JSON, UniqueConstraint
+
+def create_tables(metadata):
+    """Create the weekly Curve gauge weight snapshot table"""
+
+    gauge_weights_table = Table(
+        'curve_gauge_weights',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('epoch', BigInteger, nullable=False, index=True),  # week start timestamp
+        Column('gauge', String, nullable=False, index=True),
+        Column('block', BigInteger, nullable=False),  # first block of the epoch, where values were read
+        Column('weight', Float, nullable=False),  # points_weight(gauge, epoch).bias / 1e18
+        Column('slope', Float, nullable=False),  # points_weight(gauge, epoch).slope / 1e18
+        Column('relative_weight', Float, nullable=False),  # gauge_relative_weight(gauge, epoch) / 1e18
+        Column('top_voters', JSON, nullable=False),  # [{account, bias, slope, power, end}] by bias at epoch
+        Column('date_str', String, nullable=False),
+        UniqueConstraint('epoch', 'gauge', name='uq_curve_gauge_weights_epoch_gauge')
+    )
+
+    return gauge_weights_table
@@ -0,0 +1,54 @@
+from sqlalchemy import Table, Column, Integer, String, Numeric, Float, BigInteger, MetaData, UniqueConstraint
+
+def create_tables(metadata):
+    """Create tables for liquid locker compounder harvests"""
+
+    harvest_table = Table(
+        'crv_ll_harvests',
+        metadata,
+        Column('profit', Numeric(30, 18)),
+        Column('timestamp', Integer),
+        Column('name', String),
+        Column('underlying', String),
+        Column('compounder', String),
+        Column('block', Integer),
+        Column('txn_hash', String),
+        Column('date_str', String),
+        UniqueConstraint('txn_hash', 'profit', 'compounder')
+    )
+
+    return harvest_table
+
+def create_apr_tables(metadata):
+    """Create the vault read cache and per-harvest APR tables derived from crv_ll_harvests"""
+
+    vault_reads_table = Table(
+        'll_vault_reads',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('compounder', String, nullable=False),
+        Column('block', BigInteger, nullable=False),
+        Column('total_assets', Float),  # null when the call reverted
+        Column('total_supply', Float),
+        UniqueConstraint('compounder', 'block', name='uq_ll_vault_reads_compounder_block')
+    )
+
+    harvest_aprs_table = Table(
+        'll_harvest_aprs',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('compounder', String, nullable=False),
+        Column('name', String, nullable=False),
+        Column('block', BigInteger, nullable=False),
+        Column('timestamp', BigInteger, nullable=False),
+        Column('prev_block', BigInteger),  # previous harvest, null for the first one
+        Column('prev_timestamp', BigInteger),
+        Column('profit', Float, nullable=False),  # summed over harvests in the block
+        Column('total_assets', Float),
+        Column('price_per_share', Float),
+        Column('pps_apr', Float),  # annualised price-per-share growth since prev harvest
+        Column('profit_apr', Float),  # annualised profit over assets at prev harvest
+        UniqueConstraint('compounder', 'block', name='uq_ll_harvest_aprs_compounder_block')
+    )
+
+    return vault_reads_table, harvest_aprs_table
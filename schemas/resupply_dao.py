@@ -59,8 +59,9 @@ def create_tables(metadata):
         'resupply_scanner_progress',
         metadata,
         Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('voter_address', String, nullable=False, unique=True),  # one cursor row per voter contract
         Column('last_scanned_block', BigInteger, nullable=False),
         Column('updated_at', BigInteger, nullable=False)
     )
 
-    return proposals_table, votes_table, scanner_progress_table 
\ No newline at end of file
+    return proposals_table, votes_table, scanner_progress_table 
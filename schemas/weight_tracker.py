@@ -1,4 +1,4 @@
-from sqlalchemy import Table, Column, Integer, String, Float, DateTime, BigInteger, MetaData, Numeric, UniqueConstraint
+from sqlalchemy import Table, Column, Integer, String, Float, DateTime, BigInteger, Boolean, MetaData, Numeric, UniqueConstraint, Index
 
 def create_tables(metadata):
     """Create tables for weight tracking data"""
@@ -16,7 +16,58 @@ def create_tables(metadata):
         Column('timestamp', BigInteger, nullable=False),
         Column('date_str', String, nullable=False),
         Column('log_index', Integer, nullable=True),  # To distinguish multiple events in same tx
-        UniqueConstraint('txn_hash', 'log_index', name='uq_weight_changes_txn_log')
+        UniqueConstraint('txn_hash', 'log_index', name='uq_weight_changes_txn_log'),
+        Index('ix_weight_changes_user_block_log', 'user_address', 'block', 'log_index')  # point-in-time weight lookups
     )
 
-    return weight_changes_table 
\ No newline at end of file
+    return weight_changes_table 
+
+def create_supply_checkpoint_tables(metadata):
+    """Running total supply at the end of every block with WeightSet events"""
+
+    supply_checkpoints_table = Table(
+        'retention_supply_checkpoints',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('block', BigInteger, nullable=False, unique=True),
+        Column('total_supply', Numeric(78, 0), nullable=False),
+        Column('verified', Boolean, nullable=False, default=False),  # matched totalSupply() on chain
+    )
+
+    return supply_checkpoints_table
+
+
+def create_weight_index_tables(metadata):
+    """Latest retention weight per user, maintained alongside weight_changes"""
+
+    retention_weights_table = Table(
+        'retention_weights',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('user_address', String, nullable=False, unique=True),
+        Column('weight', Numeric(78, 0), nullable=False),
+        Column('block', BigInteger, nullable=False),
+        Column('log_index', Integer, nullable=True),
+        Index('ix_retention_weights_weight', 'weight')  # top holders
+    )
+
+    return retention_weights_table
+
+
+def create_weight_history_tables(metadata):
+    """Each user's retention weight as block intervals, one row per WeightSet event"""
+
+    retention_weight_history_table = Table(
+        'retention_weight_history',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('user_address', String, nullable=False),
+        Column('weight', Numeric(78, 0), nullable=False),
+        Column('from_block', BigInteger, nullable=False),  # weight holds from the end of this block
+        Column('log_index', Integer, nullable=True),
+        Column('to_block', BigInteger, nullable=True),  # block of the user's next change, null while current
+        UniqueConstraint('user_address', 'from_block', 'log_index', name='uq_retention_weight_history_user_block_log'),
+        Index('ix_retention_weight_history_weight', 'weight')  # top holders at a block
+    )
+
+    return retention_weight_history_table
@@ -0,0 +1,98 @@
+from sqlalchemy import Table, Column, Integer, String, Float, Boolean, BigInteger, MetaData, UniqueConstraint
+
+def create_tables(metadata):
+    """Create tables for YBS staking and reward data"""
+
+    stakes_table = Table(
+        'stakes',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('ybs', String, nullable=False),
+        Column('token', String, nullable=False),
+        Column('account', String, nullable=False),
+        Column('amount', Float, nullable=False),
+        Column('is_stake', Boolean, nullable=False),
+        Column('week', Integer, nullable=False),
+        Column('new_weight', Float, nullable=False),
+        Column('net_weight_change', Float, nullable=False),
+        Column('timestamp', BigInteger, nullable=False),
+        Column('date_str', String, nullable=False),
+        Column('txn_hash', String, nullable=False),
+        Column('block', BigInteger, nullable=False),
+        UniqueConstraint('txn_hash', 'ybs', 'account', 'is_stake', 'amount', name='uq_stakes_txn_event')
+    )
+
+    rewards_table = Table(
+        'rewards',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('ybs', String, nullable=False),
+        Column('token', String, nullable=False),
+        Column('reward_distributor', String, nullable=False),
+        Column('account', String, nullable=False),
+        Column('amount', Float, nullable=False),
+        Column('is_claim', Boolean, nullable=False),
+        Column('week', Integer, nullable=False),
+        Column('timestamp', BigInteger, nullable=False),
+        Column('date_str', String, nullable=False),
+        Column('txn_hash', String, nullable=False),
+        Column('block', BigInteger, nullable=False),
+        UniqueConstraint('txn_hash', 'reward_distributor', 'account', 'week', 'is_claim', name='uq_rewards_txn_event')
+    )
+
+    return stakes_table, rewards_table
+
+def create_position_tables(metadata):
+    """Create per-account YBS position state and its week-indexed history"""
+
+    positions_table = Table(
+        'ybs_positions',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('ybs', String, nullable=False),
+        Column('token', String, nullable=False),
+        Column('account', String, nullable=False, index=True),
+        Column('balance', Float, nullable=False),  # staked tokens, net of unstakes
+        Column('weight', Float, nullable=False),  # newUserWeight from the latest event
+        Column('week', Integer, nullable=False),  # week of the latest event
+        Column('last_block', BigInteger, nullable=False),
+        Column('last_timestamp', BigInteger, nullable=False),
+        UniqueConstraint('ybs', 'account', name='uq_ybs_positions_ybs_account')
+    )
+
+    position_weeks_table = Table(
+        'ybs_position_weeks',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('ybs', String, nullable=False),
+        Column('account', String, nullable=False),
+        Column('week', Integer, nullable=False),
+        Column('balance', Float, nullable=False),  # balance after the week's last event
+        Column('weight', Float, nullable=False),  # weight after the week's last event
+        Column('block', BigInteger, nullable=False),
+        UniqueConstraint('ybs', 'account', 'week', name='uq_ybs_position_weeks_ybs_account_week')
+    )
+
+    return positions_table, position_weeks_table
+
+def create_reward_rollup_tables(metadata):
+    """Create weekly reward totals per YBS, maintained from the rewards table"""
+
+    reward_weeks_table = Table(
+        'ybs_reward_weeks',
+        metadata,
+        Column('id', Integer, primary_key=True, autoincrement=True),
+        Column('ybs', String, nullable=False),
+        Column('token', String, nullable=False),
+        Column('reward_distributor', String, nullable=False),
+        Column('week', Integer, nullable=False),
+        Column('deposited', Float, nullable=False),
+        Column('claimed', Float, nullable=False),
+        Column('unclaimed', Float, nullable=False),  # deposited - claimed
+        Column('deposit_count', Integer, nullable=False),
+        Column('claim_count', Integer, nullable=False),
+        Column('last_block', BigInteger, nullable=False),
+        UniqueConstraint('ybs', 'token', 'week', name='uq_ybs_reward_weeks_ybs_token_week')
+    )
+
+    return reward_weeks_table
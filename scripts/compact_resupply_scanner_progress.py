@@ -0,0 +1,31 @@
+"""
+Compact resupply_scanner_progress into one cursor row per voter contract.
+
+The DAO listener used to append a progress row every loop; it now upserts a
+single row per voter and runs this migration itself at startup. Run it by hand
+to compact the table without starting the listener. Voters default to the ones
+the listener monitors (its known voters plus the registry's current voter).
+
+    python scripts/compact_resupply_scanner_progress.py [--voter 0x... ...]
+"""
+import argparse
+import os
+import sys
+
+# Add the parent directory to sys.path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+import data_fetchers.resupply_dao as dao
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--voter', action='append', default=None, help='voter contract to keep a cursor for (repeatable)')
+    args = parser.parse_args()
+
+    voter_addresses = args.voter or dao.get_voter_addresses()
+    if not voter_addresses:
+        raise Exception("No voter addresses given or found in the registry")
+    if not dao.migrate_scanner_progress(voter_addresses):
+        print("resupply_scanner_progress is already compacted")
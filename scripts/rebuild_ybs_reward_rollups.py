@@ -0,0 +1,26 @@
+"""
+Rebuild ybs_reward_weeks from the rewards table.
+
+The listener maintains the rollups incrementally and seeds them at startup when
+the table is empty; run this after backfilling or editing `rewards` directly.
+The rebuild happens in one transaction, so readers never see a partially
+rebuilt table.
+
+    python scripts/rebuild_ybs_reward_rollups.py [--ybs 0x...]
+"""
+import argparse
+import os
+import sys
+
+# Add the parent directory to sys.path
+parent_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(parent_dir)
+
+import data_fetchers.ybs_listener as ybs_listener
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--ybs', default=None, help='only rebuild rollups for this YBS address')
+    args = parser.parse_args()
+    ybs_listener.rebuild_reward_rollups(args.ybs)
@@ -0,0 +1,288 @@
+"""
+Rebuild a listener's tables from the local log archive and RPC cassette.
+
+Raw logs are read from LOG_ARCHIVE_DIR and dispatched, in chain order, through
+the listener's current handlers; enrichment calls (blocks, receipts, eth_call)
+go through the RPC cassette when RPC_CASSETTE is set. Rows are written to
+`<table>__shadow` copies built from the current schema, then swapped in with a
+single transaction, so the live tables stay readable throughout. Alerts are
+muted for the whole run.
+
+The bulk replay runs while the live listener keeps going. The final catch-up
+and the swap need the listener stopped, otherwise rows it writes after the
+catch-up are dropped with the old tables: the script waits for confirmation
+that it is stopped (or takes --listener-stopped when it already is), re-reads
+the cursor, catches up and swaps. Restart the listener afterwards; it resumes
+from the rebuilt tables.
+
+    LOG_ARCHIVE_DIR=./archive RPC_CASSETTE=./rpc.cassette python scripts/reprocess.py dao
+    RPC_CASSETTE_MODE=replay python scripts/reprocess.py ybs --no-swap   # fully offline, inspect shadow only
+
+Targets: dao (resupply_proposals, resupply_votes),
+retention (weight_changes, retention_supply_checkpoints, retention_weights, retention_weight_history),
+incentives (incentives), ybs (stakes, rewards, ybs_positions, ybs_position_weeks, ybs_reward_weeks).
+"""
+import argparse
+import importlib
+import os
+import sys
+
+from dotenv import load_dotenv
+from sqlalchemy import MetaData, PrimaryKeyConstraint, create_engine, func, select, text
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(ROOT_DIR)
+
+import utils
+from schemas.resupply_dao import create_tables as create_dao_tables
+from schemas.weight_tracker import create_tables as create_weight_tracker_tables, create_supply_checkpoint_tables, create_weight_index_tables, create_weight_history_tables
+from schemas.ybs import create_tables as create_ybs_tables, create_position_tables, create_reward_rollup_tables
+from incentives.schema import create_tables as create_incentives_tables
+
+load_dotenv()
+
+SHADOW_SUFFIX = '__shadow'
+
+
+class MutedBot:
+    """Stand-in for telebot.TeleBot so replayed events never alert"""
+
+    def send_message(self, chat_id, msg, **kwargs):
+        pass
+
+
+def replay_contract(w3, contract, handlers, from_block, to_block, with_timestamps=False):
+    """Dispatch archived logs for `contract` to handlers keyed by event name, in chain order.
+
+    With `with_timestamps`, block timestamps are prefetched in one batch and
+    passed to each handler as a second argument.
+    """
+    archive = utils.get_archive()
+    processors = {
+        utils.log_archive.topic_for_event(contract, name): (getattr(contract.events, name)(), handler)
+        for name, handler in handlers.items()
+    }
+    raw_logs = archive.get_logs(w3, contract.address, list(processors), from_block, to_block)
+    events = []
+    for log in raw_logs:
+        processor, handler = processors[w3.to_hex(log['topics'][0])]
+        events.append((processor.process_log(log), handler))
+    if with_timestamps:
+        timestamps = utils.get_block_timestamps(w3, [event.blockNumber for event, _ in events])
+        for event, handler in events:
+            handler(event, timestamps[event.blockNumber])
+    else:
+        for event, handler in events:
+            handler(event)
+    return len(raw_logs)
+
+
+# --- targets -------------------------------------------------------------------
+
+def dao_cursor(modules):
+    """Last block the live DAO listener has scanned for every voter"""
+    dao = modules[0]
+    dao.migrate_scanner_progress(dao.get_voter_addresses())
+    with dao.engine.connect() as conn:
+        last_scanned = conn.execute(select(func.min(dao.scanner_progress_table.c.last_scanned_block))).scalar()
+    return last_scanned if last_scanned is not None else dao.w3.eth.block_number
+
+
+def dao_replay(modules, from_block, to_block):
+    dao = modules[0]
+    for voter_address in sorted(dao.get_voter_addresses() | dao.get_cursor_voters()):
+        contract = dao.w3.eth.contract(address=voter_address, abi=dao.voter_abi)
+        handlers = {
+            'ProposalCreated': dao.handle_proposal_created,
+            'VoteCast': dao.handle_vote_cast,
+            'ProposalCancelled': dao.handle_proposal_cancelled,
+            'ProposalExecuted': dao.handle_proposal_executed,
+            'ProposalDescriptionUpdated': dao.handle_proposal_description_updated,
+        }
+        handlers = {name: (lambda event, timestamp, h=h, v=voter_address: h(event, v, timestamp)) for name, h in handlers.items()}
+        n = replay_contract(dao.w3, contract, handlers, from_block, to_block, with_timestamps=True)
+        print(f'{voter_address}: replayed {n} events')
+    dao.check_proposal_statuses()
+
+
+def retention_replay(modules, from_block, to_block):
+    retention = modules[0]
+    retention.load_supply()  # re-baseline the running total supply against the shadow tables
+    handlers = {'WeightSet': retention.handle_weight_set}
+    n = replay_contract(retention.w3, retention.contract, handlers, from_block, to_block)
+    print(f'{retention.CONTRACT_ADDRESS}: replayed {n} events')
+
+
+def ybs_replay(modules, from_block, to_block):
+    ybs = modules[0]
+    ybs.load_deployments()
+    for token, deployment in ybs.deployments.items():
+        decimals = deployment['decimals']
+        ybs_contract = ybs.w3.eth.contract(address=deployment['ybs'], abi=ybs.ybs_abi)
+        rewards_contract = ybs.w3.eth.contract(address=deployment['rewards'], abi=ybs.rewards_abi)
+        stake_handler = lambda event: ybs.handle_stake_event(event, decimals)
+        n = replay_contract(ybs.w3, ybs_contract, {'Staked': stake_handler, 'Unstaked': stake_handler}, from_block, to_block)
+        n += replay_contract(ybs.w3, rewards_contract, {
+            'RewardsClaimed': lambda event: ybs.handle_reward_event(event, decimals, True),
+            'RewardDeposited': lambda event: ybs.handle_reward_event(event, decimals, False),
+        }, from_block, to_block)
+        print(f'{deployment["symbol"]}: replayed {n} events')
+
+
+def incentives_replay(modules, from_block, to_block):
+    # Incentives are processed per weekly period; the shadow table's own cursor drives the catch-up,
+    # and only periods that have ended by `to_block` are replayed
+    to_timestamp = utils.get_block_timestamp(modules[0].w3, to_block)
+    for module in modules:
+        for period in module.get_missing_periods():
+            if period + module.WEEK > to_timestamp:
+                break
+            module.process_period(period)
+
+
+def ybs_schema(metadata):
+    stakes_table, rewards_table = create_ybs_tables(metadata)
+    positions_table, position_weeks_table = create_position_tables(metadata)
+    return [stakes_table, rewards_table, positions_table, position_weeks_table, create_reward_rollup_tables(metadata)]
+
+
+def head_cursor(modules):
+    return modules[0].w3.eth.block_number
+
+
+TARGETS = {
+    'dao': {
+        'modules': ['data_fetchers.resupply_dao'],
+        'schema': lambda metadata: create_dao_tables(metadata)[:2],
+        'globals': ['proposals_table', 'votes_table'],
+        'start_block': lambda modules: modules[0].START_BLOCK,
+        'cursor': dao_cursor,
+        'replay': dao_replay,
+    },
+    'retention': {
+        'modules': ['data_fetchers.resupply_retention'],
+        'schema': lambda metadata: [
+            create_weight_tracker_tables(metadata),
+            create_supply_checkpoint_tables(metadata),
+            create_weight_index_tables(metadata),
+            create_weight_history_tables(metadata),
+        ],
+        'globals': ['weight_changes_table', 'supply_checkpoints_table', 'retention_weights_table', 'retention_weight_history_table'],
+        'start_block': lambda modules: modules[0].DEPLOYMENT_BLOCK,
+        'cursor': head_cursor,
+        'replay': retention_replay,
+    },
+    'incentives': {
+        'modules': ['incentives.rsup_incentives', 'incentives.yb_incentives'],
+        'schema': lambda metadata: [create_incentives_tables(metadata)],
+        'globals': ['incentives_table'],
+        'start_block': lambda modules: 0,
+        'cursor': head_cursor,
+        'replay': incentives_replay,
+    },
+    'ybs': {
+        'modules': ['data_fetchers.ybs_listener'],
+        'schema': ybs_schema,
+        'globals': ['stakes_table', 'rewards_table', 'positions_table', 'position_weeks_table', 'reward_weeks_table'],
+        'start_block': lambda modules: modules[0].DEPLOY_BLOCK,
+        'cursor': head_cursor,
+        'replay': ybs_replay,
+    },
+}
+
+
+# --- shadow tables -----------------------------------------------------------
+
+def shadow_name(name):
+    return f'{name}{SHADOW_SUFFIX}'
+
+
+def build_shadow_tables(engine, live_tables):
+    """Create empty shadow copies of `live_tables`; indexes are added after the swap"""
+    metadata = MetaData()
+    shadows = []
+    for table in live_tables:
+        shadow = table.to_metadata(metadata, name=shadow_name(table.name))
+        for constraint in shadow.constraints:
+            if constraint.name and not isinstance(constraint, PrimaryKeyConstraint):
+                constraint.name = shadow_name(constraint.name)
+        for index in list(shadow.indexes):
+            shadow.indexes.discard(index)
+        shadows.append(shadow)
+    with engine.begin() as conn:
+        for shadow in shadows:
+            shadow.drop(conn, checkfirst=True)
+            shadow.create(conn)
+    return shadows
+
+
+def swap_tables(engine, live_tables):
+    """Replace each live table with its shadow in one transaction"""
+    postgres = engine.dialect.name == 'postgresql'
+    cascade = ' CASCADE' if postgres else ''
+    with engine.begin() as conn:
+        for table in live_tables:
+            conn.execute(text(f'DROP TABLE IF EXISTS "{table.name}"{cascade}'))
+            conn.execute(text(f'ALTER TABLE "{shadow_name(table.name)}" RENAME TO "{table.name}"'))
+            if postgres:
+                for constraint in table.constraints:
+                    if constraint.name and not isinstance(constraint, PrimaryKeyConstraint):
+                        conn.execute(text(
+                            f'ALTER TABLE "{table.name}" RENAME CONSTRAINT "{shadow_name(constraint.name)}" TO "{constraint.name}"'
+                        ))
+                for column in table.primary_key.columns:
+                    conn.execute(text(
+                        f'ALTER SEQUENCE IF EXISTS "{shadow_name(table.name)}_{column.name}_seq" '
+                        f'RENAME TO "{table.name}_{column.name}_seq"'
+                    ))
+            for index in table.indexes:
+                index.create(conn)
+
+
+def reprocess(target_name, swap=True, listener_stopped=False):
+    if not utils.get_archive():
+        raise Exception("LOG_ARCHIVE_DIR environment variable not set")
+    target = TARGETS[target_name]
+    os.chdir(ROOT_DIR)  # listeners load ABIs from ./abis
+
+    modules = [importlib.import_module(name) for name in target['modules']]
+    engine = create_engine(os.getenv('DATABASE_URI'))
+    live_tables = target['schema'](MetaData())
+    shadows = build_shadow_tables(engine, live_tables)
+    print(f"Created shadow tables: {', '.join(t.name for t in shadows)}")
+
+    # Point the handlers at the shadow tables and mute alerts
+    for module in modules:
+        module.bot = MutedBot()
+        for attr, shadow in zip(target['globals'], shadows):
+            setattr(module, attr, shadow)
+
+    from_block = target['start_block'](modules)
+    to_block = target['cursor'](modules)
+    print(f'Replaying blocks {from_block} --> {to_block}')
+    target['replay'](modules, from_block, to_block)
+
+    if swap and not listener_stopped:
+        input(f'Stop the live {target_name} listener, then press Enter to catch up and swap (Ctrl-C aborts): ')
+
+    # Catch up with whatever the live listener processed while we were replaying
+    latest = target['cursor'](modules)
+    if latest > to_block:
+        print(f'Catching up blocks {to_block + 1} --> {latest}')
+        target['replay'](modules, to_block + 1, latest)
+
+    if not swap:
+        print('Shadow tables left in place (--no-swap)')
+        return
+    swap_tables(engine, live_tables)
+    print(f"Swapped in rebuilt tables: {', '.join(t.name for t in live_tables)}")
+    print(f'Restart the {target_name} listener')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('target', choices=list(TARGETS))
+    parser.add_argument('--no-swap', action='store_true', help='build the shadow tables without swapping them in')
+    parser.add_argument('--listener-stopped', action='store_true', help="the live listener is already stopped; don't wait before the final catch-up")
+    args = parser.parse_args()
+    reprocess(args.target, swap=not args.no_swap, listener_stopped=args.listener_stopped)
@@ -1,12 +1,17 @@
 """
 Utility functions for web3 interactions
 """
-from .abi import load_abi
+from .abi import load_abi, abi_type, abi_signature, find_abi_item
+from .rpc_cassette import make_provider, CassetteProvider
+from .log_archive import LogArchive, fetch_event_logs, fetch_raw_logs, get_archive, topic_for_event
+from .multicall import multicall, MULTICALL3_ADDRESS
+from .db_utils import insert_for, upsert
 from .web3_utils import (
     block_to_date,
     closest_block_after_timestamp,
     closest_block_before_timestamp,
     get_block_timestamp,
+    get_block_timestamps,
     timestamp_to_date_string,
     timestamp_to_string,
     contract_creation_block,
@@ -15,4 +20,4 @@ from .web3_utils import (
     ZERO_ADDRESS,
     DAY,
     WEEK
-) 
\ No newline at end of file
+) 
@@ -4,4 +4,26 @@ import os
 def load_abi(path: str) -> list:
     """Load ABI from JSON file"""
     with open(path, 'r') as f:
-        return json.load(f) 
\ No newline at end of file
+        return json.load(f)
+
+def abi_type(item: dict) -> str:
+    """Canonical ABI type string for an input/output entry, expanding tuple components"""
+    t = item['type']
+    if t.startswith('tuple'):
+        inner = ','.join(abi_type(c) for c in item['components'])
+        return f"({inner}){t[len('tuple'):]}"
+    return t
+
+def find_abi_item(abi: list, name: str, item_type: str = 'function', n_inputs: int = None) -> dict:
+    """Find a function or event entry in an ABI by name (and input count for overloads)"""
+    for item in abi:
+        if item.get('type') != item_type or item.get('name') != name:
+            continue
+        if n_inputs is not None and len(item['inputs']) != n_inputs:
+            continue
+        return item
+    raise KeyError(f"{item_type} {name} not found in ABI")
+
+def abi_signature(item: dict) -> str:
+    """Signature string such as Transfer(address,address,uint256)"""
+    return f"{item['name']}({','.join(abi_type(i) for i in item['inputs'])})"
@@ -0,0 +1,16 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+def insert_for(conn, table):
+    """INSERT construct for the connection's dialect, supporting ON CONFLICT clauses"""
+    if conn.dialect.name == 'postgresql':
+        return postgresql.insert(table)
+    if conn.dialect.name == 'sqlite':
+        return sqlite.insert(table)
+    raise NotImplementedError(f"ON CONFLICT inserts not supported for {conn.dialect.name}")
+
+def upsert(conn, table, values: dict, index_elements: list, update: dict = None):
+    """Insert a row, or update it when `index_elements` conflict (defaults to overwriting every other column)"""
+    stmt = insert_for(conn, table).values(**values)
+    if update is None:
+        update = {k: stmt.excluded[k] for k in values if k not in index_elements}
+    return conn.execute(stmt.on_conflict_do_update(index_elements=index_elements, set_=update))
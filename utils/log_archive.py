@@ -0,0 +1,370 @@
+"""
+Local archive of raw event logs.
+
+Logs are partitioned by (address, topic0) and stored as gzip-compressed JSON
+segments:
+
+    <root>/<address>/<topic0>/<from_block>-<to_block>.json.gz
+
+A SQLite index records which ranges each partition covers (including empty
+ranges), so a query only sends the missing ranges to the RPC node. A range that
+continues a partition's last segment, or follows it within chunk_size blocks,
+extends that segment (an empty range only moves its to_block) until it holds
+SEGMENT_MAX_LOGS logs, so polling doesn't add a file and an index row per call.
+compact() merges contiguous segments left fragmented by older archives. Only
+blocks at least `confirmations` below head are archived; anything newer is
+fetched live on every call and never written.
+
+Listeners opt in by setting LOG_ARCHIVE_DIR; fetch_event_logs() falls back to
+a plain eth_getLogs when it is unset.
+"""
+import gzip
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from hexbytes import HexBytes
+from web3 import Web3
+from web3.datastructures import AttributeDict
+
+from .abi import abi_signature, find_abi_item
+
+DEFAULT_CONFIRMATIONS = 64
+DEFAULT_CHUNK_SIZE = 100_000
+SEGMENT_CACHE_SIZE = 64
+SEGMENT_MAX_LOGS = 10_000  # a segment is extended until it holds this many logs
+
+
+def topic_for_event(contract, event_name) -> str:
+    item = find_abi_item(contract.abi, event_name, item_type='event')
+    return Web3.to_hex(Web3.keccak(text=abi_signature(item)))
+
+
+def serialize_log(log) -> dict:
+    return {
+        'address': log['address'],
+        'topics': [Web3.to_hex(t) for t in log['topics']],
+        'data': Web3.to_hex(log['data']),
+        'blockNumber': log['blockNumber'],
+        'blockHash': Web3.to_hex(log['blockHash']),
+        'transactionHash': Web3.to_hex(log['transactionHash']),
+        'transactionIndex': log['transactionIndex'],
+        'logIndex': log['logIndex'],
+    }
+
+
+def deserialize_log(entry: dict) -> AttributeDict:
+    return AttributeDict({
+        'address': Web3.to_checksum_address(entry['address']),
+        'topics': [HexBytes(t) for t in entry['topics']],
+        'data': HexBytes(entry['data']),
+        'blockNumber': entry['blockNumber'],
+        'blockHash': HexBytes(entry['blockHash']),
+        'transactionHash': HexBytes(entry['transactionHash']),
+        'transactionIndex': entry['transactionIndex'],
+        'logIndex': entry['logIndex'],
+        'removed': False,
+    })
+
+
+def subtract_ranges(start, end, covered):
+    """Return sub-ranges of [start, end] not covered by the sorted (from, to) list"""
+    gaps = []
+    cursor = start
+    for lo, hi in covered:
+        if hi < cursor:
+            continue
+        if lo > end:
+            break
+        if lo > cursor:
+            gaps.append((cursor, lo - 1))
+        cursor = max(cursor, hi + 1)
+        if cursor > end:
+            break
+    if cursor <= end:
+        gaps.append((cursor, end))
+    return gaps
+
+
+class LogArchive:
+    """Archive of raw logs partitioned by (address, topic0)"""
+
+    def __init__(self, root, confirmations=DEFAULT_CONFIRMATIONS, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.root = root
+        self.confirmations = confirmations
+        self.chunk_size = chunk_size
+        os.makedirs(root, exist_ok=True)
+        self._lock = threading.RLock()
+        self._segments = OrderedDict()
+        self._index = sqlite3.connect(os.path.join(root, 'index.sqlite'), check_same_thread=False)
+        self._index.execute(
+            'CREATE TABLE IF NOT EXISTS segments ('
+            'address TEXT NOT NULL, topic0 TEXT NOT NULL, from_block INTEGER NOT NULL, '
+            'to_block INTEGER NOT NULL, path TEXT, count INTEGER NOT NULL, '
+            'PRIMARY KEY (address, topic0, from_block))'
+        )
+        self._index.commit()
+
+    # --- index ---------------------------------------------------------------
+
+    def coverage(self, address, topic0):
+        """Sorted (from_block, to_block) ranges already archived for a partition"""
+        with self._lock:
+            rows = self._index.execute(
+                'SELECT from_block, to_block FROM segments WHERE address = ? AND topic0 = ? ORDER BY from_block',
+                (address.lower(), topic0.lower())
+            ).fetchall()
+        return [(lo, hi) for lo, hi in rows]
+
+    def _segments_overlapping(self, address, topic0, start, end):
+        with self._lock:
+            return self._index.execute(
+                'SELECT path FROM segments WHERE address = ? AND topic0 = ? AND path IS NOT NULL '
+                'AND from_block <= ? AND to_block >= ? ORDER BY from_block',
+                (address.lower(), topic0.lower(), end, start)
+            ).fetchall()
+
+    def _store(self, address, topic0, start, end, logs):
+        """Write a segment file and return its path relative to the root"""
+        os.makedirs(os.path.join(self.root, address, topic0), exist_ok=True)
+        path = os.path.join(address, topic0, f'{start}-{end}.json.gz')
+        tmp = os.path.join(self.root, path + '.tmp')
+        with gzip.open(tmp, 'wt') as f:
+            json.dump([serialize_log(log) for log in logs], f, separators=(',', ':'))
+        os.replace(tmp, os.path.join(self.root, path))
+        return path
+
+    def _discard(self, path):
+        with self._lock:
+            self._segments.pop(path, None)
+        try:
+            os.remove(os.path.join(self.root, path))
+        except FileNotFoundError:
+            pass
+
+    def _write_segment(self, address, topic0, start, end, logs):
+        """Record [start, end] as archived, extending the partition's segment ending at start - 1 when it has room"""
+        address, topic0 = address.lower(), topic0.lower()
+        with self._lock:
+            previous = self._index.execute(
+                'SELECT from_block, path, count FROM segments WHERE address = ? AND topic0 = ? AND to_block = ?',
+                (address, topic0, start - 1)
+            ).fetchone()
+            if previous and previous[2] + len(logs) <= SEGMENT_MAX_LOGS:
+                from_block, old_path, count = previous
+                path = old_path
+                if logs:
+                    existing = self._read_segment(old_path) if old_path else []
+                    path = self._store(address, topic0, from_block, end, existing + list(logs))
+                self._index.execute(
+                    'UPDATE segments SET to_block = ?, path = ?, count = ? '
+                    'WHERE address = ? AND topic0 = ? AND from_block = ?',
+                    (end, path, count + len(logs), address, topic0, from_block)
+                )
+                self._index.commit()
+                if old_path and old_path != path:
+                    self._discard(old_path)
+                return
+            path = self._store(address, topic0, start, end, logs) if logs else None
+            self._index.execute(
+                'INSERT OR REPLACE INTO segments (address, topic0, from_block, to_block, path, count) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (address, topic0, start, end, path, len(logs))
+            )
+            self._index.commit()
+
+    def compact(self):
+        """Merge runs of contiguous segments into as few as SEGMENT_MAX_LOGS allows; returns index rows removed"""
+        removed = 0
+        with self._lock:
+            rows = self._index.execute(
+                'SELECT address, topic0, from_block, to_block, path, count FROM segments '
+                'ORDER BY address, topic0, from_block'
+            ).fetchall()
+            runs = []
+            for row in rows:
+                run = runs[-1] if runs else None
+                if (run and run[-1][:2] == row[:2] and run[-1][3] + 1 == row[2]
+                        and sum(r[5] for r in run) + row[5] <= SEGMENT_MAX_LOGS):
+                    run.append(row)
+                else:
+                    runs.append([row])
+            for run in runs:
+                if len(run) == 1:
+                    continue
+                address, topic0 = run[0][:2]
+                start, end = run[0][2], run[-1][3]
+                logs = [log for row in run if row[4] for log in self._read_segment(row[4])]
+                path = self._store(address, topic0, start, end, logs) if logs else None
+                self._index.execute(
+                    'DELETE FROM segments WHERE address = ? AND topic0 = ? AND from_block >= ? AND from_block <= ?',
+                    (address, topic0, start, end)
+                )
+                self._index.execute(
+                    'INSERT INTO segments (address, topic0, from_block, to_block, path, count) VALUES (?, ?, ?, ?, ?, ?)',
+                    (address, topic0, start, end, path, len(logs))
+                )
+                self._index.commit()
+                for row in run:
+                    if row[4] and row[4] != path:
+                        self._discard(row[4])
+                removed += len(run) - 1
+        return removed
+
+    def _read_segment(self, path):
+        with self._lock:
+            if path in self._segments:
+                self._segments.move_to_end(path)
+                return self._segments[path]
+        with gzip.open(os.path.join(self.root, path), 'rt') as f:
+            logs = [deserialize_log(entry) for entry in json.load(f)]
+        with self._lock:
+            self._segments[path] = logs
+            if len(self._segments) > SEGMENT_CACHE_SIZE:
+                self._segments.popitem(last=False)
+        return logs
+
+    # --- queries -------------------------------------------------------------
+
+    def get_logs(self, w3, addresses, topics0, from_block, to_block, head=None):
+        """Raw logs for any of `addresses` whose topic0 is any of `topics0`, sorted by position"""
+        addresses = [addresses] if isinstance(addresses, str) else list(addresses)
+        topics0 = [topics0] if isinstance(topics0, str) else list(topics0)
+        if head is None:
+            head = w3.eth.block_number
+        safe_head = min(to_block, head - self.confirmations)
+        partitions = [(a, t) for a in addresses for t in topics0]
+
+        logs = []
+        live_from = max(from_block, safe_head + 1)
+        tail = None
+        if from_block <= safe_head:
+            gaps = {p: self._gaps(p, from_block, safe_head) for p in partitions}
+            ranges = self._merge(g for p_gaps in gaps.values() for g in p_gaps)
+            for n, (start, end) in enumerate(ranges):
+                # The unconfirmed tail rides along with the last archived range's eth_getLogs
+                joins_tail = n == len(ranges) - 1 and end == safe_head and live_from <= to_block
+                fetched_tail = self._archive_range(w3, addresses, topics0, start, end, gaps, to_block if joins_tail else None)
+                if joins_tail:
+                    tail = fetched_tail
+            for address, topic0 in partitions:
+                for (path,) in self._segments_overlapping(address, topic0, from_block, safe_head):
+                    logs += [
+                        log for log in self._read_segment(path)
+                        if from_block <= log['blockNumber'] <= safe_head
+                    ]
+        if tail is not None:
+            logs += tail
+        elif live_from <= to_block:
+            logs += self._fetch(w3, addresses, topics0, live_from, to_block)
+        return sorted(logs, key=lambda log: (log['blockNumber'], log['logIndex']))
+
+    def _gaps(self, partition, start, end):
+        """Unarchived sub-ranges of [start, end] for a partition.
+
+        A hole of up to chunk_size blocks between the partition's last segment and
+        `start` (the unconfirmed tail a previous poll fetched live) is included, so
+        that segment is extended instead of a new one being started.
+        """
+        covered = self.coverage(*partition)
+        before = [hi for lo, hi in covered if hi < start]
+        if before and start - before[-1] - 1 <= self.chunk_size:
+            start = before[-1] + 1
+        return subtract_ranges(start, end, covered)
+
+    def _archive_range(self, w3, addresses, topics0, start, end, gaps, tail_end=None):
+        """Fetch and archive [start, end]; with `tail_end`, the last request runs on to it and the logs past `end` are returned"""
+        tail = []
+        chunk_start = start
+        while chunk_start <= end:
+            chunk_end = min(end, chunk_start + self.chunk_size - 1)
+            fetch_end = tail_end if tail_end is not None and chunk_end == end else chunk_end
+            fetched = self._fetch(w3, addresses, topics0, chunk_start, fetch_end)
+            tail += [log for log in fetched if log['blockNumber'] > end]
+            for (address, topic0), partition_gaps in gaps.items():
+                for lo, hi in partition_gaps:
+                    lo, hi = max(lo, chunk_start), min(hi, chunk_end)
+                    if lo > hi:
+                        continue
+                    self._write_segment(address, topic0, lo, hi, [
+                        log for log in fetched
+                        if log['address'].lower() == address.lower()
+                        and Web3.to_hex(log['topics'][0]).lower() == topic0.lower()
+                        and lo <= log['blockNumber'] <= hi
+                    ])
+            chunk_start = chunk_end + 1
+        return tail
+
+    def _fetch(self, w3, addresses, topics0, start, end):
+        """eth_getLogs over [start, end], halving the range when the node rejects it"""
+        log_filter = {
+            'address': addresses if len(addresses) > 1 else addresses[0],
+            'topics': [topics0 if len(topics0) > 1 else topics0[0]],
+            'fromBlock': start,
+            'toBlock': end,
+        }
+        try:
+            return [deserialize_log(serialize_log(log)) for log in w3.eth.get_logs(log_filter)]
+        except Exception:
+            if end <= start:
+                raise
+            mid = (start + end) // 2
+            return self._fetch(w3, addresses, topics0, start, mid) + self._fetch(w3, addresses, topics0, mid + 1, end)
+
+    @staticmethod
+    def _merge(ranges):
+        merged = []
+        for lo, hi in sorted(ranges):
+            if merged and lo <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+            else:
+                merged.append((lo, hi))
+        return merged
+
+
+_archive = None
+_archive_lock = threading.Lock()
+
+
+def get_archive():
+    """Process-wide archive configured from LOG_ARCHIVE_DIR, or None when unset"""
+    global _archive
+    root = os.getenv('LOG_ARCHIVE_DIR')
+    if not root:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = LogArchive(
+                root,
+                confirmations=int(os.getenv('LOG_ARCHIVE_CONFIRMATIONS', DEFAULT_CONFIRMATIONS)),
+            )
+            _archive.compact()
+    return _archive
+
+
+def fetch_raw_logs(w3, addresses, topics0, from_block, to_block, head=None):
+    """Undecoded logs matching any address and any topic0, from the archive when configured"""
+    archive = get_archive()
+    if archive is not None:
+        return archive.get_logs(w3, addresses, topics0, from_block, to_block, head=head)
+    addresses = [addresses] if isinstance(addresses, str) else list(addresses)
+    topics0 = [topics0] if isinstance(topics0, str) else list(topics0)
+    return w3.eth.get_logs({
+        'address': addresses if len(addresses) > 1 else addresses[0],
+        'topics': [topics0 if len(topics0) > 1 else topics0[0]],
+        'fromBlock': from_block,
+        'toBlock': to_block,
+    })
+
+
+def fetch_event_logs(w3, contract, event_name, from_block, to_block, head=None):
+    """Decoded logs for one contract event, served from the archive when configured"""
+    event = getattr(contract.events, event_name)
+    archive = get_archive()
+    if archive is None:
+        return event.get_logs(fromBlock=from_block, toBlock=to_block)
+    raw_logs = archive.get_logs(w3, contract.address, topic_for_event(contract, event_name), from_block, to_block, head=head)
+    processor = event()
+    return [processor.process_log(log) for log in raw_logs]
@@ -0,0 +1,60 @@
+"""
+Batch contract reads through Multicall3's aggregate3.
+
+Multicall3 is deployed at the same address on mainnet and every major chain,
+so N view calls cost one eth_call. Calls are given as bound web3 contract
+functions, e.g. registry.functions.tokens(i), and results come back decoded
+the same way `.call()` would return them; failed calls yield None.
+"""
+import os
+
+from eth_abi import decode
+from web3._utils.abi import map_abi_data
+from web3._utils.normalizers import BASE_RETURN_NORMALIZERS
+
+from .abi import abi_type, load_abi
+
+MULTICALL3_ADDRESS = '0xcA11bde05977b3631167028862bE2a173976CA11'
+MULTICALL3_DEPLOY_BLOCK = 14_353_601  # mainnet; older blocks fall back to individual calls
+MULTICALL3_ABI_PATH = os.path.join(os.path.dirname(__file__), os.pardir, 'abis', 'multicall3.json')
+DEFAULT_BATCH_SIZE = 500
+
+_multicall3_abi = None
+
+
+def multicall3(w3):
+    global _multicall3_abi
+    if _multicall3_abi is None:
+        _multicall3_abi = load_abi(MULTICALL3_ABI_PATH)
+    return w3.eth.contract(address=MULTICALL3_ADDRESS, abi=_multicall3_abi)
+
+
+def decode_result(fn, success, data):
+    """Decode one aggregate3 result like ContractFunction.call() would"""
+    outputs = fn.abi.get('outputs', [])
+    if not success or (outputs and not data):
+        return None
+    types = [abi_type(o) for o in outputs]
+    values = map_abi_data(BASE_RETURN_NORMALIZERS, types, decode(types, data))
+    return values[0] if len(values) == 1 else list(values)
+
+
+def call_or_none(fn, block_identifier):
+    try:
+        return fn.call(block_identifier=block_identifier)
+    except Exception:
+        return None
+
+
+def multicall(w3, calls, block_identifier='latest', batch_size=DEFAULT_BATCH_SIZE):
+    """Run bound contract function calls in aggregate3 batches and return their decoded results"""
+    if isinstance(block_identifier, int) and block_identifier < MULTICALL3_DEPLOY_BLOCK:
+        return [call_or_none(fn, block_identifier) for fn in calls]
+    contract = multicall3(w3)
+    results = []
+    for i in range(0, len(calls), batch_size):
+        batch = calls[i:i + batch_size]
+        payload = [(fn.address, True, fn._encode_transaction_data()) for fn in batch]
+        returned = contract.functions.aggregate3(payload).call(block_identifier=block_identifier)
+        results += [decode_result(fn, success, data) for fn, (success, data) in zip(batch, returned)]
+    return results
@@ -0,0 +1,192 @@
+"""
+Record/replay layer for JSON-RPC traffic.
+
+CassetteProvider wraps a real provider and stores every request/response pair
+in a compact SQLite file keyed by the canonical request. Requests pinned to a
+historical block (or to a hash) are immutable, so they can be replayed without
+touching the network.
+
+Modes:
+    record  always forward, store every response (overwrites older entries)
+    replay  never forward; a request missing from the cassette raises CassetteMiss
+    cache   serve pinned requests from the cassette, forward everything else
+            and store what comes back
+
+Listeners opt in through the environment:
+    RPC_CASSETTE=/path/to/rpc.cassette RPC_CASSETTE_MODE=replay python data_fetchers/...
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from collections import Counter
+
+from web3 import Web3
+from web3._utils.encoding import Web3JsonEncoder
+from web3.providers.base import BaseProvider
+
+MODES = ('record', 'replay', 'cache')
+DEFAULT_REORG_DEPTH = 64  # blocks below the last seen head treated as final
+
+# Methods whose answer never changes once it is non-null
+HASH_PINNED_METHODS = {
+    'eth_chainId',
+    'net_version',
+    'eth_getTransactionReceipt',
+    'eth_getTransactionByHash',
+    'eth_getBlockByHash',
+}
+# Position of the block identifier in params for block-pinned methods
+BLOCK_PARAM_INDEX = {
+    'eth_call': 1,
+    'eth_getBalance': 1,
+    'eth_getCode': 1,
+    'eth_getTransactionCount': 1,
+    'eth_getStorageAt': 2,
+    'eth_getBlockByNumber': 0,
+}
+
+
+class CassetteMiss(Exception):
+    pass
+
+
+def canonical(value):
+    """Normalise params so equivalent requests share a key (hex case, int block ids)"""
+    if isinstance(value, dict):
+        return {k: canonical(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [canonical(v) for v in value]
+    if isinstance(value, str) and value.startswith('0x'):
+        return value.lower()
+    if isinstance(value, int) and not isinstance(value, bool):
+        return hex(value)
+    return value
+
+
+def request_key(method, params) -> str:
+    body = json.dumps([method, canonical(params or [])], cls=Web3JsonEncoder, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def block_number(tag):
+    """Return the block number of a block identifier, or None for latest/pending/etc."""
+    if isinstance(tag, int) and not isinstance(tag, bool):
+        return tag
+    if isinstance(tag, str) and tag.startswith('0x'):
+        return int(tag, 16)
+    return None
+
+
+class CassetteStore:
+    """SQLite-backed map of request key -> zlib-compressed JSON response"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS responses ('
+            'key TEXT PRIMARY KEY, method TEXT NOT NULL, pinned INTEGER NOT NULL, body BLOB NOT NULL)'
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute('SELECT body FROM responses WHERE key = ?', (key,)).fetchone()
+        return json.loads(zlib.decompress(row[0])) if row else None
+
+    def put(self, key, method, pinned, response):
+        body = zlib.compress(json.dumps(response, cls=Web3JsonEncoder, separators=(',', ':')).encode())
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses (key, method, pinned, body) VALUES (?, ?, ?, ?)',
+                (key, method, int(pinned), body)
+            )
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class CassetteProvider(BaseProvider):
+    """Provider wrapper that records and replays JSON-RPC responses"""
+
+    def __init__(self, provider, path, mode='cache', reorg_depth=DEFAULT_REORG_DEPTH):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode {mode}, expected one of {MODES}")
+        super().__init__()
+        self.provider = provider
+        self.store = CassetteStore(path)
+        self.mode = mode
+        self.reorg_depth = reorg_depth
+        self.head = None
+        self.stats = Counter()
+
+    def is_pinned(self, method, params) -> bool:
+        """Whether a request's answer can never change"""
+        params = params or []
+        if method in HASH_PINNED_METHODS:
+            return True
+        if method == 'eth_getLogs':
+            log_filter = params[0] if params else {}
+            if log_filter.get('blockHash'):
+                return True
+            return self._is_final(block_number(log_filter.get('toBlock'))) and block_number(log_filter.get('fromBlock')) is not None
+        index = BLOCK_PARAM_INDEX.get(method)
+        if index is None or len(params) <= index:
+            return False
+        return self._is_final(block_number(params[index]))
+
+    def _is_final(self, number) -> bool:
+        if number is None:
+            return False
+        # In replay mode there is no live head; everything recorded is trusted
+        if self.mode == 'replay':
+            return True
+        return self.head is not None and number <= self.head - self.reorg_depth
+
+    def make_request(self, method, params):
+        key = request_key(method, params)
+        if self.mode == 'replay':
+            response = self.store.get(key)
+            if response is None:
+                self.stats['miss'] += 1
+                raise CassetteMiss(f"No recorded response for {method} {params}")
+            self.stats['hit'] += 1
+            return response
+
+        pinned = self.is_pinned(method, params)
+        if self.mode == 'cache' and pinned:
+            response = self.store.get(key)
+            if response is not None:
+                self.stats['hit'] += 1
+                return response
+
+        self.stats['forward'] += 1
+        response = self.provider.make_request(method, params)
+        if method == 'eth_blockNumber' and 'result' in response:
+            self.head = int(response['result'], 16)
+        if self.mode == 'record' or ('error' not in response and response.get('result') is not None):
+            self.store.put(key, method, pinned, response)
+        return response
+
+    def is_connected(self, show_traceback=False) -> bool:
+        if self.mode == 'replay':
+            return True
+        return self.provider.is_connected(show_traceback)
+
+
+def make_provider(uri, request_kwargs=None):
+    """HTTP provider for `uri`, wrapped in a cassette when RPC_CASSETTE is set"""
+    provider = Web3.HTTPProvider(uri, request_kwargs=request_kwargs)
+    path = os.getenv('RPC_CASSETTE')
+    if not path:
+        return provider
+    mode = os.getenv('RPC_CASSETTE_MODE', 'cache').lower()
+    return CassetteProvider(provider, path, mode=mode)
@@ -3,10 +3,12 @@ from datetime import datetime
 from functools import lru_cache
 import time
 import os
+import requests
 from dotenv import load_dotenv
 
 DAY = 60 * 60 * 24
 WEEK = DAY * 7
+TIMESTAMP_BATCH_SIZE = 100  # eth_getBlockByNumber requests per JSON-RPC batch
 ZERO_ADDRESS = '0x0000000000000000000000000000000000000000'
 
 @lru_cache(maxsize=1000)
@@ -47,6 +49,38 @@ def get_block_timestamp(web3: Web3, height: int) -> int:
     """Get timestamp for a given block number"""
     return web3.eth.get_block(height).timestamp
 
+_block_timestamps = {}
+
+def get_block_timestamps(web3: Web3, blocks) -> dict:
+    """{block: timestamp} for `blocks`, fetched with batched JSON-RPC requests over HTTP.
+
+    Other providers (e.g. the RPC cassette) are asked one block at a time.
+    Timestamps are kept in a process-wide store, so a block is only fetched once.
+    """
+    missing = sorted({int(block) for block in blocks} - set(_block_timestamps))
+    if missing and isinstance(web3.provider, Web3.HTTPProvider):
+        for i in range(0, len(missing), TIMESTAMP_BATCH_SIZE):
+            chunk = missing[i:i + TIMESTAMP_BATCH_SIZE]
+            batch = [
+                {'jsonrpc': '2.0', 'id': n, 'method': 'eth_getBlockByNumber', 'params': [hex(block), False]}
+                for n, block in enumerate(chunk)
+            ]
+            response = requests.post(web3.provider.endpoint_uri, json=batch, **web3.provider.get_request_kwargs())
+            response.raise_for_status()
+            for item in response.json():
+                if item.get('error') or not item.get('result'):
+                    raise Exception(f"eth_getBlockByNumber failed for block {chunk[item['id']]}: {item.get('error')}")
+                _block_timestamps[chunk[item['id']]] = int(item['result']['timestamp'], 16)
+    else:
+        for block in missing:
+            _block_timestamps[block] = web3.eth.get_block(block).timestamp
+    timestamps = {int(block): _block_timestamps[int(block)] for block in blocks}
+    if len(_block_timestamps) > 100_000:
+        # Keep the most recent blocks; scans move forward
+        for block in sorted(_block_timestamps)[:-10_000]:
+            del _block_timestamps[block]
+    return timestamps
+
 def timestamp_to_date_string(ts: int) -> str:
     """Convert timestamp to date string"""
     return datetime.utcfromtimestamp(ts).strftime("%m/%d/%Y, %H:%M:%S")